@@ -1,17 +1,25 @@
 from flask import Flask
-from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_session import Session
 from flask_migrate import Migrate
 from config import ApplicationConfig
 from models import db, ma, User, TauxTVA
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
+from passwords import hash_password
 import os, logging
 from routes.admin import admin_bp
 from routes.articles import articles_bp
 from routes.auth import auth_bp
 from routes.clients import clients_bp
 from routes.devis import devis_bp
+from routes.search import search_bp
+from routes.export import export_bp
+from routes.metrics import metrics_bp
+import database
+import refdata
+import metrics
+import profiler
 
 # CONSTANTS
 load_dotenv()
@@ -28,9 +36,16 @@ if not ADMIN_MAIL or not ADMIN_PASSWORD:
 app = Flask(__name__,template_folder="pdf")
 app.config.from_object(ApplicationConfig)
 CORS(app, origins=[FRONTEND_URL], supports_credentials=True)
-bcrypt = Bcrypt()
-bcrypt.init_app(app)
+# Client address from X-Forwarded-For behind nginx (login rate limit, logs)
+if ApplicationConfig.TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=ApplicationConfig.TRUSTED_PROXY_COUNT)
 server_session = Session(app)
+# Request/SQL/session metrics, see metrics.py
+metrics.init_app(app)
+# Opt-in sampling profiler, see profiler.py
+profiler.init_app(app)
+# flask refdata-reload, see refdata.py
+refdata.init_app(app)
 
 # Config logging
 logging.basicConfig(
@@ -39,7 +54,8 @@ logging.basicConfig(
     handlers=[logging.FileHandler("app.log"),logging.StreamHandler()]
 )
 
-# Config BDD
+# Config BDD (pool and statement timeouts in database.py, before the engine is created)
+database.init_app(app)
 db.init_app(app)
 ma.init_app(app)
 migrate = Migrate(app, db)
@@ -50,6 +66,9 @@ app.register_blueprint(articles_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(clients_bp)
 app.register_blueprint(devis_bp)
+app.register_blueprint(search_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(metrics_bp)
 
 with app.app_context():
     db.create_all()
@@ -57,7 +76,7 @@ with app.app_context():
     table_empty_user = User.query.filter_by(email=ADMIN_MAIL).first() is None
 
     if table_empty_user:
-        hashed_admin_password = bcrypt.generate_password_hash(ADMIN_PASSWORD).decode('utf-8')
+        hashed_admin_password = hash_password(ADMIN_PASSWORD)
         admin_user = User(nom='Admin',prenom='Admin',email=ADMIN_MAIL,mdp=hashed_admin_password,role='Administrateur')
         db.session.add(admin_user)
         db.session.commit()
@@ -68,6 +87,9 @@ with app.app_context():
         taux20 = TauxTVA(taux=0.20)
         db.session.add(taux20)
         db.session.commit()
+    
+    # TVA et autres données de référence en mémoire, partagées avec les workers (preload_app)
+    refdata.load()
 
 ### Main ###
 
@@ -0,0 +1,118 @@
+from benchmarks.common import create_bench_app, seed, measure, write_results
+from models import db, Devis, DevisArticles
+from devis_lines import insert_lines, sync_lines, bulk_create_devis
+from pricing import load_snapshots
+from sqlalchemy import event
+from datetime import date
+from itertools import cycle
+import argparse
+
+# Écriture des lignes de devis : ancienne méthode (un objet ORM par ligne, update = tout supprimer puis réinsérer)
+# contre devis_lines.py (executemany, update par différence), sur des devis de 1000 lignes.
+
+def _new_devis(client_id=1):
+    devis = Devis(client_id=client_id, titre="Bench", description="", date=date(2026, 1, 1),
+                  montant_HT=0, montant_TVA=0, montant_TTC=0, statut="Non signé")
+    db.session.add(devis)
+    db.session.flush()
+    return devis.id
+
+def _line(devis_id, article_id, quantite, snapshots):
+    nom, prix_vente_HT, taux = snapshots[article_id]
+    return DevisArticles(devis_id=devis_id, article_id=article_id, quantite=quantite,
+                         nom=nom, prix_vente_HT=prix_vente_HT, taux_tva=taux)
+
+# Previous create_devis/update_devis code
+def legacy_create(lines):
+    devis_id = _new_devis()
+    snapshots = load_snapshots(lines)
+    for article_id, quantite in lines.items():
+        db.session.add(_line(devis_id, article_id, quantite, snapshots))
+    db.session.commit()
+    return devis_id
+
+def legacy_update(devis_id, lines):
+    DevisArticles.query.filter_by(devis_id=devis_id).delete()
+    snapshots = load_snapshots(lines)
+    for article_id, quantite in lines.items():
+        db.session.add(_line(devis_id, article_id, quantite, snapshots))
+    db.session.commit()
+
+def new_create(lines):
+    devis_id = _new_devis()
+    insert_lines(devis_id, lines)
+    db.session.commit()
+    return devis_id
+
+def new_update(devis_id, lines):
+    sync_lines(devis_id, lines)
+    db.session.commit()
+
+def legacy_bulk(payload):
+    snapshots = load_snapshots({line["article_id"] for data in payload for line in data["articles"]})
+    for data in payload:
+        devis_id = _new_devis(data["client_id"])
+        for line in data["articles"]:
+            db.session.add(_line(devis_id, line["article_id"], line["quantite"], snapshots))
+        db.session.flush()
+    db.session.commit()
+
+def new_bulk(payload):
+    bulk_create_devis(payload)
+    db.session.commit()
+
+# Run fn once and count the statements it sends to the database
+def count_statements(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return len(statements)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark écriture des lignes de devis")
+    parser.add_argument("--lines", type=int, default=1000, help="lignes par devis")
+    parser.add_argument("--bulk-devis", type=int, default=100, help="devis par import bulk")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    with app.app_context():
+        seed(clients=10, devis=0, articles=args.lines)
+        lines = {article_id: 1 for article_id in range(1, args.lines + 1)}
+        one_changed = {**lines, 1: 2}
+
+        legacy_id, new_id = legacy_create(lines), new_create(lines)
+        legacy_versions, new_versions = cycle([one_changed, lines]), cycle([one_changed, lines])
+        payload = [{
+            "client_id": 1 + i % 10, "title": f"Import {i}", "description": "", "date": "2026-01-01",
+            "montant_HT": 0, "montant_TVA": 0, "montant_TTC": 0, "statut": "Non signé",
+            "articles": [{"article_id": a, "quantite": 1} for a in range(1, 11)],
+        } for i in range(args.bulk_devis)]
+
+        cases = {
+            "create": (lambda: legacy_create(lines), lambda: new_create(lines)),
+            # Alternate between two versions differing by one quantity
+            "update_one_line": (lambda: legacy_update(legacy_id, next(legacy_versions)),
+                                lambda: new_update(new_id, next(new_versions))),
+            "bulk_import": (lambda: legacy_bulk(payload), lambda: new_bulk(payload)),
+        }
+        results = {"lines_per_devis": args.lines, "bulk_devis": args.bulk_devis}
+        for name, (legacy, new) in cases.items():
+            results[name] = {
+                "legacy": dict(measure(legacy, args.repeat), statements=count_statements(legacy)),
+                "new": dict(measure(new, args.repeat), statements=count_statements(new)),
+            }
+            legacy_ms, new_ms = results[name]["legacy"]["median"] * 1000, results[name]["new"]["median"] * 1000
+            print(f"{name:16} ancien: {legacy_ms:8.1f} ms ({results[name]['legacy']['statements']} requêtes)  "
+                  f"nouveau: {new_ms:8.1f} ms ({results[name]['new']['statements']} requêtes)")
+
+    print(f"Résultats: {write_results('devis_lines', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
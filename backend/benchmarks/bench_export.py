@@ -0,0 +1,47 @@
+from benchmarks.common import create_bench_app, seed, write_results
+from export import clients_select, articles_select, devis_select, generate
+import argparse, time, tracemalloc
+
+# Export en flux (export.py) : durée, taille et pic de mémoire Python de chaque export.
+# Le pic doit rester le même quand le nombre de devis augmente (--devis).
+
+EXPORTS = {"clients": clients_select, "articles": articles_select, "devis": devis_select}
+
+def _consume(entity, export_format):
+    return sum(len(chunk) for chunk in generate(entity, export_format, EXPORTS[entity]()))
+
+# Timed without tracemalloc (it slows every allocation down), then run again for the memory peak
+def run_export(entity, export_format):
+    start = time.perf_counter()
+    size = _consume(entity, export_format)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    _consume(entity, export_format)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "bytes": size, "peak_memory_bytes": peak}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark export CSV / JSON lines")
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--devis", type=int, default=100000)
+    parser.add_argument("--lines", type=int, default=5, help="lignes par devis")
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    results = {"devis": args.devis, "lines_per_devis": args.lines}
+    with app.app_context():
+        seed(clients=args.clients, devis=args.devis, lines_per_devis=args.lines)
+        for entity in EXPORTS:
+            for export_format in ("csv", "ndjson"):
+                result = run_export(entity, export_format)
+                results[f"{entity}_{export_format}"] = result
+                print(f"{entity + ' ' + export_format:16} {result['seconds']:7.2f} s  {result['bytes'] / 1e6:8.1f} Mo  "
+                      f"pic mémoire {result['peak_memory_bytes'] / 1e6:6.1f} Mo")
+
+    print(f"Résultats: {write_results('export', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
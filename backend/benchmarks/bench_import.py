@@ -0,0 +1,84 @@
+from benchmarks.common import create_bench_app, seed, write_results
+from benchmarks.bench_devis_lines import count_statements
+from models import db, Clients
+from bulk_import import CLIENT_COLUMNS, ARTICLE_COLUMNS, import_clients, import_articles
+from utils import validate_client_fields
+from werkzeug.datastructures import FileStorage
+import argparse, csv, io, tempfile, time
+
+# Import CSV de clients et d'articles (bulk_import.py) contre l'ancienne méthode, un appel de
+# POST /api/clients/create par ligne (validation, recherche de l'email, INSERT et commit).
+# Objectif : 100k lignes en moins d'une minute.
+
+def _csv_file(header, rows, filename):
+    # On disk like a Werkzeug upload over 500 KB
+    raw = tempfile.TemporaryFile()
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text, delimiter=";")
+    writer.writerow(header)
+    writer.writerows(rows)
+    text.flush()
+    text.detach()
+    raw.seek(0)
+    return FileStorage(stream=raw, filename=filename)
+
+def _clients(count, prefix):
+    return ([prefix, "Prénom", f"{i} rue de la Paix", "Reims", "51100", "0326000000", f"{prefix}{i}@exemple.fr"] for i in range(count))
+
+def _articles(count):
+    return ([f"Article import {i}", "Description", f"{i % 100},50", f"{i % 100 + 10},90", "0,2"] for i in range(count))
+
+# Previous POST /api/clients/create, once per row
+def legacy_clients(count, prefix):
+    for nom, prenom, rue, ville, code_postal, telephone, email in _clients(count, prefix):
+        if validate_client_fields(nom, prenom, rue, ville, code_postal, telephone, email):
+            continue
+        if Clients.query.filter_by(email=email).first():
+            continue
+        db.session.add(Clients(nom=nom, prenom=prenom, rue=rue, ville=ville, code_postal=code_postal,
+                               telephone=telephone, email=email, caduque=False))
+        db.session.commit()
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import CSV de clients et d'articles")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--legacy-rows", type=int, default=2000, help="lignes importées une par une (0 = sans)")
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    results = {"rows": args.rows}
+    with app.app_context():
+        seed(clients=10, devis=0, articles=10)
+
+        for name, columns, rows, importer in (
+            ("clients", CLIENT_COLUMNS, _clients(args.rows, "import"), import_clients),
+            ("articles", ARTICLE_COLUMNS, _articles(args.rows), import_articles),
+        ):
+            file = _csv_file(columns, rows, f"{name}.csv")
+            reports = []
+            def run():
+                reports.append(importer(file))
+                db.session.commit()
+            seconds, statements = _timed(lambda: count_statements(run))
+            report = reports[0]
+            results[name] = {"seconds": seconds, "rows_per_second": report.rows / seconds, "statements": statements,
+                             "inserted": report.inserted, "error_count": report.error_count}
+            print(f"{name:10} {report.rows} lignes en {seconds:6.2f} s ({report.rows / seconds:8.0f} lignes/s, "
+                  f"{statements} requêtes), {report.inserted} ajoutées, {report.error_count} en erreur")
+
+        if args.legacy_rows:
+            seconds, _ = _timed(lambda: legacy_clients(args.legacy_rows, "legacy"))
+            results["legacy_clients"] = {"rows": args.legacy_rows, "seconds": seconds, "rows_per_second": args.legacy_rows / seconds}
+            print(f"{'ancien':10} {args.legacy_rows} lignes en {seconds:6.2f} s ({args.legacy_rows / seconds:8.0f} lignes/s)")
+
+    print(f"Résultats: {write_results('import', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
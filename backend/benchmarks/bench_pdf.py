@@ -0,0 +1,54 @@
+from benchmarks.common import create_bench_app, seed, measure, write_results
+from flask import render_template
+from models import db, Devis, DevisSchema, devis_with_relations
+import argparse, os
+
+# Rendu du PDF d'un devis : gabarit pdf.html (Jinja2, dans le worker web) puis WeasyPrint (dans pdf_worker.py),
+# pour des devis de 1, 10, 50 et 200 lignes.
+# WeasyPrint a besoin de pango/cairo : sans eux seul le rendu HTML est mesuré.
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf")
+LINE_COUNTS = (1, 10, 50, 200)
+
+def _load_weasyprint():
+    try:
+        from weasyprint import HTML
+        return HTML
+    except (ImportError, OSError) as e:
+        print(f"WeasyPrint indisponible, rendu PDF non mesuré: {e}")
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu PDF des devis")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    HTML = _load_weasyprint()
+    app = create_bench_app()
+    app.template_folder = PDF_DIR
+    results = {"weasyprint": HTML is not None, "devis": {}}
+    with app.app_context():
+        for lines in LINE_COUNTS:
+            seed(clients=1, devis=1, lines_per_devis=lines, articles=max(lines, 10))
+            devis_id = db.session.query(db.func.max(Devis.id)).scalar()
+            devis_data = DevisSchema().dump(devis_with_relations().filter_by(id=devis_id).one())
+
+            with app.test_request_context():
+                html = render_template("pdf.html", devis=devis_data)
+                case = {"html_bytes": len(html), "html": measure(lambda: render_template("pdf.html", devis=devis_data), args.repeat)}
+            if HTML is not None:
+                pdf = HTML(string=html, base_url=PDF_DIR + "/").write_pdf()
+                case["pdf_bytes"] = len(pdf)
+                case["pdf"] = measure(lambda: HTML(string=html, base_url=PDF_DIR + "/").write_pdf(), args.repeat)
+            results["devis"][f"{lines}_lignes"] = case
+
+            line = f"{lines:4} lignes  HTML {case['html']['median'] * 1000:7.2f} ms"
+            if HTML is not None:
+                line += f"  PDF {case['pdf']['median'] * 1000:8.1f} ms ({case['pdf_bytes']} octets)"
+            print(line)
+
+    print(f"Résultats: {write_results('pdf', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
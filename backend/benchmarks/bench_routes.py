@@ -0,0 +1,94 @@
+from benchmarks.common import create_bench_app, seed, measure, write_results
+from config import ApplicationConfig
+from models import db, Devis, Clients
+from devis_stats import compute_devis_stats
+from routes.clients import clients_bp
+from routes.devis import devis_bp
+from routes.search import search_bp
+from sqlalchemy import event
+import search  # noqa: F401  SQLite FTS5 tables of /api/search, created with the schema
+import argparse
+
+# Measure the query + serialization path, not the Redis response cache
+ApplicationConfig.RESPONSE_CACHE_TTL = 0
+
+# Chemin complet (requêtes SQL + sérialisation) des routes de lecture, sans réseau ni gunicorn :
+# les routes sont appelées avec le client de test Flask. Nombre de requêtes SQL relevé pour chaque route.
+# Les routes qui demandent une session (articles, admin) sont mesurées par load_test.py.
+#   python -m benchmarks.bench_routes                       (base SQLite en mémoire remplie ici)
+#   python -m benchmarks.bench_routes --reuse --database-url sqlite:////tmp/bench.db   (base de seed_db.py)
+
+def _cases(client_id, devis_id):
+    return {
+        "GET /api/devis/all?limit=50": "/api/devis/all?limit=50",
+        "GET /api/devis/all?limit=500": "/api/devis/all?limit=500",
+        "GET /api/devis/all?statut=Signé&sort=-date": "/api/devis/all?statut=Signé&sort=-date&limit=50",
+        "GET /api/devis/client/<id>": f"/api/devis/client/{client_id}",
+        "GET /api/devis/info/<id>": f"/api/devis/info/{devis_id}",
+        "GET /api/clients/all?limit=50": "/api/clients/all?limit=50",
+        "GET /api/clients/all?q=": "/api/clients/all?q=Nom12&limit=50",
+        "GET /api/search?q=": "/api/search?q=reims",
+    }
+
+def _count_statements(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return len(statements)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des routes de lecture")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--devis", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=10, help="lignes par devis")
+    parser.add_argument("--reuse", action="store_true", help="base déjà remplie par seed_db.py")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    for blueprint in (clients_bp, devis_bp, search_bp):
+        app.register_blueprint(blueprint)
+    client = app.test_client()
+
+    with app.app_context():
+        if not args.reuse:
+            seed(clients=args.clients, devis=args.devis, lines_per_devis=args.lines)
+        volumes = {
+            "clients": db.session.query(db.func.count(Clients.id)).scalar(),
+            "devis": db.session.query(db.func.count(Devis.id)).scalar(),
+        }
+        # The client with the most devis
+        client_id = db.session.query(Devis.client_id).group_by(Devis.client_id) \
+            .order_by(db.func.count(Devis.id).desc()).limit(1).scalar()
+        devis_id = db.session.query(db.func.max(Devis.id)).scalar()
+
+    results = {**volumes, "routes": {}}
+    for name, url in _cases(client_id, devis_id).items():
+        def call(url=url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise SystemExit(f"{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+            return response
+        with app.app_context():
+            statements = _count_statements(call)
+        stats = measure(call, args.repeat)
+        results["routes"][name] = dict(stats, statements=statements, bytes=len(call().get_data()))
+        print(f"{name:48} {stats['median'] * 1000:8.1f} ms  {statements:3} requêtes SQL")
+
+    # Uncached path of GET /api/devis/stats (the route caches it in Redis)
+    with app.app_context():
+        stats = measure(compute_devis_stats, max(args.repeat // 4, 1))
+        results["routes"]["GET /api/devis/stats (sans cache)"] = stats
+        results["dialect"] = db.engine.dialect.name
+    print(f"{'GET /api/devis/stats (sans cache)':48} {stats['median'] * 1000:8.1f} ms")
+
+    print(f"Résultats: {write_results('routes', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from benchmarks.common import create_bench_app, seed, measure, write_results
+from flask import jsonify
+from models import DevisSchema, devis_with_relations
+from serializers import devis_serializer, encode_page, json_response
+import argparse
+
+# Compare marshmallow (DevisSchema + jsonify) and msgspec (serializers.py) on the /api/devis/all payload.
+# The msgspec output is byte-identical to the marshmallow one, checked by tests/test_serializers.py.
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sérialisation marshmallow vs msgspec")
+    parser.add_argument("--devis", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=5, help="lignes par devis")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    with app.app_context():
+        seed(clients=max(args.devis // 10, 1), devis=args.devis, lines_per_devis=args.lines)
+        devis = devis_with_relations().all()
+        meta = {"next_cursor": None, "has_more": False, "limit": len(devis)}
+
+        def marshmallow_dump():
+            return jsonify(data=DevisSchema(many=True).dump(devis), **meta).get_data()
+
+        def msgspec_dump():
+            return json_response(encode_page(devis_serializer, devis, meta)).get_data()
+
+        results = {
+            "devis": len(devis),
+            "payload_bytes": len(msgspec_dump()),
+            "marshmallow": measure(marshmallow_dump, args.repeat),
+            "msgspec": measure(msgspec_dump, args.repeat),
+        }
+        results["speedup"] = results["marshmallow"]["median"] / results["msgspec"]["median"]
+
+    path = write_results("serialization", results, args.output)
+    print(f"{results['devis']} devis, {results['payload_bytes']} octets")
+    print(f"marshmallow: {results['marshmallow']['median'] * 1000:.1f} ms  msgspec: {results['msgspec']['median'] * 1000:.1f} ms  (x{results['speedup']:.1f})")
+    print(f"Résultats: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from flask import Flask
+from models import db, ma, Clients, Articles, Devis, DevisArticles, TauxTVA
+from datetime import date, timedelta
+import json, os, platform, random, statistics, time
+
+# Outils communs aux benchmarks, à lancer depuis backend/ :
+#   python -m benchmarks.<nom_du_benchmark> --help
+
+STATUTS = ["Non signé", "En attente de signature", "Signé", "Refusé", "Payé"]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Minimal app (no Redis, no blueprints) bound to the benchmark database
+def create_bench_app(database_url="sqlite://"):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    ma.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+# Insert a realistic dataset with Core executemany, returns the row counts
+def seed(clients=1000, devis=10000, lines_per_devis=5, articles=200, batch_size=10000, rng_seed=42):
+    rng = random.Random(rng_seed)
+
+    if TauxTVA.query.first() is None:
+        db.session.execute(db.insert(TauxTVA), [{"taux": t} for t in (0.20, 0.10, 0.055, 0.021)])
+    taux_ids = [t.id for t in TauxTVA.query.all()]
+
+    client_start = (db.session.query(db.func.max(Clients.id)).scalar() or 0) + 1
+    _insert_batches(Clients, ({
+        "nom": f"Nom{i}", "prenom": f"Prénom{i}", "rue": f"{i} rue de la République",
+        "ville": rng.choice(["Vitry-le-François", "Reims", "Châlons-en-Champagne", "Épernay"]),
+        "code_postal": "51300", "telephone": "03 26 00 00 00", "email": f"client{i}@exemple.fr",
+        "caduque": rng.random() < 0.05,
+    } for i in range(client_start, client_start + clients)), batch_size)
+
+    article_start = (db.session.query(db.func.max(Articles.id)).scalar() or 0) + 1
+    article_rows = [{
+        "nom": f"Article {i}", "description": f"Description de l'article {i}",
+        "prix_achat_HT": round(rng.uniform(5, 500), 2), "prix_vente_HT": round(rng.uniform(10, 900), 2),
+        "taux_tva_id": rng.choice(taux_ids),
+    } for i in range(article_start, article_start + articles)]
+    _insert_batches(Articles, article_rows, batch_size)
+    taux = {t.id: t.taux for t in TauxTVA.query.all()}
+    snapshots = {article_start + i: {"nom": row["nom"], "prix_vente_HT": row["prix_vente_HT"], "taux_tva": taux[row["taux_tva_id"]]}
+                 for i, row in enumerate(article_rows)}
+
+    client_ids = range(client_start, client_start + clients)
+    article_ids = range(article_start, article_start + articles)
+    devis_start = (db.session.query(db.func.max(Devis.id)).scalar() or 0) + 1
+    first_day = date(2023, 1, 1)
+    _insert_batches(Devis, ({
+        "id": i, "client_id": rng.choice(client_ids), "titre": f"Devis {i}", "description": "Installation et mise en service",
+        "date": first_day + timedelta(days=rng.randrange(1000)), "montant_HT": 1000.0, "montant_TVA": 200.0, "montant_TTC": 1200.0,
+        "statut": rng.choice(STATUTS), "envelope_id": f"env-{i}" if rng.random() < 0.3 else None,
+    } for i in range(devis_start, devis_start + devis)), batch_size)
+
+    _insert_batches(DevisArticles, ({
+        "devis_id": devis_id, "article_id": article_id, "quantite": rng.randint(1, 20), **snapshots[article_id],
+    } for devis_id in range(devis_start, devis_start + devis) for article_id in [rng.choice(article_ids) for _ in range(lines_per_devis)]), batch_size)
+
+    db.session.commit()
+    return {"clients": clients, "articles": articles, "devis": devis, "devis_articles": devis * lines_per_devis}
+
+def _insert_batches(model, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(db.insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+
+# Run fn `repeat` times and return timing stats in seconds
+def measure(fn, repeat=5, warmup=1):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+# Latency percentiles in milliseconds of a list of durations in seconds
+def latency_stats(timings):
+    ms = sorted(t * 1000 for t in timings)
+    if len(ms) < 2:
+        ms = ms * 2
+    quantiles = statistics.quantiles(ms, n=100, method="inclusive")
+    return {
+        "count": len(timings),
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "mean_ms": statistics.fmean(ms),
+        "max_ms": ms[-1],
+    }
+
+# Write the results as JSON so runs can be compared, returns the file path
+def write_results(name, results, output=None):
+    payload = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    return output
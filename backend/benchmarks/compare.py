@@ -0,0 +1,41 @@
+import argparse, json
+
+# Compare deux fichiers de résultats (benchmarks/results/*.json) du même benchmark :
+#   python -m benchmarks.compare avant.json apres.json
+# Affiche chaque valeur numérique présente dans les deux fichiers et l'écart en %.
+
+# Numeric leaves as {"endpoints.GET /api/search.p95_ms": 12.3}
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deux résultats de benchmark")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--filter", default="", help="ne garder que les clés contenant ce texte (ex: p95)")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before["benchmark"] != after["benchmark"]:
+        parser.error(f"Benchmarks différents: {before['benchmark']} / {after['benchmark']}")
+
+    old, new = flatten(before["results"]), flatten(after["results"])
+    keys = [key for key in old if key in new and args.filter in key]
+    width = max((len(key) for key in keys), default=0)
+    print(f"{before['benchmark']}: {before['timestamp']} -> {after['timestamp']}")
+    for key in keys:
+        change = f"{(new[key] - old[key]) / old[key] * 100:+7.1f} %" if old[key] else "      -"
+        print(f"{key:{width}}  {old[key]:12.3f}  {new[key]:12.3f}  {change}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+from benchmarks.common import latency_stats, write_results
+from collections import defaultdict
+import argparse, itertools, os, random, socket, subprocess, sys, threading, time
+import requests
+
+# Test de charge HTTP du backend servi par gunicorn : N clients en parallèle pendant D secondes,
+# p50/p95/p99 et requêtes par seconde pour chaque route.
+# Sur un serveur déjà lancé :
+#   python -m benchmarks.load_test --base-url http://localhost:5000
+# En lançant gunicorn (gunicorn.conf.py) sur une base remplie par seed_db.py (Redis et le .env du backend requis) :
+#   python -m benchmarks.load_test --start-gunicorn --database-url sqlite:////tmp/bench.db --worker-class gthread
+# --mix mixed ajoute des connexions (bcrypt) aux lectures, pour comparer les modes de worker. Contre un
+# serveur déjà lancé, il faut alors LOGIN_RATE_LIMIT_EMAIL=0 et LOGIN_RATE_LIMIT_IP=0 dans son environnement.
+# Connexion avec ADMIN_MAIL / ADMIN_PASSWORD (ou --email / --password).
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, path template, weight): the read mix of the frontend pages
+ENDPOINTS = [
+    ("GET /api/devis/all", "/api/devis/all?limit=50", 4),
+    ("GET /api/devis/all?statut=", "/api/devis/all?statut=Signé&sort=-date&limit=50", 2),
+    ("GET /api/devis/client/<id>", "/api/devis/client/{client_id}", 2),
+    ("GET /api/devis/info/<id>", "/api/devis/info/{devis_id}", 4),
+    ("GET /api/clients/all", "/api/clients/all?limit=50", 2),
+    ("GET /api/articles/all", "/api/articles/all?limit=50", 2),
+    ("GET /api/search", "/api/search?q={query}", 3),
+    ("GET /api/devis/stats", "/api/devis/stats", 1),
+    ("GET /api/user/me", "/api/user/me", 1),
+]
+# Blocking work inside the request: a login hashes the password with bcrypt
+MIXED_ENDPOINTS = ENDPOINTS + [
+    ("POST /api/user/login", "/api/user/login", 2),
+]
+QUERIES = ["nom1", "reims", "article 1", "installation", "client4", "epernay"]
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# Settings go through the environment so gunicorn.conf.py applies them like in production
+def start_gunicorn(database_url, workers, threads, worker_class):
+    port = _free_port()
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV="production", GUNICORN_BIND=f"127.0.0.1:{port}",
+               GUNICORN_WORKER_CLASS=worker_class)
+    # Every client logs in with the same email from the same address
+    env.setdefault("LOGIN_RATE_LIMIT_EMAIL", "0")
+    env.setdefault("LOGIN_RATE_LIMIT_IP", "0")
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    if threads:
+        env["GUNICORN_THREADS"] = str(threads)
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn s'est arrêté (code {process.returncode})")
+        try:
+            requests.get(f"{base_url}/api/user/me", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("gunicorn n'a pas démarré en 60s")
+
+def login(base_url, email, password):
+    http = requests.Session()
+    response = http.post(f"{base_url}/api/user/login", json={"email": email, "mdp": password}, timeout=10)
+    if response.status_code != 200:
+        raise SystemExit(f"Connexion impossible: HTTP {response.status_code} {response.text[:200]}")
+    return http.cookies
+
+# Existing ids to build the URLs
+def sample_ids(base_url, cookies):
+    response = requests.get(f"{base_url}/api/devis/all", params={"limit": 500, "fields": "id,client.id"},
+                            cookies=cookies, timeout=30)
+    response.raise_for_status()
+    devis = response.json()["data"]
+    if not devis:
+        raise SystemExit("Aucun devis: remplir la base avec benchmarks.seed_db")
+    return [d["id"] for d in devis], [d["client"]["id"] for d in devis]
+
+def run(base_url, cookies, devis_ids, client_ids, concurrency, duration, warmup, endpoints, credentials):
+    schedule = [(name, path) for name, path, weight in endpoints for _ in range(weight)]
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    times = {}
+
+    def client(index):
+        rng = random.Random(index)
+        http = requests.Session()
+        http.cookies.update(cookies)
+        order = schedule[:]
+        rng.shuffle(order)
+        start_barrier.wait()
+        measure_from = times["start"] + warmup
+        for name, path in itertools.cycle(order):
+            now = time.perf_counter()
+            if now >= times["end"]:
+                break
+            url = base_url + path.format(devis_id=rng.choice(devis_ids), client_id=rng.choice(client_ids),
+                                         query=rng.choice(QUERIES))
+            try:
+                if name.startswith("POST "):
+                    response = http.post(url, json=credentials, timeout=60)
+                else:
+                    response = http.get(url, timeout=60)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - now
+            if now >= measure_from:
+                with lock:
+                    timings[name].append(elapsed)
+                    if not ok:
+                        errors[name] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    times["start"] = time.perf_counter()
+    times["end"] = times["start"] + warmup + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    measured = time.perf_counter() - times["start"] - warmup
+
+    endpoints = {
+        name: dict(latency_stats(values), rps=len(values) / measured, errors=errors[name])
+        for name, values in sorted(timings.items())
+    }
+    all_timings = [t for values in timings.values() for t in values]
+    total = dict(latency_stats(all_timings), rps=len(all_timings) / measured, errors=sum(errors.values()))
+    return endpoints, total
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge HTTP du backend")
+    parser.add_argument("--base-url", help="serveur déjà lancé, sinon --start-gunicorn")
+    parser.add_argument("--start-gunicorn", action="store_true")
+    parser.add_argument("--database-url", help="base utilisée par le gunicorn lancé ici")
+    parser.add_argument("--workers", type=int, default=None, help="défaut: celui de gunicorn.conf.py")
+    parser.add_argument("--threads", type=int, default=None, help="défaut: celui de gunicorn.conf.py")
+    parser.add_argument("--worker-class", default="gthread", choices=["sync", "gthread", "gevent"])
+    parser.add_argument("--mix", default="reads", choices=["reads", "mixed"])
+    parser.add_argument("--email", default=os.environ.get("ADMIN_MAIL"))
+    parser.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="secondes mesurées")
+    parser.add_argument("--warmup", type=float, default=5, help="secondes ignorées au début")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if not args.email or not args.password:
+        parser.error("--email/--password ou ADMIN_MAIL/ADMIN_PASSWORD requis")
+    if args.start_gunicorn == bool(args.base_url):
+        parser.error("--base-url ou --start-gunicorn (avec --database-url)")
+
+    process = None
+    base_url = args.base_url
+    if args.start_gunicorn:
+        if not args.database_url:
+            parser.error("--start-gunicorn demande --database-url")
+        process, base_url = start_gunicorn(args.database_url, args.workers, args.threads, args.worker_class)
+
+    try:
+        cookies = login(base_url, args.email, args.password)
+        devis_ids, client_ids = sample_ids(base_url, cookies)
+        endpoints, total = run(base_url, cookies, devis_ids, client_ids, args.concurrency, args.duration, args.warmup,
+                               MIXED_ENDPOINTS if args.mix == "mixed" else ENDPOINTS,
+                               {"email": args.email, "mdp": args.password})
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    for name, stats in endpoints.items():
+        print(f"{name:30} {stats['rps']:7.1f} req/s  p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  "
+              f"p99 {stats['p99_ms']:7.1f} ms  erreurs {stats['errors']}")
+    print(f"{'Total':30} {total['rps']:7.1f} req/s  p50 {total['p50_ms']:7.1f} ms  p95 {total['p95_ms']:7.1f} ms  "
+          f"p99 {total['p99_ms']:7.1f} ms  erreurs {total['errors']}")
+
+    results = {
+        "base_url": base_url,
+        "gunicorn": {"workers": args.workers, "threads": args.threads, "worker_class": args.worker_class} if process else None,
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "endpoints": endpoints,
+        "total": total,
+    }
+    print(f"Résultats: {write_results('load_test', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+from config import ApplicationConfig
+from models import db, Clients, Articles
+from utils import validate_client_fields, validate_article_fields
+from zipfile import BadZipFile
+import codecs, csv, io, itertools, math
+import refdata
+
+# Import en masse de clients et d'articles depuis un fichier CSV ou XLSX.
+# Le fichier est lu en flux (Werkzeug le garde sur disque au-delà de 500 Ko) et traité par paquets de
+# IMPORT_CHUNK_SIZE lignes : règles de utils.py, une requête par paquet pour les emails déjà utilisés,
+# un INSERT executemany. Les lignes invalides sont ignorées et listées dans le rapport avec leur
+# numéro de ligne dans le fichier (l'en-tête est la ligne 1). L'appelant commit.
+
+CLIENT_COLUMNS = ("nom", "prenom", "rue", "ville", "code_postal", "telephone", "email")
+ARTICLE_COLUMNS = ("nom", "description", "prix_achat_HT", "prix_vente_HT", "taux_tva")
+
+class BulkImportError(ValueError):
+    pass
+
+class ImportReport:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < ApplicationConfig.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": line, "error": message})
+
+    def to_dict(self):
+        # The duplicate emails of a chunk are found after its other errors
+        return {"rows": self.rows, "inserted": self.inserted, "error_count": self.error_count,
+                "errors": sorted(self.errors, key=lambda error: error["row"]), "dry_run": self.dry_run}
+
+def _cell(value):
+    if value is None:
+        return ""
+    # XLSX numbers: 51300 and not 51300.0 for a postal code
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def _csv_rows(stream, encoding):
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    first = text.readline()
+    # Excel in French saves with ";" and decimal commas
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    yield from csv.reader(itertools.chain([first], text), delimiter=delimiter)
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BulkImportError("Import XLSX indisponible sur ce serveur, envoyez un fichier CSV.")
+    try:
+        # read_only: the rows are parsed from the zip as they are read, not loaded at once
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (BadZipFile, OSError, KeyError) as e:
+        raise BulkImportError(f"Fichier XLSX illisible: {e}")
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _rows(file, encoding):
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        return _xlsx_rows(file.stream)
+    if filename.endswith(".csv") or filename.endswith(".txt"):
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise BulkImportError(f"Encodage inconnu: {encoding}")
+        return _csv_rows(file.stream, encoding)
+    raise BulkImportError("Format de fichier non supporté (CSV ou XLSX).")
+
+# Yields lists of (line number, {column: value}), blank lines skipped
+def _chunks(file, columns, encoding):
+    rows = _rows(file, encoding)
+    try:
+        header = next(rows, None)
+    except UnicodeDecodeError:
+        raise BulkImportError(f"Le fichier n'est pas encodé en {encoding}, précisez ?encoding= (ex. cp1252).")
+    if not header or not any(_cell(name) for name in header):
+        raise BulkImportError("Le fichier est vide ou sans en-tête.")
+    # Header names are matched without case: "Prix_Vente_HT" or "prix_vente_ht"
+    names = {column.lower(): column for column in columns}
+    positions = {}
+    for position, name in enumerate(header):
+        column = names.get(_cell(name).lower())
+        if column is not None:
+            positions.setdefault(column, position)
+    missing = [column for column in columns if column not in positions]
+    if missing:
+        raise BulkImportError(f"Colonnes manquantes: {', '.join(missing)}")
+
+    chunk_size = ApplicationConfig.IMPORT_CHUNK_SIZE
+    chunk, count = [], 0
+    try:
+        for line, values in enumerate(rows, start=2):
+            values = [_cell(v) for v in values]
+            if not any(values):
+                continue
+            count += 1
+            if count > ApplicationConfig.IMPORT_MAX_ROWS:
+                raise BulkImportError(f"{ApplicationConfig.IMPORT_MAX_ROWS} lignes maximum par import.")
+            chunk.append((line, {column: values[p] if p < len(values) else "" for column, p in positions.items()}))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    except UnicodeDecodeError:
+        raise BulkImportError(f"Le fichier n'est pas encodé en {encoding}, précisez ?encoding= (ex. cp1252).")
+    except csv.Error as e:
+        raise BulkImportError(f"CSV invalide: {e}")
+    if chunk:
+        yield chunk
+
+def _insert(model, rows, report):
+    if rows and not report.dry_run:
+        db.session.execute(db.insert(model), rows)
+    report.inserted += len(rows)
+
+# Clients with an email already used (in the table or earlier in the file) are refused unless force
+def import_clients(file, force=False, dry_run=False, encoding="utf-8-sig"):
+    report = ImportReport(dry_run)
+    seen = {}
+    for chunk in _chunks(file, CLIENT_COLUMNS, encoding):
+        report.rows += len(chunk)
+        valid = []
+        for line, row in chunk:
+            error = validate_client_fields(*(row[column] for column in CLIENT_COLUMNS))
+            if error:
+                report.error(line, error)
+            else:
+                valid.append((line, row))
+
+        if not force:
+            emails = {row["email"] for _, row in valid}
+            existing = set(db.session.scalars(db.select(Clients.email).where(Clients.email.in_(emails)))) if emails else set()
+            checked = []
+            for line, row in valid:
+                email = row["email"]
+                if email in existing:
+                    report.error(line, "L'adresse e-mail est déjà utilisée par un autre client.")
+                elif email in seen:
+                    report.error(line, f"L'adresse e-mail est déjà à la ligne {seen[email]} du fichier.")
+                else:
+                    seen[email] = line
+                    checked.append((line, row))
+            valid = checked
+
+        _insert(Clients, [dict(row, caduque=False) for _, row in valid], report)
+    return report
+
+def _number(value):
+    # "19,99" from a French spreadsheet
+    number = float(value.replace(",", "."))
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+def import_articles(file, dry_run=False, encoding="utf-8-sig"):
+    report = ImportReport(dry_run)
+    for chunk in _chunks(file, ARTICLE_COLUMNS, encoding):
+        report.rows += len(chunk)
+        rows = []
+        for line, row in chunk:
+            try:
+                prix_achat_HT, prix_vente_HT = _number(row["prix_achat_HT"]), _number(row["prix_vente_HT"])
+            except ValueError:
+                report.error(line, "Les prix HT doivent être des nombres.")
+                continue
+            # Same lookup as POST /api/articles/create, from the in-memory refdata
+            taux_tva_id = refdata.taux_tva_id(row["taux_tva"].replace(",", "."))
+            if taux_tva_id is None:
+                report.error(line, "Le taux de TVA spécifié n'existe pas.")
+                continue
+            error = validate_article_fields(row["nom"], row["description"], prix_achat_HT, prix_vente_HT, taux_tva_id)
+            if error:
+                report.error(line, error)
+                continue
+            rows.append({"nom": row["nom"], "description": row["description"], "prix_achat_HT": prix_achat_HT,
+                         "prix_vente_HT": prix_vente_HT, "taux_tva_id": taux_tva_id})
+        _insert(Articles, rows, report)
+    return report
@@ -4,6 +4,41 @@ import redis
 
 load_dotenv()
 
+# Docker secret if mounted, environment variable otherwise
+def read_secret(name):
+    path = f"/run/secrets/{name}"
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read().strip()
+    return os.getenv(name)
+
+# SQLAlchemy engine options of each process (one pool per gunicorn worker), Postgres only
+def engine_options(database_url):
+    if not database_url or not database_url.startswith("postgresql"):
+        return {}
+    pool_mode = os.environ.get("DB_POOL_MODE", "direct")
+    if pool_mode not in ("direct", "pgbouncer"):
+        raise ValueError(f"DB_POOL_MODE invalide: {pool_mode} (direct ou pgbouncer)")
+    options = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", -1)),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "0") == "1",
+    }
+    connect_args = {}
+    statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    if pool_mode == "pgbouncer":
+        # Transaction pooling: nothing may stay on the server connection. No startup options (the
+        # timeouts are set per transaction, see database.py) and no prepared statements with psycopg 3
+        if database_url.startswith("postgresql+psycopg:"):
+            connect_args["prepare_threshold"] = None
+    elif statement_timeout:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
 class ApplicationConfig:
     SECRET_KEY = open("/run/secrets/SECRET_KEY").read().strip() if os.path.exists("/run/secrets/SECRET_KEY") else os.environ["SECRET_KEY"]
     
@@ -11,10 +46,79 @@ class ApplicationConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.environ.get("FLASK_ENV", "production") == "development"
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "direct")  # "pgbouncer" behind PgBouncer in transaction mode
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))  # 0 = no limit
+    # Per route statement_timeout (database.statement_timeout), 0 = DB_STATEMENT_TIMEOUT_MS
+    SEARCH_STATEMENT_TIMEOUT_MS = int(os.environ.get("SEARCH_STATEMENT_TIMEOUT_MS", 2000))  # Typeahead, useless after that
+    STATS_STATEMENT_TIMEOUT_MS = int(os.environ.get("STATS_STATEMENT_TIMEOUT_MS", 0))
     
     # Server side ession config
     SESSION_TYPE = "redis"
     SESSION_PERMANENT = False
     SESSION_USER_SIGNER = True
-    SESSION_REDIS = redis.from_url("redis://redis:6379")
-    
\ No newline at end of file
+    REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379")
+    SESSION_REDIS = redis.from_url(REDIS_URL)
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))  # Cached (id, role, email) of the logged in user
+    # Number of proxies (nginx) in front of the backend whose X-Forwarded-For is trusted, 0 = use the socket address
+    TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+    
+    # Password hashing (passwords.py): bcrypt work factor, older hashes are updated at login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    PASSWORD_HASH_THREADS = int(os.environ.get("PASSWORD_HASH_THREADS", os.cpu_count() or 1))
+    
+    # Login/register rate limit (rate_limit.py): attempts per window, 0 = no limit
+    AUTH_RATE_LIMIT_WINDOW = int(os.environ.get("AUTH_RATE_LIMIT_WINDOW", 300))
+    LOGIN_RATE_LIMIT_EMAIL = int(os.environ.get("LOGIN_RATE_LIMIT_EMAIL", 10))
+    LOGIN_RATE_LIMIT_IP = int(os.environ.get("LOGIN_RATE_LIMIT_IP", 100))  # An office behind one address logs in together
+    REGISTER_RATE_LIMIT_IP = int(os.environ.get("REGISTER_RATE_LIMIT_IP", 10))
+    
+    # Prometheus scrape token for /metrics (an admin session works too)
+    METRICS_TOKEN = read_secret("METRICS_TOKEN")
+    
+    # Request profiler (profiler.py): "X-Profile: 1" from an admin, or every request over the threshold (0 = off)
+    PROFILER_SLOW_THRESHOLD_MS = float(os.environ.get("PROFILER_SLOW_THRESHOLD_MS", 0))
+    PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0.05))  # Share of the requests profiled with the threshold
+    PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", 5))
+    PROFILER_MAX_TRACES = int(os.environ.get("PROFILER_MAX_TRACES", 50))
+    PROFILER_MAX_STATEMENTS = int(os.environ.get("PROFILER_MAX_STATEMENTS", 500))
+    
+    # PDF cache config
+    PDF_CACHE_MAX_ENTRIES = int(os.environ.get("PDF_CACHE_MAX_ENTRIES", 500))
+    PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+    
+    # PDF render queue config
+    PDF_RENDER_TIMEOUT = float(os.environ.get("PDF_RENDER_TIMEOUT", 30))
+    PDF_JOB_TTL = int(os.environ.get("PDF_JOB_TTL", 3600))
+    PDF_WORKER_PROCESSES = int(os.environ.get("PDF_WORKER_PROCESSES", os.cpu_count() or 1))
+    PDF_BATCH_MAX_DEVIS = int(os.environ.get("PDF_BATCH_MAX_DEVIS", 1000))
+    
+    # Devis import config
+    DEVIS_BULK_MAX = int(os.environ.get("DEVIS_BULK_MAX", 1000))
+    
+    # Clients/articles CSV/XLSX import config (bulk_import.py)
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 5000))
+    IMPORT_MAX_ROWS = int(os.environ.get("IMPORT_MAX_ROWS", 200000))
+    IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", 1000))  # errors listed in the report, all are counted
+    
+    # CSV/JSON lines export config (export.py), rows fetched and sent per batch
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+    
+    # JSON responses of the read routes (response_cache.py), 0 = off
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+    
+    # Dashboard statistics cache config
+    DEVIS_STATS_TTL = int(os.environ.get("DEVIS_STATS_TTL", 3600))
+        
+    # DocuSign dispatch config (outbox sent by docusign_dispatcher.py)
+    DOCUSIGN_SERVER_IP = os.environ.get("DOCUSIGN_SERVER_IP")
+    DOCUSIGN_INTEGRATION_KEY = read_secret("DOCUSIGN_INTEGRATION_KEY")
+    DOCUSIGN_ACCOUNT_ID = read_secret("DOCUSIGN_ACCOUNT_ID")
+    DOCUSIGN_USER_ID = read_secret("DOCUSIGN_USER_ID")
+    BACKEND_URL = os.environ.get("BACKEND_URL", "http://backend:5000")
+    DOCUSIGN_CONNECT_TIMEOUT = float(os.environ.get("DOCUSIGN_CONNECT_TIMEOUT", 5))
+    DOCUSIGN_READ_TIMEOUT = float(os.environ.get("DOCUSIGN_READ_TIMEOUT", 60))
+    DOCUSIGN_MAX_ATTEMPTS = int(os.environ.get("DOCUSIGN_MAX_ATTEMPTS", 8))
+    DOCUSIGN_BACKOFF_BASE = float(os.environ.get("DOCUSIGN_BACKOFF_BASE", 5))  # Seconds, doubled on every attempt
+    DOCUSIGN_BACKOFF_MAX = float(os.environ.get("DOCUSIGN_BACKOFF_MAX", 1800))
+    DOCUSIGN_DISPATCH_CONCURRENCY = int(os.environ.get("DOCUSIGN_DISPATCH_CONCURRENCY", 4))
@@ -0,0 +1,58 @@
+from flask import g, session
+from config import ApplicationConfig
+from models import db, User
+import json, logging
+import redis
+
+# Utilisateur connecté, chargé une seule fois par requête (flask.g).
+# (id, role, email) est aussi gardé quelques secondes dans Redis à côté de la session,
+# les décorateurs de rôle n'ont donc pas besoin de requête SQL.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+USER_CACHE_PREFIX = "session:user:"
+USER_CACHE_TTL = ApplicationConfig.USER_CACHE_TTL
+
+def _cache_key(user_id):
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+def _load_user_info(user_id):
+    try:
+        cached = redis_client.get(_cache_key(user_id))
+        if cached is not None:
+            return json.loads(cached)
+    except redis.RedisError as e:
+        logging.warning(f"Cache utilisateur indisponible (lecture): {e}")
+
+    row = db.session.query(User.id, User.role, User.email).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    info = {"id": row.id, "role": row.role, "email": row.email}
+    try:
+        redis_client.set(_cache_key(user_id), json.dumps(info), ex=USER_CACHE_TTL)
+    except redis.RedisError as e:
+        logging.warning(f"Cache utilisateur indisponible (écriture): {e}")
+    return info
+
+# {"id", "role", "email"} of the logged in user, None if not logged in or deleted
+def current_user_info():
+    if "current_user_info" not in g:
+        user_id = session.get("user_id")
+        g.current_user_info = _load_user_info(user_id) if user_id else None
+    return g.current_user_info
+
+# Full User row of the logged in user, None if not logged in or deleted
+def current_user():
+    if "current_user" not in g:
+        user_id = session.get("user_id")
+        g.current_user = db.session.get(User, user_id) if user_id else None
+    return g.current_user
+
+# Called when a user is modified or deleted
+def invalidate_user(user_id):
+    g.pop("current_user_info", None)
+    g.pop("current_user", None)
+    try:
+        redis_client.delete(_cache_key(user_id))
+    except redis.RedisError as e:
+        logging.warning(f"Cache utilisateur indisponible (invalidation): {e}")
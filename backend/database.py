@@ -0,0 +1,78 @@
+from flask import g, request, jsonify, has_request_context
+from config import ApplicationConfig
+from metrics import DB_POOL_WAIT_SECONDS
+from models import db
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from functools import wraps
+import logging, time
+
+# Connexions Postgres des workers web (options du pool : config.engine_options).
+# - Le pool mesure l'attente d'une connexion libre (métrique db_pool_checkout_wait_seconds).
+# - @statement_timeout(ms) limite la durée des requêtes SQL d'une route. Le timeout est posé avec
+#   SET LOCAL au début de chaque transaction : il ne reste pas sur la connexion serveur, ce qui est
+#   compatible avec PgBouncer en mode transaction (DB_POOL_MODE=pgbouncer, où il porte aussi
+#   DB_STATEMENT_TIMEOUT_MS).
+# - Une requête annulée par le timeout renvoie une 503 JSON au lieu d'une 500.
+
+QUERY_CANCELED = "57014"
+
+# QueuePool timing each checkout: waiting for a free connection, or opening one within max_overflow
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start, outcome="timeout")
+            raise
+        DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+        return connection
+
+def _statement_timeout_ms():
+    if has_request_context() and g.get("statement_timeout_ms"):
+        return g.statement_timeout_ms
+    # In direct mode the default is a startup option of the connection
+    if ApplicationConfig.DB_POOL_MODE == "pgbouncer":
+        return ApplicationConfig.DB_STATEMENT_TIMEOUT_MS
+    return 0
+
+def _set_local_timeout(execute, milliseconds):
+    execute(f"SET LOCAL statement_timeout = {int(milliseconds)}")
+
+@event.listens_for(Engine, "begin")
+def _begin(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    milliseconds = _statement_timeout_ms()
+    if milliseconds:
+        _set_local_timeout(conn.exec_driver_sql, milliseconds)
+
+# Route decorator, 0 keeps the default timeout
+def statement_timeout(milliseconds):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if milliseconds:
+                g.statement_timeout_ms = milliseconds
+                # Transaction already begun before the view (user lookup in a hook): set it now
+                if db.session().in_transaction() and db.engine.dialect.name == "postgresql":
+                    _set_local_timeout(lambda sql: db.session.execute(text(sql)), milliseconds)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def _operational_error(e):
+    if getattr(e.orig, "pgcode", None) != QUERY_CANCELED:
+        raise e
+    logging.warning(f"Requête SQL annulée par statement_timeout sur {request.method} {request.path}")
+    return jsonify({"error": "La requête a pris trop de temps, réessayez avec des critères plus précis."}), 503
+
+# Before db.init_app(app): the pool class is read when the engine is created
+def init_app(app):
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    # Only Postgres gets QueuePool settings, SQLite keeps its own pool
+    if "pool_size" in options and "poolclass" not in options:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(options, poolclass=TimedQueuePool)
+    app.register_error_handler(exc.OperationalError, _operational_error)
@@ -0,0 +1,116 @@
+from models import db, Devis, DevisArticles, Clients
+from pricing import load_snapshots, snapshot_totals
+from datetime import datetime
+
+# Écriture des lignes de devis (DevisArticles) en ensembliste.
+# La mise à jour compare les lignes existantes aux nouvelles (une ligne par article)
+# et n'écrit que la différence : un DELETE, un UPDATE executemany et un INSERT executemany.
+
+class DevisLinesError(ValueError):
+    pass
+
+# [{"article_id", "quantite"}, ...] -> {article_id: quantite}, quantities of a repeated article are added up
+def parse_lines(articles_data):
+    lines = {}
+    for index, article in enumerate(articles_data or []):
+        try:
+            article_id = int(article["article_id"])
+            quantite = int(article["quantite"])
+        except (KeyError, TypeError, ValueError):
+            raise DevisLinesError(f"Ligne {index + 1} invalide: article_id et quantite entiers requis.")
+        if quantite <= 0:
+            raise DevisLinesError(f"Ligne {index + 1} invalide: la quantité doit être positive.")
+        lines[article_id] = lines.get(article_id, 0) + quantite
+    return lines
+
+# Current name/price/VAT rate of the articles (see pricing.load_snapshots), raise if some articles don't exist
+def load_article_snapshots(article_ids):
+    article_ids = set(article_ids)
+    snapshots = load_snapshots(article_ids)
+    missing = article_ids - set(snapshots)
+    if missing:
+        raise DevisLinesError(f"Articles inexistants: {sorted(missing)}")
+    return snapshots
+
+def _line_row(devis_id, article_id, quantite, snapshots):
+    nom, prix_vente_HT, taux = snapshots[article_id]
+    return {"devis_id": devis_id, "article_id": article_id, "quantite": quantite,
+            "nom": nom, "prix_vente_HT": prix_vente_HT, "taux_tva": taux}
+
+def insert_lines(devis_id, lines, snapshots=None):
+    if lines:
+        if snapshots is None:
+            snapshots = load_article_snapshots(lines)
+        db.session.execute(db.insert(DevisArticles), [
+            _line_row(devis_id, article_id, quantite, snapshots) for article_id, quantite in lines.items()
+        ])
+
+# Apply the difference between the stored lines and `lines`, returns the number of inserted/updated/deleted rows.
+# Kept lines keep their snapshot, new ones take the current article.
+def sync_lines(devis_id, lines):
+    existing = db.session.execute(
+        db.select(DevisArticles.id, DevisArticles.article_id, DevisArticles.quantite)
+        .where(DevisArticles.devis_id == devis_id)
+        .order_by(DevisArticles.id)
+    ).all()
+
+    to_delete, to_update, kept = [], [], set()
+    for line_id, article_id, quantite in existing:
+        if article_id not in lines or article_id in kept:
+            # Removed article, or duplicate row left by the old full rewrite
+            to_delete.append(line_id)
+            continue
+        kept.add(article_id)
+        if quantite != lines[article_id]:
+            to_update.append({"id": line_id, "quantite": lines[article_id]})
+    to_insert = {article_id: quantite for article_id, quantite in lines.items() if article_id not in kept}
+
+    if to_delete:
+        db.session.execute(db.delete(DevisArticles).where(DevisArticles.id.in_(to_delete)))
+    if to_update:
+        # ORM bulk UPDATE by primary key: one executemany
+        db.session.execute(db.update(DevisArticles), to_update)
+    insert_lines(devis_id, to_insert)
+    return {"inserted": len(to_insert), "updated": len(to_update), "deleted": len(to_delete)}
+
+def _devis_row(data, index):
+    try:
+        return {
+            "client_id": int(data["client_id"]),
+            "titre": data["title"],
+            "description": data.get("description"),
+            "date": datetime.strptime(data["date"], "%Y-%m-%d").date(),
+            "statut": data["statut"],
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise DevisLinesError(f"Devis {index + 1} invalide: {e}")
+
+# Insert many devis and their lines, the amounts are computed from the articles.
+# Returns the new ids in the same order.
+# The caller commits: everything is in the same transaction.
+def bulk_create_devis(devis_data):
+    rows, lines = [], []
+    for index, data in enumerate(devis_data):
+        rows.append(_devis_row(data, index))
+        try:
+            lines.append(parse_lines(data.get("articles")))
+        except DevisLinesError as e:
+            raise DevisLinesError(f"Devis {index + 1}: {e}")
+
+    client_ids = {row["client_id"] for row in rows}
+    found = set(db.session.scalars(db.select(Clients.id).where(Clients.id.in_(client_ids))))
+    if client_ids - found:
+        raise DevisLinesError(f"Clients inexistants: {sorted(client_ids - found)}")
+    snapshots = load_article_snapshots(article_id for devis_lines in lines for article_id in devis_lines)
+    for row, devis_lines in zip(rows, lines):
+        row.update(snapshot_totals(devis_lines, snapshots))
+
+    ids = list(db.session.scalars(db.insert(Devis).returning(Devis.id, sort_by_parameter_order=True), rows))
+    line_rows = [
+        _line_row(devis_id, article_id, quantite, snapshots)
+        for devis_id, devis_lines in zip(ids, lines)
+        for article_id, quantite in devis_lines.items()
+    ]
+    if line_rows:
+        db.session.execute(db.insert(DevisArticles), line_rows)
+    return ids
@@ -0,0 +1,149 @@
+from config import ApplicationConfig
+from models import db, Devis, DevisArticles, Articles, Clients
+from sqlalchemy import func, case, extract
+import json, logging
+import redis
+
+# Statistiques du tableau de bord calculées en SQL (GROUP BY) et mises en cache dans Redis.
+# Le cache est versionné : chaque écriture sur un devis incrémente la version,
+# les anciennes entrées ne sont plus lues et expirent d'elles-mêmes.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+VERSION_KEY = "devis:stats:version"
+CACHE_PREFIX = "devis:stats:"
+CACHE_TTL = ApplicationConfig.DEVIS_STATS_TTL
+
+SIGNED = "Signé"
+REFUSED = "Refusé"
+
+def _round(value):
+    return round(float(value or 0), 2)
+
+def _filtered(query, date_from, date_to):
+    if date_from:
+        query = query.filter(Devis.date >= date_from)
+    if date_to:
+        query = query.filter(Devis.date <= date_to)
+    return query
+
+def _amount_if_signed(column):
+    return func.sum(case((Devis.statut == SIGNED, column), else_=0))
+
+def _months(date_from, date_to):
+    year = extract("year", Devis.date)
+    month = extract("month", Devis.date)
+    totals = _filtered(db.session.query(
+        year, month,
+        func.count(Devis.id),
+        func.sum(Devis.montant_HT),
+        func.sum(Devis.montant_TTC),
+        _amount_if_signed(Devis.montant_HT),
+        _amount_if_signed(Devis.montant_TTC),
+    ), date_from, date_to).group_by(year, month).all()
+
+    # Margin of the lines, (quoted prix_vente_HT - current prix_achat_HT) * quantite
+    margins = dict(((int(y), int(m)), marge) for y, m, marge in _filtered(db.session.query(
+        year, month,
+        func.sum((DevisArticles.prix_vente_HT - Articles.prix_achat_HT) * DevisArticles.quantite),
+    ).select_from(Devis).join(DevisArticles, DevisArticles.devis_id == Devis.id).join(Articles, Articles.id == DevisArticles.article_id),
+        date_from, date_to).group_by(year, month).all())
+
+    return [{
+        "month": f"{int(y):04d}-{int(m):02d}",
+        "count": count,
+        "montant_HT": _round(ht),
+        "montant_TTC": _round(ttc),
+        "signed_montant_HT": _round(signed_ht),
+        "signed_montant_TTC": _round(signed_ttc),
+        "marge_HT": _round(margins.get((int(y), int(m)))),
+    } for y, m, count, ht, ttc, signed_ht, signed_ttc in sorted(totals, key=lambda row: (int(row[0]), int(row[1])))]
+
+def _statuses(date_from, date_to):
+    rows = _filtered(db.session.query(
+        Devis.statut, func.count(Devis.id), func.sum(Devis.montant_HT),
+    ), date_from, date_to).group_by(Devis.statut).all()
+    statuses = {statut: {"count": count, "montant_HT": _round(ht)} for statut, count, ht in rows}
+
+    signed = statuses.get(SIGNED, {}).get("count", 0)
+    refused = statuses.get(REFUSED, {}).get("count", 0)
+    return statuses, {
+        "signed": signed,
+        "refused": refused,
+        "rate": round(signed / (signed + refused), 4) if signed + refused else None,
+    }
+
+def _clients(date_from, date_to, limit):
+    total_ht = func.sum(Devis.montant_HT)
+    rows = _filtered(db.session.query(
+        Clients.id, Clients.nom, Clients.prenom,
+        func.count(Devis.id), total_ht, func.sum(Devis.montant_TTC), _amount_if_signed(Devis.montant_HT),
+    ).join(Devis, Devis.client_id == Clients.id), date_from, date_to) \
+        .group_by(Clients.id, Clients.nom, Clients.prenom) \
+        .order_by(total_ht.desc(), Clients.id) \
+        .limit(limit).all()
+
+    return [{
+        "id": client_id,
+        "nom": nom,
+        "prenom": prenom,
+        "count": count,
+        "montant_HT": _round(ht),
+        "montant_TTC": _round(ttc),
+        "signed_montant_HT": _round(signed_ht),
+    } for client_id, nom, prenom, count, ht, ttc, signed_ht in rows]
+
+def _margin(date_from, date_to):
+    vente = func.sum(DevisArticles.prix_vente_HT * DevisArticles.quantite)
+    achat = func.sum(Articles.prix_achat_HT * DevisArticles.quantite)
+    signed_vente = func.sum(case((Devis.statut == SIGNED, DevisArticles.prix_vente_HT * DevisArticles.quantite), else_=0))
+    signed_achat = func.sum(case((Devis.statut == SIGNED, Articles.prix_achat_HT * DevisArticles.quantite), else_=0))
+    row = _filtered(db.session.query(vente, achat, signed_vente, signed_achat)
+        .select_from(Devis)
+        .join(DevisArticles, DevisArticles.devis_id == Devis.id)
+        .join(Articles, Articles.id == DevisArticles.article_id), date_from, date_to).one()
+
+    vente, achat, signed_vente, signed_achat = (_round(v) for v in row)
+    return {
+        "vente_HT": vente,
+        "achat_HT": achat,
+        "marge_HT": _round(vente - achat),
+        "taux_marge": round((vente - achat) / vente, 4) if vente else None,
+        "signed_marge_HT": _round(signed_vente - signed_achat),
+    }
+
+def compute_devis_stats(date_from=None, date_to=None, clients_limit=50):
+    statuses, conversion = _statuses(date_from, date_to)
+    return {
+        "months": _months(date_from, date_to),
+        "statuses": statuses,
+        "conversion": conversion,
+        "clients": _clients(date_from, date_to, clients_limit),
+        "margin": _margin(date_from, date_to),
+    }
+
+# Cached stats, computed on miss (or when Redis is unavailable)
+def get_devis_stats(date_from=None, date_to=None, clients_limit=50):
+    try:
+        version = int(redis_client.get(VERSION_KEY) or 0)
+        key = f"{CACHE_PREFIX}{version}:{date_from or ''}:{date_to or ''}:{clients_limit}"
+        cached = redis_client.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except redis.RedisError as e:
+        logging.warning(f"Cache des statistiques indisponible (lecture): {e}")
+        return compute_devis_stats(date_from, date_to, clients_limit)
+
+    stats = compute_devis_stats(date_from, date_to, clients_limit)
+    try:
+        redis_client.set(key, json.dumps(stats), ex=CACHE_TTL)
+    except redis.RedisError as e:
+        logging.warning(f"Cache des statistiques indisponible (écriture): {e}")
+    return stats
+
+# Called after every write on devis (and on the articles/clients they aggregate)
+def invalidate_devis_stats():
+    try:
+        redis_client.incr(VERSION_KEY)
+    except redis.RedisError as e:
+        logging.warning(f"Cache des statistiques indisponible (invalidation): {e}")
@@ -0,0 +1,65 @@
+from flask import Flask
+from config import ApplicationConfig
+from models import db
+from docusign_outbox import redis_client, WAKE_KEY, create_http_session, dispatch_due
+from docusign_events import EVENTS_WAKE_KEY, apply_pending_events
+from concurrent.futures import ThreadPoolExecutor
+import logging, signal, time
+import redis
+
+# Dispatcher DocuSign : python docusign_dispatcher.py
+# Envoie les demandes de signature enregistrées par la route /pdf/send/external en dehors des workers gunicorn
+# et applique les événements reçus par le webhook.
+
+POLL_SECONDS = 5
+# Let a burst of webhook events accumulate so it is applied in one UPDATE
+EVENTS_BATCH_WINDOW = 0.2
+
+stop_requested = False
+
+def _request_stop(signum, frame):
+    global stop_requested
+    stop_requested = True
+
+# Database only app, no blueprints/session
+def create_app():
+    app = Flask(__name__)
+    app.config.from_object(ApplicationConfig)
+    db.init_app(app)
+    return app
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    app = create_app()
+    http = create_http_session()
+    logging.info("Dispatcher DocuSign démarré")
+
+    with app.app_context(), ThreadPoolExecutor(ApplicationConfig.DOCUSIGN_DISPATCH_CONCURRENCY) as executor:
+        while not stop_requested:
+            try:
+                processed = dispatch_due(http, executor) + apply_pending_events()
+            except Exception:
+                logging.exception("Erreur du dispatcher DocuSign")
+                db.session.rollback()
+                processed = 0
+            finally:
+                db.session.remove()
+
+            if processed:
+                continue
+            # Nothing due: wait for a new send request, a webhook event (or the next retry)
+            try:
+                woken_by = redis_client.brpop([WAKE_KEY, EVENTS_WAKE_KEY], timeout=POLL_SECONDS)
+                if woken_by and woken_by[0].decode() == EVENTS_WAKE_KEY:
+                    time.sleep(EVENTS_BATCH_WINDOW)
+            except redis.RedisError as e:
+                logging.warning(f"Redis indisponible, attente de {POLL_SECONDS}s: {e}")
+                time.sleep(POLL_SECONDS)
+
+    logging.info("Dispatcher DocuSign arrêté")
+
+if __name__ == "__main__":
+    main()
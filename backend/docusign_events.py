@@ -0,0 +1,166 @@
+from config import ApplicationConfig
+from models import db, Devis, DocusignEvent
+from pdf_cache import invalidate_devis_pdf
+from devis_stats import invalidate_devis_stats
+from response_cache import invalidate
+from sqlalchemy import values, column, select, literal, union_all, case, cast, func, exists, or_, String, Integer, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta
+import logging
+import redis
+
+# Ingestion des webhooks DocuSign.
+# Le webhook ne fait qu'ajouter l'événement (les doublons sont ignorés par la contrainte unique),
+# docusign_dispatcher.py applique ensuite les événements en attente par lots avec un seul UPDATE ... FROM (VALUES ...).
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+EVENTS_WAKE_KEY = "docusign:events:wake"
+BATCH_SIZE = 500
+# Events for an envelope no devis has yet (send not recorded yet) are retried for this long
+MATCH_WINDOW = timedelta(minutes=10)
+
+# DocuSign status -> devis statut
+DEVIS_STATUTS = {
+    "sent": "En attente de signature",
+    "delivered": "En attente de signature",
+    "completed": "Signé",
+    "declined": "Refusé",
+    "voided": "Annulé",
+}
+# A devis only moves forward: an out of order "sent" never overwrites "Signé".
+# "Payé" is set by hand once the devis is signed, no event changes it. A devis whose statut is not
+# listed here is never updated by an event.
+STATUT_RANKS = {
+    "Non signé": 0,
+    "En attente de signature": 1,
+    "Refusé": 2,
+    "Annulé": 2,
+    "Signé": 3,
+    "Payé": 4,
+}
+
+def _insert(dialect_name):
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+# Store a webhook notification, returns False if it was already received
+def record_event(envelope_id, status, event_timestamp=None, signed_at=None):
+    statement = _insert(db.engine.dialect.name)(DocusignEvent).values(
+        envelope_id=envelope_id,
+        status=status,
+        event_timestamp=event_timestamp or signed_at or "",
+        signed_at=signed_at,
+        received_at=datetime.now(),
+        processed_at=None,
+        applied=False,
+    ).on_conflict_do_nothing(index_elements=["envelope_id", "status", "event_timestamp"])
+    inserted = db.session.execute(statement).rowcount == 1
+    db.session.commit()
+    if inserted:
+        _wake_dispatcher()
+    return inserted
+
+def _wake_dispatcher():
+    try:
+        pipe = redis_client.pipeline()
+        pipe.lpush(EVENTS_WAKE_KEY, 1)
+        pipe.ltrim(EVENTS_WAKE_KEY, 0, 0)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Impossible de réveiller le dispatcher DocuSign: {e}")
+
+def _date_paiement(event):
+    if event.status != "completed":
+        return None
+    if event.signed_at:
+        try:
+            return datetime.fromisoformat(event.signed_at.replace('Z', '+00:00')).date()
+        except ValueError:
+            pass
+    return event.received_at.date()
+
+# (envelope_id, statut, rank, date_paiement) rows as a FROM clause:
+# VALUES on Postgres, SELECT ... UNION ALL on SQLite which can't name VALUES columns
+def _transitions_table(rows):
+    if db.engine.dialect.name == "postgresql":
+        return values(
+            column("envelope_id", String), column("statut", String), column("rank", Integer), column("date_paiement", String),
+            name="transitions",
+        ).data([(e, s, r, d.isoformat() if d else None) for e, s, r, d in rows])
+    return union_all(*[select(
+        literal(e, String).label("envelope_id"), literal(s, String).label("statut"),
+        literal(r, Integer).label("rank"), literal(d.isoformat() if d else None, String).label("date_paiement"),
+    ) for e, s, r, d in rows]).subquery("transitions")
+
+def _current_rank():
+    return case(*[(Devis.statut == statut, rank) for statut, rank in STATUT_RANKS.items()])
+
+# Apply a batch of pending events, returns the number of events marked as processed
+def apply_pending_events(limit=BATCH_SIZE):
+    now = datetime.now()
+    # Events waiting for their envelope are left out of the batch (not locked, not ahead of the newer events)
+    # until it is recorded or MATCH_WINDOW has passed
+    ready = or_(
+        DocusignEvent.status.notin_(list(DEVIS_STATUTS)),
+        DocusignEvent.received_at <= now - MATCH_WINDOW,
+        exists().where(Devis.envelope_id == DocusignEvent.envelope_id),
+    )
+    events = DocusignEvent.query \
+        .filter(DocusignEvent.processed_at.is_(None), ready) \
+        .order_by(DocusignEvent.id) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+    if not events:
+        db.session.commit()
+        return 0
+
+    # Only the furthest transition of each envelope matters in a batch
+    best = {}
+    for event in events:
+        statut = DEVIS_STATUTS.get(event.status)
+        if statut is None:
+            logging.warning(f"Statut DocuSign inconnu ignoré: {event.status} (envelope_id: {event.envelope_id})")
+            continue
+        candidate = (STATUT_RANKS[statut], event.event_timestamp, event.id)
+        if event.envelope_id not in best or candidate > best[event.envelope_id][0]:
+            best[event.envelope_id] = (candidate, statut, event)
+
+    updated = []
+    if best:
+        transitions = _transitions_table([(envelope_id, statut, rank, _date_paiement(event))
+                                          for envelope_id, ((rank, _, _), statut, event) in best.items()])
+        date_paiement = transitions.c.date_paiement
+        if db.engine.dialect.name == "postgresql":
+            date_paiement = cast(date_paiement, Date)  # SQLite stores dates as ISO strings already
+        updated = db.session.execute(
+            db.update(Devis)
+            .where(Devis.envelope_id == transitions.c.envelope_id, Devis.statut.in_(list(STATUT_RANKS)),
+                   _current_rank() < transitions.c.rank)
+            .values(statut=transitions.c.statut, date_paiement=func.coalesce(date_paiement, Devis.date_paiement))
+            .returning(Devis.id, Devis.envelope_id, Devis.statut)
+            .execution_options(synchronize_session=False)
+        ).all()
+        known = set(db.session.scalars(select(Devis.envelope_id).where(Devis.envelope_id.in_(list(best)))))
+    else:
+        known = set()
+
+    applied = {envelope_id for _, envelope_id, _ in updated}
+    processed = 0
+    for event in events:
+        if event.status in DEVIS_STATUTS and event.envelope_id not in known:
+            if now - event.received_at < MATCH_WINDOW:
+                continue  # Wait for the outbox to record the envelope
+            logging.warning(f"Devis non trouvé pour envelope_id: {event.envelope_id}")
+        event.processed_at = now
+        event.applied = event.envelope_id in applied and best[event.envelope_id][2] is event
+        processed += 1
+    db.session.commit()
+
+    for devis_id, envelope_id, statut in updated:
+        invalidate_devis_pdf(devis_id)
+        logging.info(f"Devis {devis_id} marqué comme {statut} via webhook DocuSign (envelope_id: {envelope_id})")
+    if updated:
+        invalidate_devis_stats()
+        invalidate("devis", *[devis_id for devis_id, _, _ in updated])
+    return processed
@@ -0,0 +1,187 @@
+from config import ApplicationConfig
+from models import db, Devis, DocusignOutbox
+from pdf_cache import invalidate_devis_pdf
+from devis_stats import invalidate_devis_stats
+from response_cache import invalidate
+from metrics import DOCUSIGN_SECONDS
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta
+import json, logging, random, time, uuid
+import redis, requests
+
+# Outbox des envois DocuSign.
+# La route enregistre l'envoi et répond 202, docusign_dispatcher.py l'envoie ensuite au serveur de signature
+# (session HTTP partagée, timeouts, backoff exponentiel, clé d'idempotence) et met le devis à jour.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+WAKE_KEY = "docusign:wake"
+# A claimed entry is retried after this delay if the dispatcher died while sending it
+LEASE_SECONDS = ApplicationConfig.DOCUSIGN_CONNECT_TIMEOUT + ApplicationConfig.DOCUSIGN_READ_TIMEOUT + 30
+
+# Record a send request for the devis, the PDF is kept until it is sent
+def enqueue_send(devis, client, file):
+    now = datetime.now()
+    entry = DocusignOutbox(
+        devis_id=devis.id,
+        idempotency_key=uuid.uuid4().hex,
+        statut="pending",
+        filename=file.filename or f"devis_{devis.id}.pdf",
+        content_type=file.content_type or "application/pdf",
+        pdf=file.read(),
+        signer_email=client.email,
+        signer_name=f"{client.prenom} {client.nom}",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.session.add(entry)
+    db.session.commit()
+    wake_dispatcher()
+    return entry
+
+def wake_dispatcher():
+    try:
+        pipe = redis_client.pipeline()
+        pipe.lpush(WAKE_KEY, 1)
+        pipe.ltrim(WAKE_KEY, 0, 0)
+        pipe.execute()
+    except redis.RedisError as e:
+        # The dispatcher polls the table anyway
+        logging.warning(f"Impossible de réveiller le dispatcher DocuSign: {e}")
+
+def outbox_status(entry):
+    return {
+        "id": entry.id,
+        "devis_id": entry.devis_id,
+        "statut": entry.statut,
+        "attempts": entry.attempts,
+        "envelope_id": entry.envelope_id,
+        "last_error": entry.last_error,
+        "next_attempt_at": entry.next_attempt_at.isoformat() if entry.statut in ("pending", "sending") else None,
+    }
+
+def create_http_session():
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ApplicationConfig.DOCUSIGN_DISPATCH_CONCURRENCY, max_retries=0)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    return http
+
+# Lock the due entries (SKIP LOCKED so several dispatchers can run) and mark them as sending
+def claim_due(limit):
+    now = datetime.now()
+    entries = DocusignOutbox.query \
+        .filter(DocusignOutbox.statut.in_(("pending", "sending")), DocusignOutbox.next_attempt_at <= now) \
+        .order_by(DocusignOutbox.next_attempt_at) \
+        .limit(limit) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+    claimed = []
+    for entry in entries:
+        entry.statut = "sending"
+        entry.attempts += 1
+        entry.next_attempt_at = now + timedelta(seconds=LEASE_SECONDS)
+        claimed.append({
+            "id": entry.id,
+            "devis_id": entry.devis_id,
+            "idempotency_key": entry.idempotency_key,
+            "filename": entry.filename,
+            "content_type": entry.content_type,
+            "pdf": entry.pdf,
+            "signer_email": entry.signer_email,
+            "signer_name": entry.signer_name,
+        })
+    db.session.commit()
+    return claimed
+
+# POST to the signing server, returns (outcome, envelope_id, error) with outcome sent/retry/failed.
+# Runs in the dispatcher threads: no database access here.
+def send_entry(http, entry):
+    start = time.perf_counter()
+    outcome, envelope_id, error = _post_entry(http, entry)
+    DOCUSIGN_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+    return outcome, envelope_id, error
+
+def _post_entry(http, entry):
+    config = ApplicationConfig
+    data = {
+        'integrator_key': config.DOCUSIGN_INTEGRATION_KEY,
+        'account_id': config.DOCUSIGN_ACCOUNT_ID,
+        'user_id': config.DOCUSIGN_USER_ID,
+        'callback_url': f"{config.BACKEND_URL}/api/devis/docusign/webhook",
+        'signers': json.dumps([{
+            'email': entry["signer_email"],
+            'name': entry["signer_name"],
+        }])
+    }
+    try:
+        response = http.post(
+            f"{config.DOCUSIGN_SERVER_IP}/send-pdf",
+            files={'file': (entry["filename"], entry["pdf"], entry["content_type"])},
+            data=data,
+            headers={"Idempotency-Key": entry["idempotency_key"]},
+            timeout=(config.DOCUSIGN_CONNECT_TIMEOUT, config.DOCUSIGN_READ_TIMEOUT),
+        )
+    except requests.exceptions.RequestException as e:
+        return "retry", None, f"Erreur réseau: {e}"
+
+    if response.status_code == 429 or response.status_code >= 500:
+        return "retry", None, f"HTTP {response.status_code}: {response.text[:500]}"
+    if response.status_code >= 400:
+        return "failed", None, f"HTTP {response.status_code}: {response.text[:500]}"
+
+    try:
+        envelope_id = response.json().get('envelope_id')
+    except ValueError:
+        return "retry", None, f"Réponse invalide: {response.text[:500]}"
+    if not envelope_id:
+        return "failed", None, f"Réponse sans envelope_id: {response.text[:500]}"
+    return "sent", envelope_id, None
+
+def _backoff(attempts):
+    delay = min(ApplicationConfig.DOCUSIGN_BACKOFF_BASE * 2 ** (attempts - 1), ApplicationConfig.DOCUSIGN_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1)
+
+# Store the result of send_entry and update the devis on success
+def apply_result(entry_id, outcome, envelope_id, error):
+    entry = db.session.get(DocusignOutbox, entry_id)
+    if entry is None:
+        # Devis deleted while sending
+        return
+    now = datetime.now()
+
+    if outcome == "sent":
+        entry.statut = "sent"
+        entry.envelope_id = envelope_id
+        entry.sent_at = now
+        entry.pdf = None
+        entry.last_error = None
+        devis = db.session.get(Devis, entry.devis_id)
+        devis.envelope_id = envelope_id
+        devis.statut = "En attente de signature"
+        db.session.commit()
+        invalidate_devis_pdf(devis.id)
+        invalidate_devis_stats()
+        invalidate("devis", devis.id)
+        logging.info(f"Devis {devis.id} envoyé pour signature. Envelope ID: {envelope_id} (tentative {entry.attempts})")
+        return
+
+    entry.last_error = error
+    if outcome == "retry" and entry.attempts < ApplicationConfig.DOCUSIGN_MAX_ATTEMPTS:
+        entry.statut = "pending"
+        entry.next_attempt_at = now + timedelta(seconds=_backoff(entry.attempts))
+        logging.warning(f"Envoi DocuSign du devis {entry.devis_id} en échec (tentative {entry.attempts}), nouvel essai à {entry.next_attempt_at:%H:%M:%S}: {error}")
+    else:
+        entry.statut = "failed"
+        logging.error(f"Envoi DocuSign du devis {entry.devis_id} abandonné après {entry.attempts} tentative(s): {error}")
+    db.session.commit()
+
+# Send every due entry, returns the number of entries processed
+def dispatch_due(http, executor):
+    claimed = claim_due(ApplicationConfig.DOCUSIGN_DISPATCH_CONCURRENCY * 4)
+    results = executor.map(lambda entry: send_entry(http, entry), claimed)
+    for entry, (outcome, envelope_id, error) in zip(claimed, results):
+        apply_result(entry["id"], outcome, envelope_id, error)
+    return len(claimed)
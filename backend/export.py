@@ -0,0 +1,120 @@
+from config import ApplicationConfig
+from models import db, Clients, Articles, Devis, DevisArticles
+from pricing import line_totals
+import csv, io, itertools
+import msgspec
+import refdata
+
+# Export complet des clients, articles et devis en CSV ou JSON lines, envoyé en flux.
+# Les lignes sont lues par paquets de EXPORT_BATCH_SIZE (yield_per : curseur côté serveur avec
+# psycopg2) et chaque paquet est encodé puis envoyé aussitôt : la mémoire utilisée ne dépend pas
+# de la taille de la table.
+# Devis : en CSV une ligne par ligne de devis (colonnes du devis répétées), en JSON lines un devis
+# par ligne avec ses articles. Les montants des lignes sont calculés comme dans pricing.py.
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+CLIENT_FIELDS = ("id", "nom", "prenom", "rue", "ville", "code_postal", "telephone", "email", "caduque")
+ARTICLE_FIELDS = ("id", "nom", "description", "prix_achat_HT", "prix_vente_HT", "taux_tva")
+DEVIS_FIELDS = ("id", "titre", "description", "date", "statut", "date_paiement", "montant_HT", "montant_TVA", "montant_TTC")
+LINE_FIELDS = ("article_id", "nom", "quantite", "prix_vente_HT", "taux_tva", "montant_HT", "montant_TVA", "montant_TTC")
+DEVIS_CSV_HEADER = (
+    *(f"devis_{name}" for name in DEVIS_FIELDS), "client_id", "client_nom", "client_prenom",
+    *(f"ligne_{name}" for name in LINE_FIELDS),
+)
+
+_encoder = msgspec.json.Encoder(decimal_format="number")
+
+def clients_select():
+    return db.select(*(getattr(Clients, name) for name in CLIENT_FIELDS)).order_by(Clients.id)
+
+def articles_select():
+    return db.select(Articles.id, Articles.nom, Articles.description, Articles.prix_achat_HT,
+                     Articles.prix_vente_HT, Articles.taux_tva_id).order_by(Articles.id)
+
+# One row per devis line, or one row with NULL line columns for a devis without lines
+def devis_select():
+    return db.select(
+        *(getattr(Devis, name) for name in DEVIS_FIELDS), Devis.client_id, Clients.nom, Clients.prenom,
+        DevisArticles.article_id, DevisArticles.nom, DevisArticles.quantite, DevisArticles.prix_vente_HT, DevisArticles.taux_tva,
+    ).join(Clients, Clients.id == Devis.client_id) \
+        .outerjoin(DevisArticles, DevisArticles.devis_id == Devis.id) \
+        .order_by(Devis.id, DevisArticles.id)
+
+def _stream(select):
+    return db.session.execute(select.execution_options(yield_per=ApplicationConfig.EXPORT_BATCH_SIZE))
+
+def _client_records(rows):
+    return (tuple(row) for row in rows)
+
+def _article_records(rows):
+    # The VAT rate value from the refdata cache, not its id
+    return ((*row[:5], refdata.taux_tva(row[5])) for row in rows)
+
+def _line(row):
+    article_id, nom, quantite, prix_vente_HT, taux = row[12:]
+    if article_id is None:
+        return None
+    return (article_id, nom, quantite, prix_vente_HT, taux, *line_totals(prix_vente_HT, taux, quantite))
+
+def _devis_csv_records(rows):
+    for row in rows:
+        line = _line(row)
+        yield (*row[:12], *(line if line is not None else (None,) * len(LINE_FIELDS)))
+
+# Rows are sorted by devis: a devis is complete when the next one starts
+def _devis_json_records(rows):
+    devis = None
+    for row in rows:
+        if devis is None or devis["id"] != row[0]:
+            if devis is not None:
+                yield devis
+            devis = dict(zip(DEVIS_FIELDS, row[:9]))
+            devis["client"] = {"id": row[9], "nom": row[10], "prenom": row[11]}
+            devis["articles"] = []
+        line = _line(row)
+        if line is not None:
+            devis["articles"].append(dict(zip(LINE_FIELDS, line)))
+    if devis is not None:
+        yield devis
+
+def _batches(records):
+    records = iter(records)
+    while batch := list(itertools.islice(records, ApplicationConfig.EXPORT_BATCH_SIZE)):
+        yield batch
+
+def _csv(header, records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM: Excel reads the file as UTF-8 (the accents), bulk_import.py skips it
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for batch in _batches(records):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _ndjson(fields, records):
+    for batch in _batches(records):
+        yield b"".join(_encoder.encode(record if fields is None else dict(zip(fields, record))) + b"\n" for record in batch)
+
+# Generator of the encoded file, select is the (filtered) query of the entity
+def generate(entity, export_format, select):
+    rows = _stream(select)
+    if entity == "clients":
+        records, fields = _client_records(rows), CLIENT_FIELDS
+    elif entity == "articles":
+        records, fields = _article_records(rows), ARTICLE_FIELDS
+    elif export_format == "csv":
+        records, fields = _devis_csv_records(rows), DEVIS_CSV_HEADER
+    else:
+        records, fields = _devis_json_records(rows), None
+    if export_format == "csv":
+        return _csv(fields, records)
+    return _ndjson(fields, records)
@@ -0,0 +1,57 @@
+import os
+
+# Configuration gunicorn du backend (Dockerfile.prod : gunicorn -c gunicorn.conf.py app:app).
+# Tout se règle par des variables d'environnement GUNICORN_*.
+# GUNICORN_WORKER_CLASS :
+#   gthread (défaut) : plusieurs threads par worker, un appel bloquant (bcrypt, attente du PDF,
+#                      Redis, Postgres) n'occupe qu'un thread. Compatible avec le profileur.
+#   gevent           : greenlets, pour beaucoup de requêtes lentes en parallèle. psycopg2 devient
+#                      coopératif avec psycogreen, bcrypt passe par les threads natifs du hub
+#                      (passwords.py). Le profileur n'échantillonne plus les piles (seulement le SQL).
+#   sync             : une requête à la fois par worker.
+# Chaque worker a son pool SQLAlchemy (DB_POOL_SIZE + DB_MAX_OVERFLOW, voir config.engine_options) :
+# prévoir au plus workers x threads connexions Postgres, ou passer par PgBouncer (DB_POOL_MODE=pgbouncer).
+
+def _cores():
+    try:
+        # CPUs actually given to the container (cpuset), not those of the host
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+if worker_class == "gevent":
+    # Patched before preload_app imports the app, otherwise ssl/threading/socket are already imported unpatched
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+# (2 x cores) + 1, the gunicorn documentation starting point
+workers = int(os.environ.get("GUNICORN_WORKERS", 2 * _cores() + 1))
+# Stay at or below DB_POOL_SIZE + DB_MAX_OVERFLOW so threads don't wait for a connection
+threads = int(os.environ.get("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+# GET /api/devis/pdf/<id> waits up to PDF_RENDER_TIMEOUT for pdf-worker, keep a margin above it
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", float(os.environ.get("PDF_RENDER_TIMEOUT", 30)) + 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# The app (routes, serializers, db.create_all) is loaded once in the master and shared copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+# Worker heartbeat in memory: on Docker's overlay filesystem the default tmp dir can block the workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Connections opened by the master while importing the app (db.create_all, first admin) must not
+    # be shared by the workers: drop them from the pool without closing the master's sockets.
+    # redis-py checks the pid of its pool and resets it after a fork by itself.
+    from app import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,208 @@
+from flask import g, request, has_request_context
+from config import ApplicationConfig
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging, time
+import redis
+
+# Métriques au format texte Prometheus, exposées sur /metrics.
+# Les valeurs sont cumulées dans Redis (HINCRBY/HINCRBYFLOAT) : les workers gunicorn, pdf_worker.py
+# et docusign_dispatcher.py écrivent dans les mêmes compteurs, quel que soit le process ou le conteneur.
+# Pendant une requête les écritures sont groupées et envoyées en un seul pipeline une fois la réponse envoyée.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+KEY_PREFIX = "metrics:"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Labels attendus: {labelnames}, reçus: {sorted(labels)}")
+    return ",".join(f'{name}="{_escape(labels[name])}"' for name in labelnames)
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.key = f"{KEY_PREFIX}{name}"
+        REGISTRY.append(self)
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        _record(("hincrbyfloat", self.key, _labels(self.labelnames, labels), amount))
+
+    def render(self, values):
+        return [f"{self.name}{{{labels}}} {_format_value(value)}" if labels else f"{self.name} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+# Buckets are stored per bucket and made cumulative when rendered
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        labels = _labels(self.labelnames, labels)
+        bucket = next((b for b in self.buckets if value <= b), "+Inf")
+        _record(
+            ("hincrby", self.key, f"{labels}|bucket:{bucket}", 1),
+            ("hincrbyfloat", self.key, f"{labels}|sum", value),
+            ("hincrby", self.key, f"{labels}|count", 1),
+        )
+
+    def render(self, values):
+        series = {}
+        for field, value in values.items():
+            labels, _, suffix = field.rpartition("|")
+            series.setdefault(labels, {})[suffix] = float(value)
+
+        lines = []
+        for labels, fields in sorted(series.items()):
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bucket in self.buckets:
+                cumulative += fields.get(f"bucket:{bucket}", 0)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bucket}"}} {_format_value(cumulative)}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {_format_value(fields.get("count", 0))}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_value(fields.get('sum', 0))}")
+            lines.append(f"{self.name}_count{suffix} {_format_value(fields.get('count', 0))}")
+        return lines
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Durée des requêtes HTTP par route.",
+                            ("blueprint", "route", "method", "status"))
+REQUEST_SQL_QUERIES = Histogram("http_request_sql_queries", "Nombre de requêtes SQL par requête HTTP.",
+                                ("blueprint", "route"), buckets=COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram("http_request_sql_duration_seconds", "Temps passé en SQL par requête HTTP.",
+                                ("blueprint", "route"))
+DB_POOL_WAIT_SECONDS = Histogram("db_pool_checkout_wait_seconds", "Attente d'une connexion du pool SQLAlchemy (ouverture comprise).",
+                                 ("outcome",))
+SESSION_SECONDS = Histogram("redis_session_duration_seconds", "Durée de lecture/écriture de la session Redis.",
+                            ("operation",))
+RESPONSE_CACHE_REQUESTS = Counter("http_cache_requests_total", "Lectures du cache des réponses (hit, not_modified, miss, error).",
+                                  ("route", "result"))
+PASSWORD_HASH_SECONDS = Histogram("password_hash_duration_seconds", "Hachage/vérification bcrypt, attente du pool comprise.",
+                                  ("operation",))
+AUTH_RATE_LIMITED = Counter("auth_rate_limited_total", "Tentatives d'authentification refusées par la limite de débit.",
+                            ("action", "scope"))
+PDF_RENDER_SECONDS = Histogram("pdf_render_duration_seconds", "Durée du rendu WeasyPrint d'un PDF.",
+                               ("status",), buckets=SLOW_BUCKETS)
+DOCUSIGN_SECONDS = Histogram("docusign_request_duration_seconds", "Durée des appels au serveur de signature.",
+                             ("outcome",), buckets=SLOW_BUCKETS)
+
+# During a request the writes wait in g until the response is sent, otherwise they are sent now
+def _record(*commands):
+    if has_request_context():
+        g.setdefault("metrics_pending", []).extend(commands)
+    else:
+        _send(commands)
+
+def _send(commands):
+    if not commands:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for command, key, field, amount in commands:
+            getattr(pipe, command)(key, field, amount)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Impossible d'enregistrer les métriques: {e}")
+
+def render_metrics():
+    pipe = redis_client.pipeline(transaction=False)
+    for metric in REGISTRY:
+        pipe.hgetall(metric.key)
+    lines = []
+    for metric, values in zip(REGISTRY, pipe.execute()):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render({k.decode(): v.decode() for k, v in values.items()}))
+    return "\n".join(lines) + "\n"
+
+# SQL statements run while handling a request, counted in g
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    if has_request_context():
+        g.metrics_sql_queries = g.get("metrics_sql_queries", 0) + 1
+        g.metrics_sql_seconds = g.get("metrics_sql_seconds", 0.0) + duration
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("metrics_query_start"):
+        context.connection.info["metrics_query_start"].pop()
+
+# Wraps Flask-Session's interface to time the Redis reads/writes of the session
+class TimedSessionInterface:
+    def __init__(self, interface):
+        self.interface = interface
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+    def open_session(self, app, request):
+        start = time.perf_counter()
+        try:
+            return self.interface.open_session(app, request)
+        finally:
+            SESSION_SECONDS.observe(time.perf_counter() - start, operation="open")
+
+    def save_session(self, app, session, response):
+        start = time.perf_counter()
+        try:
+            return self.interface.save_session(app, session, response)
+        finally:
+            SESSION_SECONDS.observe(time.perf_counter() - start, operation="save")
+
+def _route_labels():
+    if request.url_rule is None:
+        return {"blueprint": "", "route": "unmatched"}
+    return {"blueprint": request.blueprint or "", "route": request.url_rule.rule}
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+def _after_request(response):
+    start = g.get("metrics_start")
+    if start is not None:
+        labels = _route_labels()
+        REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, status=response.status_code, **labels)
+        REQUEST_SQL_QUERIES.observe(g.get("metrics_sql_queries", 0), **labels)
+        REQUEST_SQL_SECONDS.observe(g.get("metrics_sql_seconds", 0.0), **labels)
+    # Sent once the response is sent, save_session runs after this hook and its metric goes with the rest
+    request_globals = g._get_current_object()
+    request_globals.metrics_on_close = True
+    response.call_on_close(lambda: _send(request_globals.pop("metrics_pending", [])))
+    return response
+
+def _teardown_request(exc):
+    if not g.get("metrics_on_close"):
+        _send(g.pop("metrics_pending", []))
+
+def init_app(app):
+    app.session_interface = TimedSessionInterface(app.session_interface)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
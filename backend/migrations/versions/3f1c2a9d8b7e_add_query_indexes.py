@@ -0,0 +1,47 @@
+"""Add indexes on the columns every query filters on
+
+Revision ID: 3f1c2a9d8b7e
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b7e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# The tables are created by db.create_all() at startup, which also creates these indexes
+# on a new database: if_not_exists keeps the migration safe to run on both.
+INDEXES = [
+    ("ix_users_role", "users", ["role"], {}),
+    ("ix_clients_email", "clients", ["email"], {}),
+    ("ix_devis_client_id", "devis", ["client_id"], {}),
+    ("ix_devis_statut_date", "devis", ["statut", "date"], {}),
+    ("ix_devis_date", "devis", ["date"], {}),
+    ("uq_devis_envelope_id", "devis", ["envelope_id"], {
+        "unique": True,
+        "postgresql_where": sa.text("envelope_id IS NOT NULL"),
+        "sqlite_where": sa.text("envelope_id IS NOT NULL"),
+    }),
+    ("ix_devis_articles_devis_id", "devis_articles", ["devis_id"], {}),
+    ("ix_devis_articles_article_id", "devis_articles", ["article_id"], {}),
+    ("ix_taux_tva_taux", "taux_tva", ["taux"], {}),
+]
+
+
+def upgrade():
+    # CONCURRENTLY on Postgres so the tables stay writable, it can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **options)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
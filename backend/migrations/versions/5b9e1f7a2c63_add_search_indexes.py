@@ -0,0 +1,53 @@
+"""Add the full text and trigram search indexes
+
+Revision ID: 5b9e1f7a2c63
+Revises: c27e9b3a4d18
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e1f7a2c63'
+down_revision = 'c27e9b3a4d18'
+branch_labels = None
+depends_on = None
+
+# Same documents as models.search_document(), the search queries only use the indexes if the expressions match
+DOCUMENTS = {
+    "clients": ["nom", "prenom", "ville", "email"],
+    "articles": ["nom", "description"],
+    "devis": ["titre", "description"],
+}
+
+
+def _document(columns):
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def upgrade():
+    # SQLite uses FTS5 tables instead, created at startup by search.py
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY so the tables stay writable, it can't run in a transaction
+    with op.get_context().autocommit_block():
+        for table, columns in DOCUMENTS.items():
+            document = _document(columns)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_fts ON {table} "
+                       f"USING gin (to_tsvector('french'::regconfig, {document}))")
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_trgm ON {table} "
+                       f"USING gin (({document}) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        for table in reversed(list(DOCUMENTS)):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search_trgm")
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search_fts")
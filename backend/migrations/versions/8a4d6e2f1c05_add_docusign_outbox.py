@@ -0,0 +1,51 @@
+"""Add the DocuSign outbox table
+
+Revision ID: 8a4d6e2f1c05
+Revises: 3f1c2a9d8b7e
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d6e2f1c05'
+down_revision = '3f1c2a9d8b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Already there if db.create_all() ran with the new models
+    if sa.inspect(op.get_bind()).has_table("docusign_outbox"):
+        return
+
+    op.create_table(
+        'docusign_outbox',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('devis_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('statut', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('pdf', sa.LargeBinary(), nullable=True),
+        sa.Column('signer_email', sa.String(length=345), nullable=False),
+        sa.Column('signer_name', sa.String(length=201), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('envelope_id', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['devis_id'], ['devis.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id'),
+        sa.UniqueConstraint('idempotency_key'),
+    )
+    op.create_index('ix_docusign_outbox_statut_next_attempt_at', 'docusign_outbox', ['statut', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_docusign_outbox_statut_next_attempt_at', table_name='docusign_outbox')
+    op.drop_table('docusign_outbox')
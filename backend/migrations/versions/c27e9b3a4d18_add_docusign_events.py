@@ -0,0 +1,44 @@
+"""Add the DocuSign webhook events table
+
+Revision ID: c27e9b3a4d18
+Revises: 8a4d6e2f1c05
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27e9b3a4d18'
+down_revision = '8a4d6e2f1c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Already there if db.create_all() ran with the new models
+    if sa.inspect(op.get_bind()).has_table("docusign_events"):
+        return
+
+    op.create_table(
+        'docusign_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('envelope_id', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('event_timestamp', sa.String(length=64), nullable=False),
+        sa.Column('signed_at', sa.String(length=64), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('applied', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id'),
+        sa.UniqueConstraint('envelope_id', 'status', 'event_timestamp', name='uq_docusign_events_envelope_status_timestamp'),
+    )
+    op.create_index('ix_docusign_events_pending', 'docusign_events', ['id'],
+                    postgresql_where=sa.text("processed_at IS NULL"), sqlite_where=sa.text("processed_at IS NULL"))
+
+
+def downgrade():
+    op.drop_index('ix_docusign_events_pending', table_name='docusign_events')
+    op.drop_table('docusign_events')
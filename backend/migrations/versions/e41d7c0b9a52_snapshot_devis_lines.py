@@ -0,0 +1,56 @@
+"""Snapshot the article name, price and VAT rate into the devis lines
+
+Revision ID: e41d7c0b9a52
+Revises: 5b9e1f7a2c63
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41d7c0b9a52'
+down_revision = '5b9e1f7a2c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Already there if db.create_all() ran with the new models
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("devis_articles")}
+    if "nom" in columns:
+        return
+
+    with op.batch_alter_table('devis_articles') as batch_op:
+        batch_op.add_column(sa.Column('nom', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('prix_vente_HT', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('taux_tva', sa.Float(), nullable=True))
+
+    # The price at quote time is not known for the existing lines: they take the current article
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            'UPDATE devis_articles SET nom = articles.nom, "prix_vente_HT" = articles."prix_vente_HT", taux_tva = taux_tva.taux '
+            'FROM articles JOIN taux_tva ON taux_tva.id = articles.taux_tva_id '
+            'WHERE articles.id = devis_articles.article_id'
+        )
+    else:
+        op.execute(
+            'UPDATE devis_articles SET '
+            'nom = (SELECT nom FROM articles WHERE articles.id = devis_articles.article_id), '
+            '"prix_vente_HT" = (SELECT "prix_vente_HT" FROM articles WHERE articles.id = devis_articles.article_id), '
+            'taux_tva = (SELECT taux_tva.taux FROM articles JOIN taux_tva ON taux_tva.id = articles.taux_tva_id '
+            'WHERE articles.id = devis_articles.article_id)'
+        )
+
+    with op.batch_alter_table('devis_articles') as batch_op:
+        batch_op.alter_column('nom', existing_type=sa.String(length=200), nullable=False)
+        batch_op.alter_column('prix_vente_HT', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('taux_tva', existing_type=sa.Float(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('devis_articles') as batch_op:
+        batch_op.drop_column('taux_tva')
+        batch_op.drop_column('prix_vente_HT')
+        batch_op.drop_column('nom')
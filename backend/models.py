@@ -1,9 +1,39 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import DDL, String, event, func, literal, literal_column
 
 db = SQLAlchemy()
 ma = Marshmallow()
 
+# Full text search (see search.py): the searched columns of a row form one document,
+# indexed on Postgres with a french tsvector and with pg_trgm trigrams (typos, partial words).
+# The queries use the same expressions so the GIN indexes apply.
+SEARCH_CONFIG = literal_column("'french'::regconfig")
+
+def _inline(value):
+    # Rendered in the SQL and not sent as a parameter, the query text has to match the index
+    return literal(value, String, literal_execute=True)
+
+def search_document(*columns):
+    document = func.coalesce(columns[0], _inline(""))
+    for column in columns[1:]:
+        document = document + _inline(" ") + func.coalesce(column, _inline(""))
+    return document
+
+def search_vector(document):
+    return func.to_tsvector(SEARCH_CONFIG, document)
+
+def search_indexes(name, *columns):
+    document = search_document(*columns)
+    return (
+        db.Index(f"ix_{name}_search_fts", search_vector(document), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        db.Index(f"ix_{name}_search_trgm", document.label("document"),
+                 postgresql_using="gin", postgresql_ops={"document": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+event.listen(db.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer(), primary_key=True, unique=True, autoincrement=True)
@@ -12,6 +42,10 @@ class User(db.Model):
     email = db.Column(db.String(345), nullable=False, unique=True)
     mdp = db.Column(db.Text, nullable=False)
     role = db.Column(db.String(50), nullable=False, default="Utilisateur")
+    
+    __table_args__ = (
+        db.Index("ix_users_role", "role"),
+    )
 
 class Clients(db.Model):
     __tablename__ = "clients"
@@ -24,6 +58,11 @@ class Clients(db.Model):
     telephone = db.Column(db.String(20), nullable=False)
     email = db.Column(db.String(345), nullable=False)
     caduque = db.Column(db.Boolean, nullable=False, default=False)
+    
+    __table_args__ = (
+        db.Index("ix_clients_email", "email"),
+        *search_indexes("clients", nom, prenom, ville, email),
+    )
 
 class Devis(db.Model):
     __tablename__ = "devis"
@@ -41,6 +80,17 @@ class Devis(db.Model):
     
     client = db.relationship('Clients', backref='devis', lazy=True)
     articles = db.relationship('DevisArticles', backref='devis', lazy=True)
+    
+    # Indexes on the columns the routes filter/sort on (see migrations/versions)
+    __table_args__ = (
+        db.Index("ix_devis_client_id", "client_id"),
+        db.Index("ix_devis_statut_date", "statut", "date"),
+        db.Index("ix_devis_date", "date"),
+        # Webhook lookup, one devis per DocuSign envelope
+        db.Index("uq_devis_envelope_id", "envelope_id", unique=True,
+                 postgresql_where=db.text("envelope_id IS NOT NULL"), sqlite_where=db.text("envelope_id IS NOT NULL")),
+        *search_indexes("devis", titre, description),
+    )
 
 class Articles(db.Model):
     __tablename__ = "articles"
@@ -52,6 +102,10 @@ class Articles(db.Model):
     taux_tva_id = db.Column(db.Integer(), db.ForeignKey('taux_tva.id'), nullable=False)
     
     taux_tva = db.relationship('TauxTVA', backref='articles', lazy=True)
+    
+    __table_args__ = (
+        *search_indexes("articles", nom, description),
+    )
 
 class DevisArticles(db.Model):
     __tablename__ = "devis_articles"
@@ -59,13 +113,88 @@ class DevisArticles(db.Model):
     devis_id = db.Column(db.Integer(), db.ForeignKey('devis.id'), nullable=False)
     article_id = db.Column(db.Integer(), db.ForeignKey('articles.id'), nullable=False)
     quantite = db.Column(db.Integer(), nullable=False)
+    # Article as it was when the line was written, devis are read and printed from these
+    nom = db.Column(db.String(200), nullable=False)
+    prix_vente_HT = db.Column(db.Float(), nullable=False)
+    taux_tva = db.Column(db.Float(), nullable=False)
     
     article = db.relationship('Articles', backref='devis_articles', lazy=True)
+    
+    __table_args__ = (
+        db.Index("ix_devis_articles_devis_id", "devis_id"),
+        db.Index("ix_devis_articles_article_id", "article_id"),
+    )
 
 class TauxTVA(db.Model):
     __tablename__ = "taux_tva"
     id = db.Column(db.Integer(), primary_key=True, unique=True, autoincrement=True)
     taux = db.Column(db.Float(), nullable=False, default=0.20)
+    
+    __table_args__ = (
+        db.Index("ix_taux_tva_taux", "taux"),
+    )
+
+# DocuSign send requests, dispatched in the background by docusign_dispatcher.py
+class DocusignOutbox(db.Model):
+    __tablename__ = "docusign_outbox"
+    id = db.Column(db.Integer(), primary_key=True, unique=True, autoincrement=True)
+    devis_id = db.Column(db.Integer(), db.ForeignKey('devis.id'), nullable=False)
+    idempotency_key = db.Column(db.String(64), nullable=False, unique=True)
+    statut = db.Column(db.String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    pdf = db.Column(db.LargeBinary(), nullable=True)  # Dropped once sent
+    signer_email = db.Column(db.String(345), nullable=False)
+    signer_name = db.Column(db.String(201), nullable=False)
+    attempts = db.Column(db.Integer(), nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime(), nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    envelope_id = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime(), nullable=False)
+    sent_at = db.Column(db.DateTime(), nullable=True)
+    
+    __table_args__ = (
+        db.Index("ix_docusign_outbox_statut_next_attempt_at", "statut", "next_attempt_at"),
+    )
+
+# DocuSign webhook notifications, deduplicated on (envelope_id, status, event_timestamp)
+# and applied to the devis in batches by docusign_events.py
+class DocusignEvent(db.Model):
+    __tablename__ = "docusign_events"
+    id = db.Column(db.Integer(), primary_key=True, unique=True, autoincrement=True)
+    envelope_id = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    event_timestamp = db.Column(db.String(64), nullable=False, default="")  # As sent by the signing server
+    signed_at = db.Column(db.String(64), nullable=True)
+    received_at = db.Column(db.DateTime(), nullable=False)
+    processed_at = db.Column(db.DateTime(), nullable=True)
+    applied = db.Column(db.Boolean, nullable=False, default=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint("envelope_id", "status", "event_timestamp", name="uq_docusign_events_envelope_status_timestamp"),
+        db.Index("ix_docusign_events_pending", "id",
+                 postgresql_where=db.text("processed_at IS NULL"), sqlite_where=db.text("processed_at IS NULL")),
+    )
+
+# Searched columns of each entity, same order as their search_indexes()
+SEARCH_COLUMNS = {
+    "clients": (Clients.nom, Clients.prenom, Clients.ville, Clients.email),
+    "articles": (Articles.nom, Articles.description),
+    "devis": (Devis.titre, Devis.description),
+}
+
+# Eager loaded queries, DevisSchema/ArticlesSchema walk these relations for every row
+# so they are loaded up front in a fixed number of queries instead of lazily (N+1).
+# The devis lines carry their article snapshot, articles and taux_tva are not read.
+# The VAT rate of the articles is read from the refdata cache (serializers.py).
+def devis_with_relations():
+    return Devis.query.options(
+        joinedload(Devis.client),
+        selectinload(Devis.articles),
+    )
+
+def articles_with_relations():
+    return Articles.query
 
 # Marshmallow Schema to strucuture the JSON response
 class UserSchema(ma.SQLAlchemyAutoSchema):
@@ -90,8 +219,17 @@ class ArticlesSchema(ma.SQLAlchemyAutoSchema):
         model = Articles
         load_instance = True
 
+# The article of a devis line, from its snapshot: same shape as ArticlesSchema for the fields the lines use
+def line_article(line):
+    return {
+        "id": line.article_id,
+        "nom": line.nom,
+        "prix_vente_HT": line.prix_vente_HT,
+        "taux_tva": {"taux": line.taux_tva},
+    }
+
 class DevisArticlesSchema(ma.SQLAlchemyAutoSchema):
-    article = ma.Nested('ArticlesSchema')
+    article = ma.Function(line_article)
     
     class Meta:
         model = DevisArticles
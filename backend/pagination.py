@@ -0,0 +1,126 @@
+from flask import request
+from serializers import encode_page, json_response
+from sqlalchemy import or_, and_, Date
+from datetime import datetime
+import base64, json
+
+# Pagination par curseur (keyset) partagée par toutes les routes de liste.
+# ?limit=50&cursor=<next_cursor>&sort=-date&fields=id,titre&<filtres>
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+class PaginationError(ValueError):
+    pass
+
+# Common filter builders, each returns a function (query, raw_value) -> query
+def equals_filter(column, cast=str):
+    def apply(query, value):
+        return query.filter(column == cast(value))
+    return apply
+
+def boolean_filter(column):
+    def apply(query, value):
+        if value.lower() not in ("true", "false", "1", "0"):
+            raise PaginationError(f"Valeur booléenne invalide: {value}")
+        return query.filter(column == (value.lower() in ("true", "1")))
+    return apply
+
+def date_filter(column, operator):
+    def apply(query, value):
+        date = datetime.strptime(value, "%Y-%m-%d").date()
+        return query.filter(column >= date if operator == ">=" else column <= date)
+    return apply
+
+def search_filter(*columns):
+    def apply(query, value):
+        pattern = f"%{value}%"
+        return query.filter(or_(*[column.ilike(pattern) for column in columns]))
+    return apply
+
+def _encode_cursor(values):
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor, sort_column):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if value is not None and isinstance(sort_column.type, Date):
+            value = datetime.strptime(value, "%Y-%m-%d").date()
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise PaginationError("Curseur invalide.")
+
+# Parse ?fields=a,b,c into a tuple usable as marshmallow `only`
+def requested_fields():
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    return tuple(f.strip() for f in fields.split(",") if f.strip())
+
+# Apply the filters given in the query string, to a Query or a select()
+def apply_filters(query, filters):
+    for name, apply in filters.items():
+        value = request.args.get(name)
+        if value not in (None, ""):
+            try:
+                query = apply(query, value)
+            except ValueError as e:
+                raise PaginationError(f"Filtre {name} invalide: {e}")
+    return query
+
+# Apply filters, sort and keyset cursor from the query string
+# Returns (items, meta) where meta holds next_cursor/has_more/limit
+def paginate(query, model, filters=None, sortable=("id",)):
+    args = request.args
+    filters = filters or {}
+
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise PaginationError("Paramètre limit invalide.")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    query = apply_filters(query, filters)
+
+    sort = args.get("sort", "id")
+    descending = sort.startswith("-")
+    sort_name = sort.lstrip("-")
+    if sort_name not in sortable:
+        raise PaginationError(f"Tri impossible sur {sort_name}.")
+    sort_column = getattr(model, sort_name)
+    id_column = model.id
+    by_id = sort_name == "id"
+
+    cursor = args.get("cursor")
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_column)
+        if by_id:
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            query = query.filter(or_(sort_column < value, and_(sort_column == value, id_column < last_id)))
+        else:
+            query = query.filter(or_(sort_column > value, and_(sort_column == value, id_column > last_id)))
+
+    if by_id:
+        query = query.order_by(id_column.desc() if descending else id_column)
+    else:
+        query = query.order_by(sort_column.desc() if descending else sort_column, id_column.desc() if descending else id_column)
+
+    items = query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = _encode_cursor([getattr(last, sort_name), last.id])
+
+    return items, {"next_cursor": next_cursor, "has_more": has_more, "limit": limit}
+
+# Dump a page with the requested sparse fieldset
+def paginated_response(serializer, items, meta):
+    try:
+        body = encode_page(serializer, items, meta, requested_fields())
+    except ValueError as e:
+        raise PaginationError(f"Champs invalides: {e}")
+    return json_response(body)
@@ -0,0 +1,69 @@
+from config import ApplicationConfig
+from metrics import PASSWORD_HASH_SECONDS
+from concurrent.futures import ThreadPoolExecutor
+import os, threading, time
+import bcrypt
+
+# Hachage des mots de passe (bcrypt) hors du thread de la requête.
+# bcrypt relâche le GIL : un pool de PASSWORD_HASH_THREADS threads par process calcule les hachages
+# sur plusieurs cœurs en parallèle et borne le CPU pris aux autres requêtes pendant les pics de connexion.
+# Sous gevent, le pool de threads natifs du hub est utilisé : un hachage dans un greenlet bloquerait
+# tout le worker.
+# Coût : BCRYPT_LOG_ROUNDS. Un hachage d'un autre coût est refait à la connexion suivante.
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # A pool created before a fork (gunicorn --preload) has no threads in the worker
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=ApplicationConfig.PASSWORD_HASH_THREADS, thread_name_prefix="bcrypt")
+            _executor_pid = os.getpid()
+    return _executor
+
+def _gevent_threadpool():
+    try:
+        from gevent import monkey, get_hub
+    except ImportError:
+        return None
+    return get_hub().threadpool if monkey.is_module_patched("threading") else None
+
+def _run(operation, fn, *args):
+    start = time.perf_counter()
+    try:
+        threadpool = _gevent_threadpool()
+        if threadpool is not None:
+            return threadpool.apply(fn, args)
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _cost(hashed):
+    # $2b$12$<salt+hash>
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def _check(hashed, password, rounds):
+    try:
+        valid = bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except ValueError:
+        # Malformed hash, or a password over bcrypt's 72 bytes that could never have been stored
+        return False, None
+    if valid and _cost(hashed) != rounds:
+        return True, _hash(password, rounds)
+    return valid, None
+
+def hash_password(password):
+    return _run("hash", _hash, password, ApplicationConfig.BCRYPT_LOG_ROUNDS)
+
+# (valid, new_hash): new_hash is set when the stored hash doesn't use BCRYPT_LOG_ROUNDS and must be saved
+def check_password(hashed, password):
+    return _run("check", _check, hashed, password, ApplicationConfig.BCRYPT_LOG_ROUNDS)
@@ -0,0 +1,96 @@
+from config import ApplicationConfig
+import hashlib, json, logging, os, time
+import redis
+
+# Cache des PDF de devis, adressé par le contenu.
+# La clé est un hash des données du devis + de la version du template et des assets,
+# donc un devis modifié ne peut jamais resservir un ancien PDF.
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf")
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+BLOB_PREFIX = "pdf:blob:"
+DEVIS_PREFIX = "pdf:devis:"
+LRU_KEY = "pdf:lru"
+SIZES_KEY = "pdf:sizes"
+TOTAL_BYTES_KEY = "pdf:bytes"
+
+# Hash of the template and every asset it loads (css, logo...)
+def _assets_version():
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(PDF_DIR)):
+        with open(os.path.join(PDF_DIR, name), "rb") as f:
+            digest.update(name.encode("utf-8"))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+ASSETS_VERSION = _assets_version()
+
+# Build the cache key (also used as ETag) from the dumped devis
+def pdf_cache_key(devis_data):
+    payload = json.dumps(devis_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{ASSETS_VERSION}:{payload}".encode("utf-8")).hexdigest()
+
+# Get a cached PDF, returns None on miss
+def get_pdf(key):
+    try:
+        pdf = redis_client.get(BLOB_PREFIX + key)
+        if pdf is not None:
+            redis_client.zadd(LRU_KEY, {key: time.time()}, xx=True)
+        return pdf
+    except redis.RedisError as e:
+        logging.warning(f"Cache PDF indisponible (lecture): {e}")
+        return None
+
+# Store a rendered PDF and evict the least recently used ones if needed
+def store_pdf(key, pdf, devis_id):
+    try:
+        pipe = redis_client.pipeline()
+        pipe.set(BLOB_PREFIX + key, pdf)
+        pipe.zadd(LRU_KEY, {key: time.time()})
+        pipe.hsetnx(SIZES_KEY, key, len(pdf))
+        pipe.sadd(f"{DEVIS_PREFIX}{devis_id}", key)
+        is_new = pipe.execute()[2]
+        if is_new:
+            redis_client.incrby(TOTAL_BYTES_KEY, len(pdf))
+        _evict()
+    except redis.RedisError as e:
+        logging.warning(f"Cache PDF indisponible (écriture): {e}")
+
+def _delete_keys(keys):
+    keys = [k.decode() if isinstance(k, bytes) else k for k in keys]
+    if not keys:
+        return
+    sizes = redis_client.hmget(SIZES_KEY, keys)
+    pipe = redis_client.pipeline()
+    pipe.delete(*[BLOB_PREFIX + k for k in keys])
+    pipe.zrem(LRU_KEY, *keys)
+    pipe.hdel(SIZES_KEY, *keys)
+    freed = sum(int(s) for s in sizes if s is not None)
+    if freed:
+        pipe.decrby(TOTAL_BYTES_KEY, freed)
+    pipe.execute()
+
+def _evict():
+    max_entries = ApplicationConfig.PDF_CACHE_MAX_ENTRIES
+    max_bytes = ApplicationConfig.PDF_CACHE_MAX_BYTES
+    while True:
+        entries = redis_client.zcard(LRU_KEY)
+        total_bytes = int(redis_client.get(TOTAL_BYTES_KEY) or 0)
+        if entries <= max_entries and total_bytes <= max_bytes:
+            return
+        oldest = redis_client.zrange(LRU_KEY, 0, max(entries - max_entries, 1) - 1)
+        if not oldest:
+            return
+        _delete_keys(oldest)
+
+# Drop every cached PDF of a devis (called when the devis is modified or deleted)
+def invalidate_devis_pdf(devis_id):
+    try:
+        devis_key = f"{DEVIS_PREFIX}{devis_id}"
+        keys = redis_client.smembers(devis_key)
+        _delete_keys(keys)
+        redis_client.delete(devis_key)
+    except redis.RedisError as e:
+        logging.warning(f"Cache PDF indisponible (invalidation): {e}")
@@ -0,0 +1,145 @@
+from config import ApplicationConfig
+import time, uuid
+
+# File d'attente Redis pour le rendu des PDF.
+# Les routes y déposent le HTML déjà rendu, les process de pdf_worker.py font le WeasyPrint.
+# Un worker déplace le job pris dans sa liste pdf:processing:<worker> (BLMOVE) et l'en retire une fois
+# le job terminé. Si le worker meurt pendant le rendu (SIGKILL, OOM), son heartbeat expire et les
+# autres workers remettent ses jobs en tête de file (requeue_orphaned_jobs).
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+QUEUE_KEY = "pdf:queue"
+JOB_PREFIX = "pdf:job:"
+PENDING_PREFIX = "pdf:pending:"
+STATS_KEY = "pdf:stats"
+WORKERS_KEY = "pdf:workers"
+WORKER_PREFIX = "pdf:worker:"
+PROCESSING_PREFIX = "pdf:processing:"
+
+JOB_TTL = ApplicationConfig.PDF_JOB_TTL
+
+def _job_key(job_id):
+    return f"{JOB_PREFIX}{job_id}"
+
+def _result_key(job_id):
+    return f"{JOB_PREFIX}{job_id}:pdf"
+
+def processing_key(worker_id):
+    return f"{PROCESSING_PREFIX}{worker_id}"
+
+def _decode(data):
+    return {k.decode(): v.decode() for k, v in data.items()}
+
+# Queue a render job, jobs for the same content are shared
+def enqueue_render(cache_key, html, devis_id):
+    pending_key = f"{PENDING_PREFIX}{cache_key}"
+    existing = redis_client.get(pending_key)
+    if existing:
+        job_id = existing.decode()
+        if get_job(job_id).get("status") in ("queued", "running"):
+            return job_id
+
+    job_id = uuid.uuid4().hex
+    pipe = redis_client.pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "status": "queued",
+        "cache_key": cache_key,
+        "devis_id": devis_id,
+        "html": html,
+        "enqueued_at": time.time(),
+    })
+    pipe.expire(_job_key(job_id), JOB_TTL)
+    pipe.set(pending_key, job_id, ex=JOB_TTL)
+    pipe.lpush(QUEUE_KEY, job_id)
+    pipe.execute()
+    return job_id
+
+# Put the jobs of the workers whose heartbeat expired back at the head of the queue, returns their ids
+def requeue_orphaned_jobs():
+    requeued = []
+    for worker_id in [w.decode() for w in redis_client.smembers(WORKERS_KEY)]:
+        if redis_client.exists(f"{WORKER_PREFIX}{worker_id}"):
+            continue
+        processing = processing_key(worker_id)
+        while (job_id := redis_client.lindex(processing, -1)) is not None:
+            job_id = job_id.decode()
+            # Back to queued first: render_job skips the jobs that are not queued
+            if redis_client.hget(_job_key(job_id), "status") == b"running":
+                redis_client.hset(_job_key(job_id), "status", "queued")
+            # BRPOP/BLMOVE take from the right: the job is the next one rendered
+            if redis_client.lmove(processing, QUEUE_KEY, "RIGHT", "RIGHT") is not None:
+                requeued.append(job_id)
+        redis_client.srem(WORKERS_KEY, worker_id)
+    return requeued
+
+# Record a job whose PDF is already in the cache
+def completed_job(cache_key, devis_id):
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    pipe = redis_client.pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "status": "done",
+        "cache_key": cache_key,
+        "devis_id": devis_id,
+        "enqueued_at": now,
+        "finished_at": now,
+    })
+    pipe.expire(_job_key(job_id), JOB_TTL)
+    pipe.execute()
+    return job_id
+
+# Get the job info (without the HTML), empty dict if unknown
+def get_job(job_id):
+    job = _decode(redis_client.hgetall(_job_key(job_id)))
+    job.pop("html", None)
+    return job
+
+def get_job_pdf(job_id):
+    return redis_client.get(_result_key(job_id))
+
+# Block until the job is done or failed, returns None on timeout
+def wait_for_job(job_id, timeout):
+    deadline = time.monotonic() + timeout
+    delay = 0.02
+    while True:
+        job = get_job(job_id)
+        if job.get("status") in ("done", "failed") or not job:
+            return job
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
+
+# Queue depth, render time and worker utilisation
+def get_render_stats():
+    stats = _decode(redis_client.hgetall(STATS_KEY))
+    rendered = int(stats.get("rendered", 0))
+    render_seconds = float(stats.get("render_seconds", 0))
+
+    workers = []
+    now = time.time()
+    for worker_id in sorted(w.decode() for w in redis_client.smembers(WORKERS_KEY)):
+        worker = _decode(redis_client.hgetall(f"{WORKER_PREFIX}{worker_id}"))
+        if not worker:
+            # Heartbeat expired, the worker is gone (removed by requeue_orphaned_jobs with its jobs)
+            continue
+        uptime = max(now - float(worker["started_at"]), 1e-6)
+        workers.append({
+            "id": worker_id,
+            "state": worker.get("state"),
+            "current_job": worker.get("current_job") or None,
+            "rendered": int(worker.get("rendered", 0)),
+            "utilisation": round(float(worker.get("busy_seconds", 0)) / uptime, 4),
+        })
+
+    return {
+        "queue_depth": redis_client.llen(QUEUE_KEY),
+        "rendered": rendered,
+        "failed": int(stats.get("failed", 0)),
+        "render_seconds_avg": round(render_seconds / rendered, 4) if rendered else None,
+        "render_seconds_max": float(stats["render_seconds_max"]) if "render_seconds_max" in stats else None,
+        "workers": workers,
+        "busy_workers": sum(1 for w in workers if w["state"] == "busy"),
+        "utilisation": round(sum(w["utilisation"] for w in workers) / len(workers), 4) if workers else None,
+    }
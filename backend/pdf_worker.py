@@ -0,0 +1,135 @@
+from config import ApplicationConfig
+from pdf_cache import PDF_DIR, store_pdf
+from metrics import PDF_RENDER_SECONDS
+from pdf_queue import redis_client, QUEUE_KEY, JOB_PREFIX, PENDING_PREFIX, STATS_KEY, WORKERS_KEY, WORKER_PREFIX, JOB_TTL, processing_key, requeue_orphaned_jobs
+import argparse, logging, multiprocessing, os, signal, socket, threading, time
+
+# Worker de rendu des PDF : python pdf_worker.py [--processes N]
+# Chaque process consomme la file Redis et lance WeasyPrint hors des workers gunicorn.
+
+HEARTBEAT_TTL = 30
+
+stop_requested = False
+
+def _request_stop(signum, frame):
+    global stop_requested
+    stop_requested = True
+
+def _update_max_render_time(duration):
+    current = redis_client.hget(STATS_KEY, "render_seconds_max")
+    if current is None or float(current) < duration:
+        redis_client.hset(STATS_KEY, "render_seconds_max", duration)
+
+def render_job(job_id, HTML):
+    job_key = f"{JOB_PREFIX}{job_id}"
+    job = {k.decode(): v.decode() for k, v in redis_client.hgetall(job_key).items()}
+    if job.get("status") != "queued":
+        # Job expired or already handled
+        return None
+
+    redis_client.hset(job_key, mapping={"status": "running", "started_at": time.time()})
+    start = time.perf_counter()
+    try:
+        pdf = HTML(string=job["html"], base_url=PDF_DIR + "/").write_pdf()
+    except Exception as e:
+        duration = time.perf_counter() - start
+        PDF_RENDER_SECONDS.observe(duration, status="failed")
+        logging.exception(f"Erreur lors du rendu du PDF (job {job_id}, devis {job.get('devis_id')})")
+        pipe = redis_client.pipeline()
+        pipe.hset(job_key, mapping={"status": "failed", "error": str(e), "finished_at": time.time()})
+        pipe.hdel(job_key, "html")
+        pipe.delete(f"{PENDING_PREFIX}{job['cache_key']}")
+        pipe.hincrby(STATS_KEY, "failed", 1)
+        pipe.execute()
+        return duration
+
+    duration = time.perf_counter() - start
+    PDF_RENDER_SECONDS.observe(duration, status="done")
+    store_pdf(job["cache_key"], pdf, job["devis_id"])
+    pipe = redis_client.pipeline()
+    pipe.set(f"{job_key}:pdf", pdf, ex=JOB_TTL)
+    pipe.hset(job_key, mapping={"status": "done", "render_seconds": duration, "finished_at": time.time()})
+    pipe.hdel(job_key, "html")
+    pipe.delete(f"{PENDING_PREFIX}{job['cache_key']}")
+    pipe.hincrby(STATS_KEY, "rendered", 1)
+    pipe.hincrbyfloat(STATS_KEY, "render_seconds", duration)
+    pipe.execute()
+    _update_max_render_time(duration)
+    logging.info(f"PDF du devis {job['devis_id']} rendu en {duration:.3f}s (job {job_id})")
+    return duration
+
+# Refreshed by a thread: the heartbeat stays alive during a long render and stops with the process
+def _heartbeat(worker_key):
+    while not stop_requested:
+        redis_client.expire(worker_key, HEARTBEAT_TTL)
+        time.sleep(HEARTBEAT_TTL / 3)
+
+def _requeue_orphaned_jobs():
+    for job_id in requeue_orphaned_jobs():
+        logging.warning(f"Job PDF {job_id} d'un worker arrêté remis en file")
+
+def run_worker(worker_id):
+    # Import here so the parent process never loads WeasyPrint
+    from weasyprint import HTML
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    worker_key = f"{WORKER_PREFIX}{worker_id}"
+    redis_client.hset(worker_key, mapping={"started_at": time.time(), "busy_seconds": 0, "rendered": 0, "state": "idle", "current_job": ""})
+    redis_client.expire(worker_key, HEARTBEAT_TTL)
+    redis_client.sadd(WORKERS_KEY, worker_id)
+    threading.Thread(target=_heartbeat, args=(worker_key,), name="pdf-heartbeat", daemon=True).start()
+    logging.info(f"Worker PDF {worker_id} démarré")
+
+    processing = processing_key(worker_id)
+    last_requeue = 0
+    while not stop_requested:
+        if time.monotonic() - last_requeue >= HEARTBEAT_TTL:
+            _requeue_orphaned_jobs()
+            last_requeue = time.monotonic()
+        item = redis_client.blmove(QUEUE_KEY, processing, 5, "RIGHT", "LEFT")
+        if item is None:
+            continue
+
+        job_id = item.decode()
+        redis_client.hset(worker_key, mapping={"state": "busy", "current_job": job_id})
+        duration = None
+        try:
+            duration = render_job(job_id, HTML)
+        finally:
+            pipe = redis_client.pipeline()
+            if duration is not None:
+                pipe.hincrbyfloat(worker_key, "busy_seconds", duration)
+                pipe.hincrby(worker_key, "rendered", 1)
+            pipe.hset(worker_key, mapping={"state": "idle", "current_job": ""})
+            pipe.lrem(processing, 1, job_id)
+            pipe.execute()
+
+    redis_client.delete(worker_key)
+    redis_client.srem(WORKERS_KEY, worker_id)
+    logging.info(f"Worker PDF {worker_id} arrêté")
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de rendu des PDF de devis")
+    parser.add_argument("--processes", type=int, default=ApplicationConfig.PDF_WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = [multiprocessing.Process(target=run_worker, args=(f"{prefix}-{i}",)) for i in range(max(args.processes, 1))]
+    for process in processes:
+        process.start()
+
+    def _stop_children(signum, frame):
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, _stop_children)
+    signal.signal(signal.SIGINT, _stop_children)
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+from models import db, Devis, DevisArticles, Articles
+from decimal import Decimal, ROUND_HALF_UP
+import refdata
+
+# Calcul des montants des devis en décimal exact.
+# Ligne : HT = prix_vente_HT x quantité et TVA = HT x taux, arrondis au centime ; TTC = HT + TVA.
+# Devis : somme des lignes arrondies, comme sur le devis imprimé.
+# Les taux de TVA viennent du cache refdata, sans jointure sur taux_tva.
+# Les lignes gardent le nom, le prix et le taux de l'article au moment du devis (DevisArticles),
+# seuls les devis brouillons suivent ensuite les changements des articles.
+
+CENT = Decimal("0.01")
+
+# Devis whose amounts follow the article prices, signed/sent ones keep theirs
+DRAFT_STATUTS = ("Non signé",)
+
+UPDATE_BATCH_SIZE = 5000
+
+def to_decimal(value):
+    # str() gives the shortest repr of the float: 19.99 and not 19.989999999999998
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def round_amount(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+def line_totals(prix_vente_HT, taux, quantite):
+    montant_HT = round_amount(to_decimal(prix_vente_HT) * quantite)
+    montant_TVA = round_amount(montant_HT * to_decimal(taux))
+    return montant_HT, montant_TVA, montant_HT + montant_TVA
+
+# [(prix_vente_HT, taux, quantite), ...] -> (montant_HT, montant_TVA, montant_TTC)
+def devis_totals(lines):
+    total_HT = total_TVA = Decimal("0.00")
+    for prix_vente_HT, taux, quantite in lines:
+        montant_HT, montant_TVA, _ = line_totals(prix_vente_HT, taux, quantite)
+        total_HT += montant_HT
+        total_TVA += montant_TVA
+    return total_HT, total_TVA, total_HT + total_TVA
+
+# {article_id: (nom, prix_vente_HT, taux)} in one query, the values copied into the devis lines
+def load_snapshots(article_ids):
+    article_ids = list(article_ids)
+    if not article_ids:
+        return {}
+    return {article_id: (nom, prix, refdata.taux_tva(taux_tva_id)) for article_id, nom, prix, taux_tva_id in db.session.execute(
+        db.select(Articles.id, Articles.nom, Articles.prix_vente_HT, Articles.taux_tva_id)
+        .where(Articles.id.in_(article_ids))
+    )}
+
+# Amounts of a devis as stored in the Float columns, from its (prix_vente_HT, taux, quantite) lines
+def compute_totals(lines):
+    totals = devis_totals(lines)
+    return dict(zip(("montant_HT", "montant_TVA", "montant_TTC"), (float(t) for t in totals)))
+
+# Amounts of new {article_id: quantite} lines priced with load_snapshots()
+def snapshot_totals(lines, snapshots):
+    return compute_totals((*snapshots[article_id][1:], quantite) for article_id, quantite in lines.items())
+
+# Amounts of a devis from its stored lines
+def stored_totals(devis_id):
+    return compute_totals(db.session.execute(
+        db.select(DevisArticles.prix_vente_HT, DevisArticles.taux_tva, DevisArticles.quantite)
+        .where(DevisArticles.devis_id == devis_id)
+    ))
+
+# Refresh the lines of the draft devis using these articles/VAT rates (or these devis) from the
+# current articles, then their amounts. One query streams every line of the affected devis,
+# the totals are accumulated in memory and only the changed lines and devis are written,
+# with executemany UPDATEs. Returns the ids of the updated devis, the caller commits.
+def recompute_devis_totals(article_ids=None, taux_tva_ids=None, devis_ids=None, statuts=DRAFT_STATUTS):
+    affected = db.select(DevisArticles.devis_id)
+    if article_ids is not None:
+        affected = affected.where(DevisArticles.article_id.in_(list(article_ids)))
+    if taux_tva_ids is not None:
+        affected = affected.join(Articles, Articles.id == DevisArticles.article_id) \
+            .where(Articles.taux_tva_id.in_(list(taux_tva_ids)))
+    if devis_ids is not None:
+        affected = affected.where(DevisArticles.devis_id.in_(list(devis_ids)))
+
+    lines = db.session.execute(
+        db.select(Devis.id, Devis.montant_HT, Devis.montant_TVA, Devis.montant_TTC,
+                  DevisArticles.id, DevisArticles.nom, DevisArticles.prix_vente_HT, DevisArticles.taux_tva,
+                  DevisArticles.quantite, Articles.nom, Articles.prix_vente_HT, Articles.taux_tva_id)
+        .join(DevisArticles, DevisArticles.devis_id == Devis.id)
+        .join(Articles, Articles.id == DevisArticles.article_id)
+        .where(Devis.statut.in_(statuts), Devis.id.in_(affected.scalar_subquery()))
+        .execution_options(yield_per=UPDATE_BATCH_SIZE)
+    )
+
+    totals, stored, line_changes, changed = {}, {}, [], set()
+    for devis_id, stored_HT, stored_TVA, stored_TTC, line_id, line_nom, line_prix, line_taux, quantite, nom, prix_vente_HT, taux_tva_id in lines:
+        taux = refdata.taux_tva(taux_tva_id)
+        if (line_nom, line_prix, line_taux) != (nom, prix_vente_HT, taux):
+            line_changes.append({"id": line_id, "nom": nom, "prix_vente_HT": prix_vente_HT, "taux_tva": taux})
+            changed.add(devis_id)
+        montant_HT, montant_TVA, _ = line_totals(prix_vente_HT, taux, quantite)
+        current = totals.get(devis_id)
+        totals[devis_id] = (current[0] + montant_HT, current[1] + montant_TVA) if current else (montant_HT, montant_TVA)
+        stored[devis_id] = (stored_HT, stored_TVA, stored_TTC)
+
+    changes = []
+    for devis_id, (montant_HT, montant_TVA) in totals.items():
+        values = (float(montant_HT), float(montant_TVA), float(montant_HT + montant_TVA))
+        if values != stored[devis_id]:
+            changes.append({"id": devis_id, "montant_HT": values[0], "montant_TVA": values[1], "montant_TTC": values[2]})
+            changed.add(devis_id)
+
+    for rows, model in ((line_changes, DevisArticles), (changes, Devis)):
+        for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+            db.session.execute(db.update(model), rows[start:start + UPDATE_BATCH_SIZE])
+    return sorted(changed)
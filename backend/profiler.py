@@ -0,0 +1,194 @@
+from flask import g, request, session, has_request_context
+from config import ApplicationConfig
+from current_user import current_user_info
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+import json, logging, os, random, sys, threading, time, uuid
+import redis
+
+# Profilage à la demande des requêtes lentes.
+# Un thread échantillonne la pile des requêtes profilées (sys._current_frames) et les requêtes SQL
+# exécutées sont notées avec leur durée. Les N dernières traces sont gardées dans une liste Redis
+# (GET /api/admin/profiles).
+# Activation : en-tête "X-Profile: 1" envoyé par un administrateur, ou une part PROFILER_SAMPLE_RATE
+# des requêtes si PROFILER_SLOW_THRESHOLD_MS > 0 (seules celles au-dessus du seuil sont gardées).
+# Une requête profilée paie l'échantillonnage de toutes les piles du process, les autres ne coûtent
+# qu'un test par requête et par requête SQL.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+TRACES_KEY = "profiler:traces"
+PROFILE_HEADER = "X-Profile"
+MAX_STACK_DEPTH = 64
+MAX_STACKS = 200
+MAX_STATEMENT_LENGTH = 2000
+
+# Requests being profiled, thread id -> Profile
+_active = {}
+_active_lock = threading.Lock()
+_wakeup = threading.Event()
+_sampler = None
+
+class Profile:
+    def __init__(self, reason):
+        self.reason = reason
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.samples = Counter()
+        self.sample_count = 0
+        self.statements = []
+        self.sql_seconds = 0.0
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+# Folded stack, root first: "app.py:wsgi_app:1511;devis.py:get_every_devis:48;..."
+def _folded_stack(frame):
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def _sample_loop(interval):
+    while True:
+        _wakeup.wait()
+        frames = sys._current_frames()
+        with _active_lock:
+            profiles = list(_active.items())
+            if not profiles:
+                _wakeup.clear()
+        for thread_id, profile in profiles:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                profile.samples[_folded_stack(frame)] += 1
+                profile.sample_count += 1
+        del frames
+        time.sleep(interval)
+
+def _start_sampler(interval):
+    global _sampler
+    with _active_lock:
+        # After a fork (gunicorn --preload) the parent's thread is gone
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample_loop, args=(interval,), name="profiler-sampler", daemon=True)
+            _sampler.start()
+
+def _begin(reason, interval):
+    _start_sampler(interval)
+    profile = Profile(reason)
+    with _active_lock:
+        _active[threading.get_ident()] = profile
+    _wakeup.set()
+    return profile
+
+def _end():
+    with _active_lock:
+        return _active.pop(threading.get_ident(), None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active and has_request_context() and g.get("profile") is not None:
+        conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not _active or not conn.info.get("profiler_query_start"):
+        return
+    duration = time.perf_counter() - conn.info["profiler_query_start"].pop()
+    profile = g.get("profile") if has_request_context() else None
+    if profile is not None:
+        profile.sql_seconds += duration
+        if len(profile.statements) < ApplicationConfig.PROFILER_MAX_STATEMENTS:
+            profile.statements.append({
+                "statement": statement[:MAX_STATEMENT_LENGTH],
+                "executemany": executemany,
+                "duration_ms": round(duration * 1000, 3),
+            })
+
+def _trace(profile, response, duration):
+    return {
+        "id": uuid.uuid4().hex,
+        "reason": profile.reason,
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "route": request.url_rule.rule if request.url_rule else None,
+        "status": response.status_code,
+        "user_id": session.get("user_id"),
+        "started_at": profile.started_at,
+        "duration_ms": round(duration * 1000, 3),
+        "sql_count": len(profile.statements),
+        "sql_ms": round(profile.sql_seconds * 1000, 3),
+        "sql": profile.statements,
+        "sample_interval_ms": ApplicationConfig.PROFILER_INTERVAL_MS,
+        "sample_count": profile.sample_count,
+        "stacks": profile.samples.most_common(MAX_STACKS),
+    }
+
+def _store(trace):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.lpush(TRACES_KEY, json.dumps(trace))
+        pipe.ltrim(TRACES_KEY, 0, ApplicationConfig.PROFILER_MAX_TRACES - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Impossible d'enregistrer la trace du profileur: {e}")
+
+def _wants_profile():
+    if request.headers.get(PROFILE_HEADER) == "1":
+        user = current_user_info()
+        if user is not None and user["role"] == "Administrateur":
+            return "header"
+    # Only a share of the traffic: the others don't pay for the sampler
+    if ApplicationConfig.PROFILER_SLOW_THRESHOLD_MS > 0 and random.random() < ApplicationConfig.PROFILER_SAMPLE_RATE:
+        return "slow"
+    return None
+
+def _before_request():
+    reason = _wants_profile()
+    if reason is not None:
+        g.profile = _begin(reason, ApplicationConfig.PROFILER_INTERVAL_MS / 1000)
+
+def _after_request(response):
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+    _end()
+    duration = time.perf_counter() - profile.start
+    if profile.reason == "header" or duration * 1000 >= ApplicationConfig.PROFILER_SLOW_THRESHOLD_MS:
+        trace = _trace(profile, response, duration)
+        if profile.reason == "header":
+            response.headers["X-Profile-Id"] = trace["id"]
+        response.call_on_close(lambda: _store(trace))
+    return response
+
+def _teardown_request(exc):
+    # No response (unhandled error in a hook): stop sampling the thread anyway
+    if g.pop("profile", None) is not None:
+        _end()
+
+# Stored traces, newest first, without the SQL and stacks
+def list_traces():
+    summaries = []
+    for raw in redis_client.lrange(TRACES_KEY, 0, -1):
+        trace = json.loads(raw)
+        summaries.append({key: value for key, value in trace.items() if key not in ("sql", "stacks")})
+    return summaries
+
+def get_trace(trace_id):
+    for raw in redis_client.lrange(TRACES_KEY, 0, -1):
+        trace = json.loads(raw)
+        if trace["id"] == trace_id:
+            return trace
+    return None
+
+# "stack count" lines, the input of flamegraph.pl / speedscope
+def folded(trace):
+    return "".join(f"{stack} {count}\n" for stack, count in trace["stacks"])
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
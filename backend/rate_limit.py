@@ -0,0 +1,58 @@
+from flask import request, jsonify
+from config import ApplicationConfig
+from metrics import AUTH_RATE_LIMITED
+import logging
+import redis
+
+# Limite de débit des routes d'authentification, tenue dans Redis et donc commune à tous les workers.
+# Chaque tentative est comptée (fenêtre fixe) par IP et par email avant le moindre calcul bcrypt :
+# une attaque par force brute est refusée en 429 sans coûter de CPU.
+# Redis indisponible : les tentatives passent (journalisé), la connexion reste possible.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+KEY_PREFIX = "ratelimit:"
+
+def _key(action, scope, value):
+    return f"{KEY_PREFIX}{action}:{scope}:{value}"
+
+# Client address, the X-Forwarded-For of trusted proxies is applied by ProxyFix (TRUSTED_PROXY_COUNT)
+def client_ip():
+    return request.remote_addr or "unknown"
+
+# Counts one attempt for every (scope, value, limit), returns the seconds to wait (0 = allowed)
+def hit(action, limits, window):
+    limits = [(scope, value, limit) for scope, value, limit in limits if limit > 0]
+    if not limits:
+        return 0
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for scope, value, _ in limits:
+            key = _key(action, scope, value)
+            pipe.set(key, 0, ex=window, nx=True)
+            pipe.incr(key)
+            pipe.ttl(key)
+        results = pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Limite de débit indisponible: {e}")
+        return 0
+
+    retry_after = 0
+    for i, (scope, value, limit) in enumerate(limits):
+        _, count, ttl = results[3 * i:3 * i + 3]
+        if count > limit:
+            AUTH_RATE_LIMITED.inc(action=action, scope=scope)
+            retry_after = max(retry_after, ttl if ttl > 0 else window)
+    return retry_after
+
+def reset(action, scope, value):
+    try:
+        redis_client.delete(_key(action, scope, value))
+    except redis.RedisError as e:
+        logging.warning(f"Limite de débit indisponible: {e}")
+
+def too_many_attempts(retry_after):
+    response = jsonify({"error": f"Trop de tentatives, réessayez dans {retry_after} secondes."})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
@@ -0,0 +1,118 @@
+from config import ApplicationConfig
+from models import db, TauxTVA
+from types import SimpleNamespace
+import logging, os, threading, time
+import redis
+
+# Données de référence en mémoire : petites tables lues partout et presque jamais modifiées (taux de TVA).
+# Chaque process les charge en entier (au démarrage dans app.py, puis à la demande) et les lit sans
+# requête SQL : validation des articles, sérialisation, calcul des montants.
+# Invalidation : invalidate() publie sur le canal Redis CHANNEL, un thread par worker y est abonné et
+# marque le cache périmé, rechargé à la lecture suivante. Une modification faite hors de l'application
+# (SQL, migration) se propage avec `flask refdata-reload`.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+CHANNEL = "refdata:invalidate"
+RECONNECT_DELAY = 5
+
+# Cached tables, name -> model. Every column is copied, the rows must stay small and few.
+TABLES = {
+    "taux_tva": TauxTVA,
+}
+
+# table -> {id: row}, rows are plain namespaces: detached from the session, never written back
+_rows = {}
+_lock = threading.Lock()
+_stale = threading.Event()
+_stale.set()
+_listener = None
+_listener_pid = None
+
+def _row(obj, columns):
+    return SimpleNamespace(**{c: getattr(obj, c) for c in columns})
+
+# Reads every cached table, needs an app context
+def load():
+    with _lock:
+        # Cleared before the queries: an invalidation received while they run reloads again
+        _stale.clear()
+    rows = {}
+    try:
+        for table, model in TABLES.items():
+            columns = [c.key for c in model.__table__.columns]
+            rows[table] = {obj.id: _row(obj, columns) for obj in db.session.execute(db.select(model)).scalars()}
+    except Exception:
+        # Not loaded: the next read tries again
+        _stale.set()
+        raise
+    with _lock:
+        _rows.update(rows)
+    logging.info(f"Données de référence chargées: {', '.join(f'{t} ({len(r)})' for t, r in rows.items())}")
+
+def _listen():
+    while True:
+        try:
+            pubsub = redis_client.pubsub()
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                # The subscription confirmation too: invalidations sent before it were missed
+                _stale.set()
+        except redis.RedisError as e:
+            # Reloaded by the next subscription confirmation
+            logging.warning(f"Invalidation des données de référence indisponible: {e}")
+            time.sleep(RECONNECT_DELAY)
+
+def _ensure_listener():
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _lock:
+        # Started in each worker, the master's thread doesn't survive the fork (gunicorn --preload)
+        if _listener_pid != os.getpid():
+            _listener = threading.Thread(target=_listen, name="refdata-listener", daemon=True)
+            _listener.start()
+            _listener_pid = os.getpid()
+
+def rows(table):
+    _ensure_listener()
+    if _stale.is_set():
+        load()
+    return _rows[table]
+
+def get(table, row_id):
+    row = rows(table).get(row_id)
+    if row is None and row_id is not None:
+        # The ids come from foreign keys: a missing one was added behind the cache's back
+        load()
+        row = _rows[table].get(row_id)
+    return row
+
+# Id of a VAT rate from its value ("0.2", 0.20), None if it doesn't exist
+def taux_tva_id(taux):
+    try:
+        taux = float(taux)
+    except (TypeError, ValueError):
+        return None
+    for row in rows("taux_tva").values():
+        if row.taux == taux:
+            return row.id
+    return None
+
+def taux_tva(row_id):
+    row = get("taux_tva", row_id)
+    return row.taux if row is not None else None
+
+# Called after a commit writing to a cached table: every worker reloads on its next read
+def invalidate():
+    _stale.set()
+    try:
+        redis_client.publish(CHANNEL, "1")
+    except redis.RedisError as e:
+        logging.warning(f"Invalidation des données de référence indisponible: {e}")
+
+def init_app(app):
+    @app.cli.command("refdata-reload")
+    def reload_command():
+        """Recharge les données de référence dans tous les workers."""
+        invalidate()
@@ -0,0 +1,96 @@
+from flask import request, current_app, make_response
+from config import ApplicationConfig
+from metrics import RESPONSE_CACHE_REQUESTS
+from functools import wraps
+import hashlib, logging, uuid
+import redis
+
+# Cache des réponses JSON des routes de lecture, dans Redis.
+# Chaque table, et chaque ligne, a un numéro de version incrémenté par les routes d'écriture (invalidate).
+# La clé d'une réponse contient les versions dont elle dépend : après une écriture, les anciennes réponses
+# ne sont plus jamais lues et expirent d'elles-mêmes (RESPONSE_CACHE_TTL).
+# Le hash de la clé sert aussi d'ETag : If-None-Match -> 304 sans lire le cache ni la base.
+
+redis_client = ApplicationConfig.SESSION_REDIS
+
+VERSION_PREFIX = "cache:version:"
+RESPONSE_PREFIX = "cache:response:"
+# Random value renewed if Redis loses its data: the versions restart at 0 but the old ETags stay invalid
+EPOCH_KEY = "cache:epoch"
+
+def _version_key(table, entity_id=None):
+    return f"{VERSION_PREFIX}{table}" if entity_id is None else f"{VERSION_PREFIX}{table}:{entity_id}"
+
+def _versions(keys):
+    values = redis_client.mget([EPOCH_KEY] + keys)
+    if values[0] is None:
+        redis_client.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+        values = redis_client.mget([EPOCH_KEY] + keys)
+    return [v.decode() if v is not None else "0" for v in values]
+
+def _digest(versions):
+    args = sorted(request.args.items(multi=True))
+    raw = f"{request.endpoint}|{request.path}|{args}|{versions}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _cached_response(body, etag):
+    response = current_app.response_class(body, mimetype="application/json")
+    return _with_etag(response, etag)
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    # The browser keeps the body but asks again every time, with If-None-Match
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+# Caches the 200 JSON responses of a read route.
+# tables: tables whose every write changes the response, entity: (table, view argument) of the row it shows
+def cached(tables=(), entity=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            ttl = ApplicationConfig.RESPONSE_CACHE_TTL
+            if not ttl:
+                return f(*args, **kwargs)
+            route = request.url_rule.rule
+            keys = [_version_key(table) for table in tables]
+            if entity is not None:
+                keys.append(_version_key(entity[0], kwargs[entity[1]]))
+            try:
+                digest = _digest(_versions(keys))
+                etag = digest[:32]
+                if request.if_none_match.contains(etag):
+                    RESPONSE_CACHE_REQUESTS.inc(route=route, result="not_modified")
+                    return _with_etag(make_response("", 304), etag)
+                body = redis_client.get(RESPONSE_PREFIX + digest)
+            except redis.RedisError as e:
+                logging.warning(f"Cache des réponses indisponible (lecture): {e}")
+                RESPONSE_CACHE_REQUESTS.inc(route=route, result="error")
+                return f(*args, **kwargs)
+            if body is not None:
+                RESPONSE_CACHE_REQUESTS.inc(route=route, result="hit")
+                return _cached_response(body, etag)
+
+            RESPONSE_CACHE_REQUESTS.inc(route=route, result="miss")
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.mimetype != "application/json":
+                return response
+            try:
+                redis_client.set(RESPONSE_PREFIX + digest, response.get_data(), ex=ttl)
+            except redis.RedisError as e:
+                logging.warning(f"Cache des réponses indisponible (écriture): {e}")
+                return response
+            return _with_etag(response, etag)
+        return decorated_function
+    return decorator
+
+# Called after a commit writing to a table: the lists of the table and the given rows change version
+def invalidate(table, *entity_ids):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(_version_key(table))
+        for entity_id in entity_ids:
+            pipe.incr(_version_key(table, entity_id))
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Cache des réponses indisponible (invalidation): {e}")
@@ -1,38 +1,46 @@
-from flask import Blueprint, request, jsonify, session
-from flask_bcrypt import Bcrypt
-from models import db, User, UserSchema
+from flask import Blueprint, request, jsonify, session, Response
+from models import db, User
+from serializers import users_serializer
+from current_user import current_user_info, invalidate_user
+from profiler import list_traces, get_trace, folded
+from passwords import hash_password
 from functools import wraps
 import logging
+import redis
 from utils import validate_user_fields
+from pagination import paginate, paginated_response, PaginationError, equals_filter, search_filter
 
 # Create a Blueprint for admin-related routes
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/api/admin')
 
-bcrypt = Bcrypt()
-
 # Admin role required decorator           
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get("user_id")
-        if not user_id:
+        user = current_user_info()
+        if not user:
             return jsonify({"error": "Unauthorized"}), 401
         
-        user = User.query.filter_by(id=user_id).first()
-        if user.role != 'Administrateur':
+        if user["role"] != 'Administrateur':
             return jsonify({"error": "Forbidden"}), 403
         
         return f(*args, **kwargs)
     return decorated_function
   
-  # Get all users info route
+USERS_FILTERS = {
+    "role": equals_filter(User.role),
+    "q": search_filter(User.nom, User.prenom, User.email),
+}
+
+# Get all users info route
 @admin_bp.route("/all-user", methods=['GET'])
 @admin_required
 def get_all_users():
-    users = User.query.all()
-    user_schema = UserSchema(many=True)
-    user_data = user_schema.dump(users)
-    return jsonify(data=user_data)
+    try:
+        users, meta = paginate(User.query, User, USERS_FILTERS, ("id", "nom"))
+        return paginated_response(users_serializer, users, meta)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 # Add new user route
 @admin_bp.route("/create-user", methods=["POST"])
@@ -55,7 +63,7 @@ def add_user():
         return jsonify({"error": error}), 400
     
     # Création du nouvel utilisateur du mot de passe.
-    hashed_password = bcrypt.generate_password_hash(mdp).decode('utf-8')
+    hashed_password = hash_password(mdp)
     new_user = User(email=email,prenom=prenom,nom=nom,mdp=hashed_password,role=role)
     db.session.add(new_user)
     db.session.commit()
@@ -106,10 +114,11 @@ def modify_user(user_id):
     user.role = new_role
     
     if new_password:
-        new_hashed_password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        new_hashed_password = hash_password(new_password)
         user.mdp = new_hashed_password
     
     db.session.commit()
+    invalidate_user(user.id)
     logging.info(f"Admin {session.get('user_id')} a modifié l'utilisateur: {user.email} (id: {user.id}, rôle: {user.role})")
     
     return jsonify({
@@ -137,6 +146,7 @@ def delete_user(user_id):
     user_email = user.email
     User.query.filter_by(id=user_id).delete()
     db.session.commit()
+    invalidate_user(user_id)
     logging.info(f"Admin {session.get('user_id')} a supprimé l'utilisateur: {user_email} (id: {user_id})")
     
     return jsonify({
@@ -154,4 +164,27 @@ def get_user_info(user_id):
         "nom": user.nom,
         "email": user.email,
         "role": user.role
-    })
\ No newline at end of file
+    })
+
+# Last profiled requests (profiler.py), newest first
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    try:
+        return jsonify({"data": list_traces()})
+    except redis.RedisError as e:
+        return jsonify({"error": f"Traces indisponibles: {e}"}), 503
+
+# One trace with its SQL statements and sampled stacks, ?format=folded for flamegraph tools
+@admin_bp.route('/profiles/<trace_id>', methods=['GET'])
+@admin_required
+def get_profile(trace_id):
+    try:
+        trace = get_trace(trace_id)
+    except redis.RedisError as e:
+        return jsonify({"error": f"Traces indisponibles: {e}"}), 503
+    if trace is None:
+        return jsonify({"error": "Trace non trouvée"}), 404
+    if request.args.get("format") == "folded":
+        return Response(folded(trace), mimetype="text/plain")
+    return jsonify(trace)
@@ -1,37 +1,52 @@
 from flask import Blueprint, request, jsonify, session
-from models import db, Articles, ArticlesSchema, TauxTVA
+from models import db, Articles, articles_with_relations
+from serializers import articles_serializer
+from devis_stats import invalidate_devis_stats
+from pdf_cache import invalidate_devis_pdf
+from response_cache import cached, invalidate
+from pricing import recompute_devis_totals
+import refdata
 import logging
 from .admin import admin_required
 from utils import validate_article_fields
+from bulk_import import BulkImportError, import_articles
+from pagination import paginate, paginated_response, PaginationError, equals_filter, search_filter
 
 # Create a Blueprint for articles-related routes
 articles_bp = Blueprint('articles_bp', __name__, url_prefix='/api/articles')
 
 
 ### Articles routes ###
+ARTICLES_FILTERS = {
+    "taux_tva_id": equals_filter(Articles.taux_tva_id, int),
+    "q": search_filter(Articles.nom, Articles.description),
+}
+
 # Get all articles info route
 @articles_bp.route("/all", methods=['GET'])
 @admin_required
+@cached(tables=("articles",))
 def get_all_articles():
     tableEmpty = Articles.query.first() is None
     if tableEmpty:
         return jsonify({"error": "Aucuns articles trouvé"}), 404
     
-    articles = Articles.query.all()
-    articles_schema = ArticlesSchema(many=True)
-    articles_data = articles_schema.dump(articles)
-    return jsonify(data=articles_data)
+    try:
+        articles, meta = paginate(articles_with_relations(), Articles, ARTICLES_FILTERS, ("id", "nom", "prix_vente_HT"))
+        return paginated_response(articles_serializer, articles, meta)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 # Get specific article info route
 @articles_bp.route('/info/<article_id>', methods=['GET'])
 @admin_required
+@cached(entity=("articles", "article_id"))
 def get_article_info(article_id):
-    article = Articles.query.filter_by(id=article_id).first()
+    article = articles_with_relations().filter_by(id=article_id).first()
     if not article:
         return jsonify({"error": "Article non trouvé"}), 404
     
-    article_schema = ArticlesSchema()
-    return article_schema.jsonify(article)
+    return articles_serializer.response(article)
 
 # Add new article route
 @articles_bp.route("/create", methods=["POST"])
@@ -46,8 +61,9 @@ def add_article():
     if not taux_tva:
         return jsonify({"error": "Le taux de TVA est requis."}), 400
         
-    taux_tva_id = TauxTVA.query.filter_by(taux=taux_tva).first().id
-    
+    taux_tva_id = refdata.taux_tva_id(taux_tva)
+    if taux_tva_id is None:
+        return jsonify({"error": "Le taux de TVA spécifié n'existe pas."}), 400
     
     error = validate_article_fields(nom, description, prix_achat_HT, prix_vente_HT, taux_tva_id)
     if error:
@@ -56,6 +72,7 @@ def add_article():
     new_article = Articles(nom=nom,description=description,prix_achat_HT=prix_achat_HT,prix_vente_HT=prix_vente_HT,taux_tva_id=taux_tva_id)
     db.session.add(new_article)
     db.session.commit()
+    invalidate("articles")
     logging.info(f"Nouvel article ajouté: {new_article.nom} (id: {new_article.id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
@@ -79,19 +96,30 @@ def modify_article(article_id):
     if not new_taux_tva:
         return jsonify({"error": "Le taux de TVA est requis."}), 400
         
-    new_taux_tva_id = TauxTVA.query.filter_by(taux=new_taux_tva).first().id
+    new_taux_tva_id = refdata.taux_tva_id(new_taux_tva)
+    if new_taux_tva_id is None:
+        return jsonify({"error": "Le taux de TVA spécifié n'existe pas."}), 400
     
     error = validate_article_fields(new_nom, new_description, new_prix_achat_HT, new_prix_vente_HT, new_taux_tva_id)
     if error:
         return jsonify({"error": error}), 400
     
+    snapshot_changed = article.nom != new_nom or article.prix_vente_HT != float(new_prix_vente_HT) or article.taux_tva_id != new_taux_tva_id
     article.nom = new_nom
     article.description = new_description
     article.prix_achat_HT = new_prix_achat_HT
     article.prix_vente_HT = new_prix_vente_HT
     article.taux_tva_id = new_taux_tva_id
     
+    # Draft devis using the article follow its new name/price, the others keep their lines
+    updated_devis = recompute_devis_totals(article_ids=[article.id]) if snapshot_changed else []
     db.session.commit()
+    for devis_id in updated_devis:
+        invalidate_devis_pdf(devis_id)
+    invalidate_devis_stats()
+    invalidate("articles", article.id)
+    if updated_devis:
+        invalidate("devis", *updated_devis)
     logging.info(f"Article modifié: {article.nom} (id: {article.id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
@@ -109,8 +137,39 @@ def delete_article(article_id):
     article_name = article.nom
     Articles.query.filter_by(id=article_id).delete()
     db.session.commit()
+    invalidate_devis_stats()
+    invalidate("articles", article_id)
     logging.info(f"Article supprimé: {article_name} (id: {article_id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
         "200": "Article successfully deleted."
-    })
\ No newline at end of file
+    })
+
+# Import articles from a CSV/XLSX file (multipart "file"), see bulk_import.py
+# ?dry_run=1 only validates, ?encoding=cp1252 for a CSV not in UTF-8
+@articles_bp.route("/import", methods=["POST"])
+@admin_required
+def import_articles_route():
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "Fichier CSV ou XLSX requis."}), 400
+    dry_run = request.args.get("dry_run") == "1"
+    
+    try:
+        report = import_articles(file, dry_run=dry_run, encoding=request.args.get("encoding", "utf-8-sig"))
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except BulkImportError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.exception("Erreur lors de l'import d'articles")
+        return jsonify({"error": str(e)}), 500
+    
+    if report.inserted and not dry_run:
+        invalidate("articles")
+    logging.info(f"Import d'articles: {report.inserted} ajoutés, {report.error_count} lignes en erreur{' (essai)' if dry_run else ''} par l'utilisateur {session.get('user_id')}")
+    return jsonify(report.to_dict())
@@ -1,28 +1,24 @@
 from flask import Blueprint, request, jsonify, session
-from flask_bcrypt import Bcrypt
-from models import db, User, UserSchema
+from config import ApplicationConfig
+from models import db, User
+from serializers import users_serializer
+from current_user import current_user
+from passwords import hash_password, check_password
+from rate_limit import hit, reset, client_ip, too_many_attempts
 from utils import validate_user_fields
 import logging
 
 # Create a Blueprint for authentication-related routes
 auth_bp = Blueprint('auth_bp', __name__,url_prefix='/api/user')
 
-bcrypt = Bcrypt()
-
 # Get current user info
 @auth_bp.route("/me", methods=['GET'])
 def get_current_user():
-    user_id = session.get("user_id")
-    
-    if not user_id:
-        return jsonify({"user": None}), 401
-    
-    user = User.query.filter_by(id=user_id).first()
+    user = current_user()
     if not user:
         return jsonify({"user": None}), 401
     
-    user_schema = UserSchema()
-    return user_schema.jsonify(user)
+    return users_serializer.response(user)
 
 # Register route
 @auth_bp.route("/register", methods=["POST"])
@@ -32,6 +28,11 @@ def register():
     nom = request.json["nom"]
     mdp = request.json["mdp"]
     
+    retry_after = hit("register", [("ip", client_ip(), ApplicationConfig.REGISTER_RATE_LIMIT_IP)],
+                      ApplicationConfig.AUTH_RATE_LIMIT_WINDOW)
+    if retry_after:
+        return too_many_attempts(retry_after)
+    
     # Vérification si le nom d'utilisateur existe déjà.
     user_already_exists = User.query.filter_by(email=email).first() is not None
 
@@ -43,7 +44,7 @@ def register():
         return jsonify({"error": error}), 400
     
     # Création du nouvel utilisateur du mot de passe.
-    hashed_password = bcrypt.generate_password_hash(mdp).decode('utf-8')
+    hashed_password = hash_password(mdp)
     new_user = User(email=email,prenom=prenom,nom=nom,mdp=hashed_password)
     db.session.add(new_user)
     db.session.commit()
@@ -52,8 +53,7 @@ def register():
     # Connexion automatique après l'inscription
     session["user_id"] = new_user.id
     
-    user_schema = UserSchema()
-    return user_schema.jsonify(new_user)
+    return users_serializer.response(new_user)
 
 # Login route
 @auth_bp.route("/login", methods=["POST"])
@@ -61,18 +61,33 @@ def login_user():
     email = request.json["email"]
     mdp = request.json["mdp"]
     
+    # Counted before any bcrypt work
+    retry_after = hit("login", [
+        ("ip", client_ip(), ApplicationConfig.LOGIN_RATE_LIMIT_IP),
+        ("email", email.strip().lower(), ApplicationConfig.LOGIN_RATE_LIMIT_EMAIL),
+    ], ApplicationConfig.AUTH_RATE_LIMIT_WINDOW)
+    if retry_after:
+        return too_many_attempts(retry_after)
+    
     user = User.query.filter_by(email=email).first()
 
     if user is None:
         return jsonify({"error": "Email invalide"}), 401
     
-    if not bcrypt.check_password_hash(user.mdp, mdp):
+    valid, new_hash = check_password(user.mdp, mdp)
+    if not valid:
         return jsonify({"error": "Mot de passe invalide"}), 401
     
+    # Stored with another work factor than BCRYPT_LOG_ROUNDS
+    if new_hash:
+        user.mdp = new_hash
+        db.session.commit()
+        logging.info(f"Mot de passe de {user.email} (id: {user.id}) rehaché avec le coût {ApplicationConfig.BCRYPT_LOG_ROUNDS}")
+    
+    reset("login", "email", email.strip().lower())
     session["user_id"] = user.id
     
-    user_schema = UserSchema()
-    return user_schema.jsonify(user)
+    return users_serializer.response(user)
 
 # Logout route
 @auth_bp.route("/logout", methods=['POST'])
@@ -1,22 +1,36 @@
 from flask import Blueprint, request, jsonify, session
-from models import db, Clients, ClientsSchema
+from models import db, Clients
+from serializers import clients_serializer
 from utils import validate_client_fields
+from pagination import paginate, paginated_response, PaginationError, equals_filter, boolean_filter, search_filter
+from devis_stats import invalidate_devis_stats
+from response_cache import cached, invalidate
+from bulk_import import BulkImportError, import_clients
+from .admin import admin_required
 import logging
 
 # Create a Blueprint for clients-related routes
 clients_bp = Blueprint('clients_bp', __name__, url_prefix='/api/clients')
 
+CLIENTS_FILTERS = {
+    "caduque": boolean_filter(Clients.caduque),
+    "ville": equals_filter(Clients.ville),
+    "q": search_filter(Clients.nom, Clients.prenom, Clients.email),
+}
+
 # Get all clients info route
 @clients_bp.route("/all", methods=['GET'])
+@cached(tables=("clients",))
 def get_all_clients():
     tableEmpty = Clients.query.first() is None
     if tableEmpty:
         return jsonify({"error": "Aucun clients trouvé"}), 404
     
-    clients = Clients.query.all()
-    clients_schema = ClientsSchema(many=True)
-    clients_data = clients_schema.dump(clients)
-    return jsonify(data=clients_data)
+    try:
+        clients, meta = paginate(Clients.query, Clients, CLIENTS_FILTERS, ("id", "nom", "ville"))
+        return paginated_response(clients_serializer, clients, meta)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 # Add new client route
 @clients_bp.route("/create", methods=["POST"])
@@ -43,6 +57,7 @@ def add_client():
     new_client = Clients(nom=nom,prenom=prenom,rue=rue,ville=ville,code_postal=code_postal,telephone=telephone,email=email,caduque=False)
     db.session.add(new_client)
     db.session.commit()
+    invalidate("clients")
     logging.info(f"Nouvel client ajouté: {new_client.email} (id: {new_client.id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
@@ -87,6 +102,8 @@ def modify_client(client_id):
     client.caduque = new_caduque
 
     db.session.commit()
+    invalidate_devis_stats()
+    invalidate("clients", client.id)
     logging.info(f"Client modifié: {client.email} (id: {client.id}) par l'utilisateur {session.get('user_id')}")
 
     return jsonify({
@@ -96,6 +113,7 @@ def modify_client(client_id):
 
 # Get client info route
 @clients_bp.route('/info/<client_id>', methods=['GET'])
+@cached(entity=("clients", "client_id"))
 def get_client_info(client_id):
     client = Clients.query.filter_by(id=client_id).first()
     return jsonify({
@@ -108,4 +126,33 @@ def get_client_info(client_id):
         "telephone": client.telephone,
         "email": client.email,
         "caduque": client.caduque,
-    })
\ No newline at end of file
+    })
+
+# Import clients from a CSV/XLSX file (multipart "file"), see bulk_import.py
+# ?dry_run=1 only validates, ?force=1 accepts emails already used, ?encoding=cp1252 for a CSV not in UTF-8
+@clients_bp.route("/import", methods=["POST"])
+@admin_required
+def import_clients_route():
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "Fichier CSV ou XLSX requis."}), 400
+    dry_run = request.args.get("dry_run") == "1"
+    
+    try:
+        report = import_clients(file, force=request.args.get("force") == "1", dry_run=dry_run, encoding=request.args.get("encoding", "utf-8-sig"))
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except BulkImportError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.exception("Erreur lors de l'import de clients")
+        return jsonify({"error": str(e)}), 500
+    
+    if report.inserted and not dry_run:
+        invalidate("clients")
+    logging.info(f"Import de clients: {report.inserted} ajoutés, {report.error_count} lignes en erreur{' (essai)' if dry_run else ''} par l'utilisateur {session.get('user_id')}")
+    return jsonify(report.to_dict())
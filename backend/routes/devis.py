@@ -1,45 +1,97 @@
-from flask import Blueprint, request, jsonify, session, render_template, make_response, redirect
-from models import db, Devis, DevisSchema, DevisArticles, Clients
+from flask import Blueprint, request, jsonify, session, render_template, make_response, redirect, current_app, Response
+from models import db, Devis, DevisSchema, DevisArticles, Clients, DocusignOutbox, devis_with_relations
 from datetime import datetime
-from weasyprint import HTML
 from docusign_esign import ApiClient, EnvelopesApi, EnvelopeDefinition, Document, Signer, SignHere, Tabs, Recipients, ApiClient
 from docusign_esign.client.api_exception import ApiException
-import logging, os, requests, json
+from pdf_cache import pdf_cache_key, get_pdf, invalidate_devis_pdf
+from response_cache import cached, invalidate
+from devis_stats import get_devis_stats, invalidate_devis_stats
+from docusign_outbox import enqueue_send, outbox_status
+from docusign_events import record_event
+from devis_lines import DevisLinesError, parse_lines, load_article_snapshots, insert_lines, sync_lines, bulk_create_devis
+from pricing import snapshot_totals, stored_totals, recompute_devis_totals
+from .admin import admin_required
+from pdf_queue import enqueue_render, completed_job, get_job, get_job_pdf, wait_for_job, get_render_stats
+from serializers import devis_serializer
+from pagination import paginate, paginated_response, PaginationError, equals_filter, date_filter
+from database import statement_timeout
+from config import ApplicationConfig
+from sqlalchemy import or_
+import logging, zipfile
 
 # Create a Blueprint for authentication-related routes
 devis_bp = Blueprint('devis_bp', __name__, url_prefix='/api/devis')
 
+# Search on the devis and its client name
+def _search_devis(query, value):
+    pattern = f"%{value}%"
+    return query.filter(or_(
+        Devis.titre.ilike(pattern),
+        Devis.description.ilike(pattern),
+        Devis.client.has(or_(Clients.nom.ilike(pattern), Clients.prenom.ilike(pattern))),
+    ))
+
+DEVIS_FILTERS = {
+    "statut": equals_filter(Devis.statut),
+    "client_id": equals_filter(Devis.client_id, int),
+    "date_from": date_filter(Devis.date, ">="),
+    "date_to": date_filter(Devis.date, "<="),
+    "q": _search_devis,
+}
+DEVIS_SORTABLE = ("id", "date", "montant_HT", "montant_TTC")
+
 # Get every devis of every devis route
 @devis_bp.route('/all', methods=['GET'])
+@cached(tables=("devis", "clients"))
 def get_every_devis():
-    devis = Devis.query.all()
-    if len(devis) == 0:
+    tableEmpty = Devis.query.first() is None
+    if tableEmpty:
         return jsonify({"error": "Aucuns devis trouvé"}), 404
     
-    devis_schema = DevisSchema(many=True)
-    devis_data = devis_schema.dump(devis)
-    return jsonify(data=devis_data)
+    try:
+        devis, meta = paginate(devis_with_relations(), Devis, DEVIS_FILTERS, DEVIS_SORTABLE)
+        return paginated_response(devis_serializer, devis, meta)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 # Get every devis of a client route
 @devis_bp.route('/client/<client_id>', methods=['GET'])
+@cached(tables=("devis", "clients"))
 def get_client_devis(client_id):
-    devis = Devis.query.filter_by(client_id=client_id).all()
-    if not devis:
+    query = devis_with_relations().filter_by(client_id=client_id)
+    if query.first() is None:
         return jsonify({"error": "Aucuns devis trouvé"}), 404
     
-    devis_schema = DevisSchema(many=True)
-    devis_data = devis_schema.dump(devis)
-    return jsonify(data=devis_data)
+    try:
+        devis, meta = paginate(query, Devis, DEVIS_FILTERS, DEVIS_SORTABLE)
+        return paginated_response(devis_serializer, devis, meta)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
 # Get specific devis info route
 @devis_bp.route('/info/<devis_id>', methods=['GET'])
+@cached(tables=("clients",), entity=("devis", "devis_id"))
 def get_devis_info(devis_id):
-    devis = Devis.query.filter_by(id=devis_id).first()
+    devis = devis_with_relations().filter_by(id=devis_id).first()
     if not devis:
         return jsonify({"error": "Devis non trouvé"}), 404
     
-    devis_schema = DevisSchema()
-    return devis_schema.jsonify(devis)
+    return devis_serializer.response(devis)
+
+# Dashboard statistics route (?date_from=&date_to=&clients=)
+@devis_bp.route('/stats', methods=['GET'])
+@statement_timeout(ApplicationConfig.STATS_STATEMENT_TIMEOUT_MS)
+def get_devis_statistics():
+    try:
+        date_from = request.args.get("date_from")
+        date_to = request.args.get("date_to")
+        date_from = datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None
+        date_to = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None
+        clients_limit = max(1, min(int(request.args.get("clients", 50)), 500))
+    except ValueError:
+        return jsonify({"error": "Paramètres invalides."}), 400
+
+    return jsonify(get_devis_stats(date_from, date_to, clients_limit))
 
 # Get new devis id route (for display in front only)
 @devis_bp.route('/new-id', methods=['GET'])
@@ -60,22 +112,23 @@ def create_devis():
     titre = request.json["title"]
     description = request.json["description"]
     date = datetime.strptime(request.json["date"],"%Y-%m-%d").date()
-    montant_HT = request.json["montant_HT"]
-    montant_TVA = request.json["montant_TVA"]
-    montant_TTC = request.json["montant_TTC"]
     statut = request.json["statut"]
     client_id = request.json["client_id"]
-    articles_data = request.json["articles"]
+    try:
+        lines = parse_lines(request.json["articles"])
+        snapshots = load_article_snapshots(lines)
+    except DevisLinesError as e:
+        return jsonify({"error": str(e)}), 400
     
-    new_devis = Devis(client_id=client_id,titre=titre,description=description,date=date,montant_HT=montant_HT,montant_TVA=montant_TVA,montant_TTC=montant_TTC,statut=statut)
+    # Amounts are computed from the articles, the ones sent by the client are ignored
+    new_devis = Devis(client_id=client_id,titre=titre,description=description,date=date,statut=statut,**snapshot_totals(lines, snapshots))
     db.session.add(new_devis)
     db.session.flush()
     
-    for article in articles_data:
-        devis_article = DevisArticles(devis_id=new_devis.id,article_id=article["article_id"],quantite=article['quantite'],)
-        db.session.add(devis_article)
-        
+    insert_lines(new_devis.id, lines, snapshots)
     db.session.commit()
+    invalidate_devis_stats()
+    invalidate("devis")
     logging.info(f"Nouveau devis créé: {new_devis.titre} (id: {new_devis.id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
@@ -92,20 +145,20 @@ def update_devis(devis_id):
     devis.titre = request.json["title"]
     devis.description = request.json["description"]
     devis.date = datetime.strptime(request.json["date"],"%Y-%m-%d").date()
-    devis.montant_HT = request.json["montant_HT"]
-    devis.montant_TVA = request.json["montant_TVA"]
-    devis.montant_TTC = request.json["montant_TTC"]
     devis.statut = request.json["statut"]
-    articles_data = request.json["articles"]
     
     try:
-        DevisArticles.query.filter_by(devis_id=devis.id).delete()
-        
-        for article in articles_data:
-            devis_article = DevisArticles(devis_id=devis.id,article_id=article["article_id"],quantite=article["quantite"])
-            db.session.add(devis_article)
-    
+        lines = parse_lines(request.json["articles"])
+        # Only the changed lines are written, the amounts come from the stored lines
+        sync_lines(devis.id, lines)
+        totals = stored_totals(devis.id)
+        devis.montant_HT = totals["montant_HT"]
+        devis.montant_TVA = totals["montant_TVA"]
+        devis.montant_TTC = totals["montant_TTC"]
         db.session.commit()
+        invalidate_devis_pdf(devis.id)
+        invalidate_devis_stats()
+        invalidate("devis", devis.id)
         
         logging.info(f"Devis modifié: {devis.titre} (id: {devis.id}) par l'utilisateur {session.get('user_id')}")
     
@@ -113,10 +166,66 @@ def update_devis(devis_id):
             "id": devis.id
         })
     
+    except DevisLinesError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Import many devis with their lines in one transaction, amounts computed from the lines (pricing.py)
+# {"devis": [{title, description, date, statut, client_id, articles}, ...]}
+@devis_bp.route('/bulk', methods=['POST'])
+def bulk_create_devis_route():
+    devis_data = (request.get_json(silent=True) or {}).get("devis")
+    if not isinstance(devis_data, list) or not devis_data:
+        return jsonify({"error": "Liste de devis requise."}), 400
+    if len(devis_data) > current_app.config["DEVIS_BULK_MAX"]:
+        return jsonify({"error": f"{current_app.config['DEVIS_BULK_MAX']} devis maximum par import."}), 400
+    
+    try:
+        ids = bulk_create_devis(devis_data)
+        db.session.commit()
+    except DevisLinesError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.exception("Erreur lors de l'import de devis")
+        return jsonify({"error": str(e)}), 500
+    
+    invalidate_devis_stats()
+    invalidate("devis")
+    logging.info(f"{len(ids)} devis importés par l'utilisateur {session.get('user_id')}")
+    return jsonify({
+        "ids": ids
+    }), 201
+
+# Refresh the lines and amounts of the draft devis from the current articles, e.g. after a VAT rate change
+# {"article_ids": [...], "taux_tva_ids": [...], "devis_ids": [...]} all optional, nothing = every draft devis
+@devis_bp.route('/recompute', methods=['POST'])
+@admin_required
+def recompute_devis():
+    data = request.get_json(silent=True) or {}
+    try:
+        filters = {name: [int(i) for i in data[name]] for name in ("article_ids", "taux_tva_ids", "devis_ids") if data.get(name) is not None}
+    except (TypeError, ValueError):
+        return jsonify({"error": "Identifiants invalides."}), 400
+    
+    updated = recompute_devis_totals(**filters)
+    db.session.commit()
+    for devis_id in updated:
+        invalidate_devis_pdf(devis_id)
+    if updated:
+        invalidate_devis_stats()
+        invalidate("devis", *updated)
+    logging.info(f"Montants recalculés pour {len(updated)} devis par l'utilisateur {session.get('user_id')}")
+    
+    return jsonify({
+        "updated": len(updated)
+    })
+
 # Delete devis route
 @devis_bp.route('/delete/<devis_id>', methods=['DELETE'])
 def delete_devis(devis_id):
@@ -127,43 +236,187 @@ def delete_devis(devis_id):
     devis_nom = devis.titre
     # Delete devis articles first to avoid foreign key constraint violation
     DevisArticles.query.filter_by(devis_id=devis.id).delete()
+    DocusignOutbox.query.filter_by(devis_id=devis.id).delete()
     Devis.query.filter_by(id=devis_id).delete()
     db.session.commit()
+    invalidate_devis_pdf(devis_id)
+    invalidate_devis_stats()
+    invalidate("devis", devis_id)
     logging.info(f"Devis supprimé: {devis_nom} (id: {devis_id}) par l'utilisateur {session.get('user_id')}")
     
     return jsonify({
         "200": "Devis successfully deleted."
     })
 
+def _pdf_response(pdf, devis_id, cache_key):
+    response = make_response(pdf)
+    response.headers["Content-Type"] = "application/pdf"
+    response.headers["Content-Disposition"] = f"inline; filename=devis_{devis_id}.pdf"
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.set_etag(cache_key)
+    return response
+
+# Render the HTML and queue the PDF job, WeasyPrint runs in pdf_worker.py
+def _enqueue_devis_pdf(devis_data, devis_id, cache_key):
+    # Render HTML using Jinja2 template
+    html_out = render_template("pdf.html", devis=devis_data)
+    return enqueue_render(cache_key, html_out, devis_id)
+
 # Create PDF of the devis
 @devis_bp.route('/pdf/<devis_id>', methods=['GET'])
 def get_devis_pdf(devis_id):
-    devis = Devis.query.filter_by(id=devis_id).first()
+    devis = devis_with_relations().filter_by(id=devis_id).first()
     if not devis:
         return jsonify({"error": "Devis non trouvé"}), 404
     
     # Convert Devis object to dict including articles
     devis_schema = DevisSchema()
     devis_data = devis_schema.dump(devis)
+    
+    # Le hash du contenu sert de clé de cache et d'ETag
+    cache_key = pdf_cache_key(devis_data)
+    if request.if_none_match.contains(cache_key):
+        response = make_response("", 304)
+        response.set_etag(cache_key)
+        return response
+    
+    pdf = get_pdf(cache_key)
+    if pdf is None:
+        job_id = _enqueue_devis_pdf(devis_data, devis.id, cache_key)
+        job = wait_for_job(job_id, current_app.config["PDF_RENDER_TIMEOUT"])
+        if job is None:
+            logging.warning(f"Délai dépassé pour le rendu du PDF du devis {devis_id} (job {job_id})")
+            return jsonify({"error": "La génération du PDF a pris trop de temps.", "job_id": job_id}), 504
+        if job.get("status") != "done":
+            return jsonify({"error": job.get("error", "Erreur lors de la génération du PDF.")}), 500
+        pdf = get_job_pdf(job_id) or get_pdf(cache_key)
 
-    # Render HTML using Jinja2 template
-    html_out = render_template("pdf.html", devis=devis_data)
+    # Return PDF as response
+    return _pdf_response(pdf, devis_id, cache_key)
+
+# Start the render of the devis PDF in background
+@devis_bp.route('/pdf/<devis_id>/render', methods=['POST'])
+def render_devis_pdf(devis_id):
+    devis = devis_with_relations().filter_by(id=devis_id).first()
+    if not devis:
+        return jsonify({"error": "Devis non trouvé"}), 404
+    
+    devis_schema = DevisSchema()
+    devis_data = devis_schema.dump(devis)
+    cache_key = pdf_cache_key(devis_data)
+    if get_pdf(cache_key) is not None:
+        job_id = completed_job(cache_key, devis.id)
+    else:
+        job_id = _enqueue_devis_pdf(devis_data, devis.id, cache_key)
     
-    # Calculate the absolute path to the folder containing your template and static files
-    base_path = '/app/pdf/'
+    return jsonify({
+        "job_id": job_id,
+        "status": get_job(job_id).get("status")
+    }), 202
 
-    # Generate PDF
-    pdf = HTML(string=html_out,base_url=base_path).write_pdf()
+# Get the status of a render job, or the PDF once it is done
+@devis_bp.route('/pdf/<devis_id>/render/<job_id>', methods=['GET'])
+def get_devis_pdf_render(devis_id, job_id):
+    job = get_job(job_id)
+    if not job or job.get("devis_id") != str(devis_id):
+        return jsonify({"error": "Job introuvable"}), 404
+    
+    if job["status"] == "failed":
+        return jsonify({"job_id": job_id, "status": "failed", "error": job.get("error")}), 500
+    if job["status"] != "done":
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
+    
+    pdf = get_job_pdf(job_id) or get_pdf(job["cache_key"])
+    if pdf is None:
+        return jsonify({"error": "Le PDF a expiré, relancez la génération."}), 410
+    return _pdf_response(pdf, devis_id, job["cache_key"])
 
-    # Return PDF as response
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    response.headers["Content-Disposition"] = f"inline; filename=devis_{devis_id}.pdf"
+class _ZipStream:
+    """Non-seekable sink for zipfile, drained after each entry so the ZIP is streamed."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+# Export many devis PDFs as a streamed ZIP
+@devis_bp.route('/pdf/batch', methods=['POST'])
+def get_devis_pdf_batch():
+    data = request.get_json() or {}
+    
+    # Load every devis and its relations in one go
+    query = devis_with_relations()
+    try:
+        if data.get("ids"):
+            query = query.filter(Devis.id.in_([int(i) for i in data["ids"]]))
+        if data.get("client_id"):
+            query = query.filter(Devis.client_id == int(data["client_id"]))
+        if data.get("date_from"):
+            query = query.filter(Devis.date >= datetime.strptime(data["date_from"], "%Y-%m-%d").date())
+        if data.get("date_to"):
+            query = query.filter(Devis.date <= datetime.strptime(data["date_to"], "%Y-%m-%d").date())
+    except (TypeError, ValueError):
+        return jsonify({"error": "Filtres invalides."}), 400
+    if data.get("statut"):
+        query = query.filter(Devis.statut == data["statut"])
+    
+    devis_list = query.order_by(Devis.id).limit(current_app.config["PDF_BATCH_MAX_DEVIS"] + 1).all()
+    if not devis_list:
+        return jsonify({"error": "Aucuns devis trouvé"}), 404
+    if len(devis_list) > current_app.config["PDF_BATCH_MAX_DEVIS"]:
+        return jsonify({"error": f"Trop de devis, maximum {current_app.config['PDF_BATCH_MAX_DEVIS']} par export."}), 400
+    
+    # Queue every missing PDF first so the workers render them in parallel
+    devis_schema = DevisSchema(many=True)
+    entries = []
+    for devis_data in devis_schema.dump(devis_list):
+        cache_key = pdf_cache_key(devis_data)
+        job_id = None
+        if get_pdf(cache_key) is None:
+            job_id = _enqueue_devis_pdf(devis_data, devis_data["id"], cache_key)
+        entries.append((devis_data["id"], cache_key, job_id))
+    
+    timeout = current_app.config["PDF_RENDER_TIMEOUT"]
+    logging.info(f"Export PDF de {len(entries)} devis par l'utilisateur {session.get('user_id')}")
+    
+    def generate():
+        stream = _ZipStream()
+        with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for devis_id, cache_key, job_id in entries:
+                pdf = get_pdf(cache_key)
+                if pdf is None and job_id is not None:
+                    job = wait_for_job(job_id, timeout)
+                    if job and job.get("status") == "done":
+                        pdf = get_job_pdf(job_id)
+                if pdf is None:
+                    archive.writestr(f"devis_{devis_id}_erreur.txt", "La génération du PDF a échoué.")
+                else:
+                    archive.writestr(f"devis_{devis_id}.pdf", pdf)
+                yield stream.drain()
+        yield stream.drain()
+    
+    response = Response(generate(), mimetype="application/zip")
+    response.headers["Content-Disposition"] = "attachment; filename=devis.zip"
     return response
 
+# Render queue metrics
+@devis_bp.route('/pdf/render/stats', methods=['GET'])
+def get_pdf_render_stats():
+    return jsonify(get_render_stats())
+
 ### DocuSign routes ###
 
 # Send PDF to external service for signing
+# The send is recorded in the outbox and done by docusign_dispatcher.py, poll the returned outbox entry
 @devis_bp.route('/pdf/send/external/<client_id>/<devis_id>', methods=['POST'])
 def external_send_pdf_sign(client_id, devis_id):
     try:
@@ -176,67 +429,31 @@ def external_send_pdf_sign(client_id, devis_id):
         if not devis:
             return jsonify({"error": "Devis non trouvé."}), 404
         
-        email = client.email
-        nom = client.nom
-        prenom = client.prenom
-
-        # Get other Docusign credentials from environment variables
-        integrator_key = open("/run/secrets/DOCUSIGN_INTEGRATION_KEY").read().strip() if os.path.exists("/run/secrets/DOCUSIGN_INTEGRATION_KEY") else os.getenv("DOCUSIGN_INTEGRATION_KEY")
-        account_id = open("/run/secrets/DOCUSIGN_ACCOUNT_ID").read().strip() if os.path.exists("/run/secrets/DOCUSIGN_ACCOUNT_ID") else os.getenv("DOCUSIGN_ACCOUNT_ID")
-        user_id = open("/run/secrets/DOCUSIGN_USER_ID").read().strip() if os.path.exists("/run/secrets/DOCUSIGN_USER_ID") else os.getenv("DOCUSIGN_USER_ID")
-        
-        # Build callback URL for webhook notifications
-        backend_url = os.getenv("BACKEND_URL", "http://backend:5000")
-        callback_url = f"{backend_url}/api/devis/docusign/webhook"
-
-        # Prepare files and data for the external service
-        files = {'file': (file.filename, file.read(), file.content_type)}
-        data = {
-            'integrator_key': integrator_key,
-            'account_id': account_id,
-            'user_id': user_id,
-            'callback_url': callback_url,
-            'signers': json.dumps([{
-                'email': email,
-                'name': f"{prenom} {nom}"
-            }])
-        }
-            
-
-        # Make the POST request to the external service
-        target_url = os.getenv("DOCUSIGN_SERVER_IP") + "/send-pdf"
-        response = requests.post(target_url, files=files, data=data)
-        response.raise_for_status()
+        entry = enqueue_send(devis, client, file)
+        logging.info(f"Envoi pour signature du devis {devis_id} mis en file (outbox {entry.id}) par l'utilisateur {session.get('user_id')}")
         
-        response_data = response.json()
-        envelope_id = response_data.get('envelope_id')
-        
-        # Store envelope_id in the devis and update status
-        if envelope_id:
-            devis.envelope_id = envelope_id
-            devis.statut = "En attente de signature"
-            db.session.commit()
-            logging.info(f"Devis {devis_id} envoyé pour signature. Envelope ID: {envelope_id}")
-        
-        logging.info(response_data)
-        
-        # Return the JSON response from the external service
-        return jsonify(response_data), response.status_code
-    
-    except requests.exceptions.RequestException as e:
-        logging.exception(f"Erreur lors de l'appel au service externe: {e}")
-        return jsonify({"error": f"Erreur lors de l'appel au service externe: {e}"}), 500
+        return jsonify(outbox_status(entry)), 202
     
     except Exception as e:
         logging.exception("Erreur lors de l'envoi du PDF via le service externe:")
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Status of a DocuSign send request
+@devis_bp.route('/pdf/send/external/status/<outbox_id>', methods=['GET'])
+def external_send_status(outbox_id):
+    entry = DocusignOutbox.query.filter_by(id=outbox_id).first()
+    if not entry:
+        return jsonify({"error": "Envoi non trouvé."}), 404
+    return jsonify(outbox_status(entry))
+
 # Webhook endpoint to receive DocuSign status updates
 @devis_bp.route('/docusign/webhook', methods=['POST'])
 def docusign_webhook():
     """
     Receive webhook notifications from the external DocuSign server
-    when envelope status changes (completed, declined, voided)
+    when envelope status changes (completed, declined, voided).
+    The event is only recorded here, docusign_dispatcher.py applies it to the devis.
     """
     try:
         data = request.get_json()
@@ -247,46 +464,20 @@ def docusign_webhook():
         
         envelope_id = data.get('envelope_id')
         status = data.get('status')
-        signed_at = data.get('signed_at')
         
         if not envelope_id or not status:
             logging.error(f"Webhook incomplet: {data}")
             return jsonify({"error": "Missing envelope_id or status"}), 400
         
-        # Find the devis with this envelope_id
-        devis = Devis.query.filter_by(envelope_id=envelope_id).first()
-        
-        if not devis:
-            logging.warning(f"Devis non trouvé pour envelope_id: {envelope_id}")
-            return jsonify({"error": "Devis not found"}), 404
-        
-        # Update devis status based on DocuSign status
-        if status == "completed":
-            devis.statut = "Signé"
-            if signed_at:
-                try:
-                    devis.date_paiement = datetime.fromisoformat(signed_at.replace('Z', '+00:00')).date()
-                except:
-                    devis.date_paiement = datetime.now().date()
-            else:
-                devis.date_paiement = datetime.now().date()
-            logging.info(f"Devis {devis.id} ({devis.titre}) marqué comme Signé via webhook DocuSign")
-            
-        elif status == "declined":
-            devis.statut = "Refusé"
-            logging.info(f"Devis {devis.id} ({devis.titre}) marqué comme Refusé via webhook DocuSign")
-            
-        elif status == "voided":
-            devis.statut = "Annulé"
-            logging.info(f"Devis {devis.id} ({devis.titre}) marqué comme Annulé via webhook DocuSign")
-        
-        db.session.commit()
+        # Replayed notifications are acknowledged but not recorded twice
+        recorded = record_event(envelope_id, status, data.get('timestamp'), data.get('signed_at'))
+        if not recorded:
+            logging.info(f"Webhook DocuSign déjà reçu ignoré: {envelope_id} {status}")
         
         return jsonify({
             "success": True,
-            "devis_id": devis.id,
-            "new_status": devis.statut
-        }), 200
+            "duplicate": not recorded
+        }), 202
         
     except Exception as e:
         logging.exception(f"Erreur lors du traitement du webhook DocuSign: {e}")
@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
+from export import FORMATS, clients_select, articles_select, devis_select, generate
+from pagination import apply_filters, PaginationError
+from .admin import admin_required
+from .clients import CLIENTS_FILTERS
+from .articles import ARTICLES_FILTERS
+from .devis import DEVIS_FILTERS
+from datetime import date
+import logging
+
+# Create a Blueprint for export routes
+export_bp = Blueprint('export_bp', __name__, url_prefix='/api/export')
+
+# Entity -> (query, filters of its list route)
+EXPORTS = {
+    "clients": (clients_select, CLIENTS_FILTERS),
+    "articles": (articles_select, ARTICLES_FILTERS),
+    "devis": (devis_select, DEVIS_FILTERS),
+}
+
+# Full export of a table, streamed
+# ?format=csv|ndjson plus the filters of /api/<entity>/all (?statut=Signé&date_from=2025-01-01)
+@export_bp.route("/<entity>", methods=['GET'])
+@admin_required
+def export_entity(entity):
+    if entity not in EXPORTS:
+        return jsonify({"error": "Export inconnu."}), 404
+    export_format = request.args.get("format", "csv")
+    if export_format not in FORMATS:
+        return jsonify({"error": f"Format invalide: {export_format} (csv ou ndjson)."}), 400
+    
+    select, filters = EXPORTS[entity]
+    try:
+        query = apply_filters(select(), filters)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    logging.info(f"Export {export_format} des {entity} par l'utilisateur {session.get('user_id')}")
+    # The session and its server side cursor stay open until the last chunk is sent
+    response = Response(stream_with_context(generate(entity, export_format, query)), content_type=FORMATS[export_format])
+    response.headers["Content-Disposition"] = f"attachment; filename={entity}-{date.today().isoformat()}.{export_format}"
+    # nginx sends the chunks as they come instead of buffering the whole file
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
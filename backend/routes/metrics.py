@@ -0,0 +1,27 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from current_user import current_user_info
+from metrics import render_metrics
+import hmac
+import redis
+
+# Create a Blueprint for the Prometheus metrics route
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+# Prometheus scrape with "Authorization: Bearer <METRICS_TOKEN>", or an admin session
+def _authorized():
+    token = current_app.config.get("METRICS_TOKEN")
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[len("Bearer "):], token):
+        return True
+    user = current_user_info()
+    return user is not None and user["role"] == "Administrateur"
+
+@metrics_bp.route("/metrics", methods=['GET'])
+def get_metrics():
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        body = render_metrics()
+    except redis.RedisError as e:
+        return jsonify({"error": f"Métriques indisponibles: {e}"}), 503
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
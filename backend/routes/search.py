@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from search import search, SearchError, DEFAULT_LIMIT
+from config import ApplicationConfig
+from database import statement_timeout
+from current_user import current_user_info
+from models import SEARCH_COLUMNS
+
+# Create a Blueprint for search routes
+search_bp = Blueprint('search_bp', __name__, url_prefix='/api/search')
+
+# Entities only administrators can read, like /api/articles/all
+ADMIN_ENTITIES = {"articles"}
+
+# Typeahead search over clients, articles (administrators only) and devis
+# ?q=dupont&types=clients,devis&limit=10
+@search_bp.route("", methods=['GET'])
+@statement_timeout(ApplicationConfig.SEARCH_STATEMENT_TIMEOUT_MS)
+def search_all():
+    query = request.args.get("q")
+    if query is None:
+        return jsonify({"error": "Paramètre q requis."}), 400
+
+    types = request.args.get("types")
+    entities = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_COLUMNS)
+    user = current_user_info()
+    if not user or user["role"] != 'Administrateur':
+        if ADMIN_ENTITIES.intersection(entities):
+            if types:
+                return jsonify({"error": "Forbidden"}), 403
+            entities = [name for name in entities if name not in ADMIN_ENTITIES]
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "Paramètres invalides."}), 400
+    try:
+        results = search(query, entities, limit)
+    except SearchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(dict(results, q=query))
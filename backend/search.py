@@ -0,0 +1,127 @@
+from models import db, Clients, Articles, Devis, SEARCH_COLUMNS, search_document, search_vector, SEARCH_CONFIG
+from sqlalchemy import event, func, or_, select, table, literal_column, text
+import re
+
+# Recherche plein texte (autocomplétion) sur les clients, articles et devis.
+# Postgres : tsvector (configuration french) pour les mots, pg_trgm pour les fautes de frappe
+# et les morceaux de mots, sur les index GIN déclarés dans models.py.
+# SQLite (développement, tests locaux) : tables FTS5 tenues à jour par des triggers.
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MIN_QUERY_LENGTH = 2
+# Only the first matches are ranked: a short prefix can match most rows, ranking them all is what costs
+RANK_CANDIDATES = 500
+
+# Returned fields of each entity
+SEARCH_FIELDS = {
+    "clients": (Clients.id, Clients.nom, Clients.prenom, Clients.ville, Clients.email, Clients.caduque),
+    "articles": (Articles.id, Articles.nom, Articles.description, Articles.prix_vente_HT),
+    "devis": (Devis.id, Devis.titre, Devis.client_id, Devis.date, Devis.statut),
+}
+SEARCH_MODELS = {"clients": Clients, "articles": Articles, "devis": Devis}
+
+class SearchError(ValueError):
+    pass
+
+def _terms(query):
+    return re.findall(r"\w+", query)
+
+def _like_pattern(query):
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+# Every word as a prefix: "dupo rei" -> dupo:* & rei:*
+def _postgres_select(name, query, terms, limit):
+    model = SEARCH_MODELS[name]
+    document = search_document(*SEARCH_COLUMNS[name])
+    vector = search_vector(document)
+    tsquery = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+    candidates = select(model.id) \
+        .where(or_(
+            vector.op("@@")(tsquery),
+            document.self_group().op("%>")(query),  # word_similarity(query, document) above pg_trgm.word_similarity_threshold
+            document.ilike(_like_pattern(query), escape="\\"),
+        )) \
+        .limit(RANK_CANDIDATES) \
+        .subquery()
+    rank = func.ts_rank_cd(vector, tsquery) + func.word_similarity(query, document)
+    return select(*SEARCH_FIELDS[name], rank.label("rank")) \
+        .join_from(model, candidates, candidates.c.id == model.id) \
+        .order_by(rank.desc(), model.id) \
+        .limit(limit)
+
+# Same with FTS5: "dupo rei" -> "dupo"* "rei"*, bm25() is lower for better matches
+def _sqlite_select(name, query, terms, limit):
+    model = SEARCH_MODELS[name]
+    fts = literal_column(f"{name}_fts")
+    candidates = select(literal_column("rowid").label("id"), (-func.bm25(fts)).label("rank")) \
+        .select_from(table(f"{name}_fts")) \
+        .where(fts.op("MATCH")(" ".join(f'"{term}"*' for term in terms))) \
+        .limit(RANK_CANDIDATES) \
+        .subquery()
+    return select(*SEARCH_FIELDS[name], candidates.c.rank) \
+        .join_from(model, candidates, candidates.c.id == model.id) \
+        .order_by(candidates.c.rank.desc(), model.id) \
+        .limit(limit)
+
+def _row(name, row):
+    result = dict(row._mapping)
+    result["rank"] = round(float(result["rank"]), 4)
+    if name == "devis":
+        result["date"] = result["date"].isoformat()
+    return result
+
+# Ranked results of each entity, {"clients": [...], "articles": [...], "devis": [...]}
+def search(query, entities=None, limit=DEFAULT_LIMIT):
+    query = (query or "").strip()
+    entities = entities or list(SEARCH_COLUMNS)
+    unknown = set(entities) - set(SEARCH_COLUMNS)
+    if unknown:
+        raise SearchError(f"Types de recherche inconnus: {sorted(unknown)}")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise SearchError(f"limit doit être entre 1 et {MAX_LIMIT}.")
+
+    terms = _terms(query)
+    if len(query) < MIN_QUERY_LENGTH or not terms:
+        return {name: [] for name in entities}
+
+    build = _postgres_select if db.engine.dialect.name == "postgresql" else _sqlite_select
+    return {
+        name: [_row(name, row) for row in db.session.execute(build(name, query, terms, limit))]
+        for name in entities
+    }
+
+# SQLite: external content FTS5 tables over the searched columns, created with the schema
+# (db.create_all) and filled from the existing rows the first time
+def _sqlite_fts_statements(name):
+    source = SEARCH_MODELS[name].__tablename__
+    columns = [c.key for c in SEARCH_COLUMNS[name]]
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    fts = f"{name}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+@event.listens_for(db.metadata, "after_create")
+def _create_sqlite_fts(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for name in SEARCH_COLUMNS:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": f"{name}_fts"}
+        ).first()
+        if not exists:
+            for statement in _sqlite_fts_statements(name):
+                connection.execute(text(statement))
@@ -0,0 +1,189 @@
+from flask import current_app
+from models import User, Clients, Devis, Articles, DevisArticles, TauxTVA
+from typing import Optional
+from json.encoder import encode_basestring_ascii
+import datetime
+import msgspec
+import refdata
+import sqlalchemy as sa
+
+# Sérialisation JSON des réponses avec msgspec.
+# Les Struct sont générées depuis les colonnes des modèles et produisent exactement le même JSON
+# que les schémas marshmallow (mêmes champs, clés triées comme jsonify), sans passer par des dicts.
+
+_encoder = msgspec.json.Encoder()
+# Compiled field sets kept per serializer
+MAX_COMPILED = 64
+
+def _python_type(column):
+    if isinstance(column.type, sa.Boolean):
+        python_type = bool
+    elif isinstance(column.type, sa.Integer):
+        python_type = int
+    elif isinstance(column.type, sa.Float):
+        python_type = float
+    elif isinstance(column.type, sa.Date):
+        python_type = datetime.date
+    else:
+        python_type = str
+    return Optional[python_type] if column.nullable else python_type
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+# Column value read from the instance __dict__, faster than the ORM descriptor.
+# Expired attributes are not in it: getattr() loads them.
+def _getter(name):
+    def get(obj):
+        try:
+            return obj.__dict__[name]
+        except KeyError:
+            return getattr(obj, name)
+    return get
+
+def _float_getter(name):
+    get = _getter(name)
+    def get_float(obj):
+        value = get(obj)
+        return value if value.__class__ is float else _to_float(value)
+    return get_float
+
+# jsonify escapes every character past "~" as \uXXXX (ensure_ascii), msgspec writes UTF-8:
+# such strings are escaped by the json module and inserted as they are
+def _ascii(value):
+    if value.isascii() and "\x7f" not in value:
+        return value
+    return msgspec.Raw(encode_basestring_ascii(value).encode())
+
+def _text_getter(name):
+    get = _getter(name)
+    def get_text(obj):
+        value = get(obj)
+        return _ascii(value) if value is not None else None
+    return get_text
+
+def _nested_getter(get, convert):
+    def get_nested(obj):
+        value = get(obj)
+        return convert(value) if value is not None else None
+    return get_nested
+
+def _many_getter(get, convert):
+    def get_many(obj):
+        return [convert(value) for value in get(obj)]
+    return get_many
+
+# Split ("id", "client.nom") into top level fields and nested `only`
+def _split_only(only):
+    top, nested = set(), {}
+    for name in only:
+        head, _, rest = name.partition(".")
+        if rest:
+            nested.setdefault(head, set()).add(rest)
+        else:
+            top.add(head)
+    return top, nested
+
+# Dumps a model like its SQLAlchemyAutoSchema: every column but the foreign keys, plus the nested relations
+class Serializer:
+    def __init__(self, model, nested=None, computed=None):
+        self.model = model
+        self.nested = nested or {}  # relation name -> (Serializer, many[, function of the instance giving the related object])
+        self.computed = computed or {}  # field name -> (type, function of the instance)
+        self.columns = {c.key: c for c in model.__table__.columns if not c.foreign_keys}
+        self._compiled = {}  # only -> (Struct type, converter)
+
+    # Returns (Struct type, converter from a model instance), only is a frozenset of (dotted) field names
+    def compile(self, only=None):
+        compiled = self._compiled.get(only)
+        if compiled is None:
+            if len(self._compiled) >= MAX_COMPILED:
+                # ?fields= comes from the query string: the cache must not grow without bound
+                self._compiled.clear()
+            compiled = self._compiled[only] = self._compile(only)
+        return compiled
+
+    def _compile(self, only):
+        if only is None:
+            top, nested_only = set(self.columns) | set(self.nested) | set(self.computed), {}
+        else:
+            top, nested_only = _split_only(only)
+            unknown = (top | set(nested_only)) - set(self.columns) - set(self.nested) - set(self.computed)
+            if unknown:
+                raise ValueError(f"Invalid fields for {self.model.__name__}: {sorted(unknown)}")
+            top |= set(nested_only)
+
+        # One getter per field, in the Struct field order
+        fields, getters = [], []
+        for name in sorted(top):
+            if name in self.columns:
+                column = self.columns[name]
+                fields.append((name, _python_type(column)))
+                if isinstance(column.type, sa.Float):
+                    getters.append(_float_getter(name))
+                elif isinstance(column.type, sa.String):
+                    getters.append(_text_getter(name))
+                else:
+                    getters.append(_getter(name))
+            elif name in self.computed:
+                field_type, compute = self.computed[name]
+                fields.append((name, field_type))
+                getters.append(compute)
+            else:
+                serializer, many, *getter = self.nested[name]
+                sub_only = frozenset(nested_only[name]) if name in nested_only and name not in (only or ()) else None
+                struct, convert = serializer.compile(sub_only)
+                fields.append((name, list[struct] if many else Optional[struct]))
+                get = getter[0] if getter else _getter(name)
+                getters.append(_many_getter(get, convert) if many else _nested_getter(get, convert))
+
+        struct = msgspec.defstruct(f"{self.model.__name__}JSON", fields)
+        def convert(obj):
+            return struct(*[get(obj) for get in getters])
+        return struct, convert
+
+    def to_structs(self, objs, only=None):
+        _, convert = self.compile(frozenset(only) if only else None)
+        return [convert(obj) for obj in objs]
+
+    def encode(self, obj, only=None):
+        _, convert = self.compile(frozenset(only) if only else None)
+        return _encoder.encode(convert(obj))
+
+    # Same as schema.jsonify(obj)
+    def response(self, obj, only=None):
+        return json_response(self.encode(obj, only))
+
+class Page(msgspec.Struct):
+    data: list
+    has_more: bool
+    limit: int
+    next_cursor: Optional[str]
+
+def encode_page(serializer, items, meta, only=None):
+    return _encoder.encode(Page(data=serializer.to_structs(items, only), **meta))
+
+# Same as jsonify(), trailing newline included
+def json_response(body, status=200):
+    return current_app.response_class(body + b"\n", status=status, mimetype="application/json")
+
+# models.line_article(): the article of a devis line rebuilt from its snapshot columns
+class LineTauxTVA(msgspec.Struct):
+    taux: float
+
+class LineArticle(msgspec.Struct):
+    id: int
+    nom: str
+    prix_vente_HT: float
+    taux_tva: LineTauxTVA
+
+def _line_article(line):
+    return LineArticle(line.article_id, _ascii(line.nom), line.prix_vente_HT, LineTauxTVA(line.taux_tva))
+
+taux_tva_serializer = Serializer(TauxTVA)
+# The VAT rate comes from the in-process refdata cache, not from a join
+articles_serializer = Serializer(Articles, nested={"taux_tva": (taux_tva_serializer, False, lambda article: refdata.get("taux_tva", article.taux_tva_id))})
+devis_articles_serializer = Serializer(DevisArticles, computed={"article": (LineArticle, _line_article)})
+clients_serializer = Serializer(Clients)
+devis_serializer = Serializer(Devis, nested={"client": (clients_serializer, False), "articles": (devis_articles_serializer, True)})
+users_serializer = Serializer(User)
@@ -0,0 +1,70 @@
+from flask import Flask, request, jsonify
+from datetime import datetime, timezone
+import json, os, random, threading, time, uuid
+import requests
+
+# Faux serveur de signature pour le développement et les tests : python stubs/docusign_stub.py
+# Même API que le serveur DocuSign externe (POST /api/send-pdf), pointer DOCUSIGN_SERVER_IP sur http://<hôte>:5001/api
+#   STUB_LATENCY=2        secondes d'attente avant chaque réponse
+#   STUB_FAILURE_RATE=0.3 part des envois qui répondent 503
+# POST /api/envelopes/<envelope_id>/<completed|declined|voided> envoie le webhook correspondant au backend.
+
+app = Flask(__name__)
+
+LATENCY = float(os.environ.get("STUB_LATENCY", 0))
+FAILURE_RATE = float(os.environ.get("STUB_FAILURE_RATE", 0))
+
+envelopes = {}  # envelope_id -> envelope
+by_idempotency_key = {}  # Idempotency-Key -> envelope_id
+lock = threading.Lock()
+
+@app.route("/api/send-pdf", methods=["POST"])
+def send_pdf():
+    time.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        return jsonify({"error": "Service temporairement indisponible"}), 503
+
+    file = request.files.get("file")
+    callback_url = request.form.get("callback_url")
+    if not file or not callback_url or not request.form.get("signers"):
+        return jsonify({"error": "file, signers et callback_url sont requis"}), 400
+
+    key = request.headers.get("Idempotency-Key")
+    with lock:
+        # Same key, same envelope: a retried request must not create a second envelope
+        if key and key in by_idempotency_key:
+            return jsonify(envelopes[by_idempotency_key[key]]), 200
+
+        envelope_id = str(uuid.uuid4())
+        envelopes[envelope_id] = {
+            "envelope_id": envelope_id,
+            "status": "sent",
+            "signers": json.loads(request.form["signers"]),
+            "callback_url": callback_url,
+            "size": len(file.read()),
+        }
+        if key:
+            by_idempotency_key[key] = envelope_id
+    return jsonify(envelopes[envelope_id]), 201
+
+@app.route("/api/envelopes", methods=["GET"])
+def list_envelopes():
+    return jsonify(list(envelopes.values()))
+
+@app.route("/api/envelopes/<envelope_id>/<status>", methods=["POST"])
+def change_status(envelope_id, status):
+    envelope = envelopes.get(envelope_id)
+    if not envelope:
+        return jsonify({"error": "Enveloppe inconnue"}), 404
+    if status not in ("completed", "declined", "voided"):
+        return jsonify({"error": "Statut invalide"}), 400
+
+    envelope["status"] = status
+    payload = {"envelope_id": envelope_id, "status": status}
+    if status == "completed":
+        payload["signed_at"] = datetime.now(timezone.utc).isoformat()
+    response = requests.post(envelope["callback_url"], json=payload, timeout=10)
+    return jsonify({"webhook_status": response.status_code, "webhook_response": response.json()})
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.environ.get("STUB_PORT", 5001)), threaded=True)
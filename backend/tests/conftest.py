@@ -0,0 +1,41 @@
+import os, sys
+
+# Tests lancés depuis backend/ : python -m pytest
+# Base SQLite en mémoire par test, sans Redis : les caches Redis sont désactivés ou leurs erreurs ignorées.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+
+from benchmarks.common import create_bench_app
+from config import ApplicationConfig
+from models import db
+import pytest
+import refdata
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(ApplicationConfig, "RESPONSE_CACHE_TTL", 0)
+
+# Factory of apps bound to a new in-memory database, blueprints registered on demand
+@pytest.fixture
+def make_app():
+    apps = []
+    def make(*blueprints):
+        app = create_bench_app("sqlite://")
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint)
+        # The reference data of the previous database must not be reused
+        refdata._stale.set()
+        apps.append(app)
+        return app
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
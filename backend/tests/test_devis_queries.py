@@ -0,0 +1,27 @@
+from benchmarks.bench_devis_lines import count_statements
+from benchmarks.common import seed
+from routes.devis import devis_bp
+import pytest
+
+# Les routes de liste des devis chargent client et lignes en un nombre fixe de requêtes (pas de N+1)
+
+DEVIS = 40
+LINES = 5
+
+def _statements(make_app, devis, url):
+    app = make_app(devis_bp)
+    client = app.test_client()
+    with app.app_context():
+        # A single client: /api/devis/client/1 returns every devis
+        seed(clients=1, devis=devis, lines_per_devis=LINES, articles=20)
+        # Loads the reference data, counted once per process and not per request
+        assert client.get(url).status_code == 200
+        responses = []
+        statements = count_statements(lambda: responses.append(client.get(url)))
+    assert responses[0].status_code == 200
+    assert len(responses[0].json["data"]) == devis
+    return statements
+
+@pytest.mark.parametrize("url", ["/api/devis/all?limit=500", "/api/devis/client/1?limit=500"])
+def test_query_count_does_not_depend_on_devis_count(make_app, url):
+    assert _statements(make_app, DEVIS, url) == _statements(make_app, DEVIS * 10, url)
@@ -0,0 +1,114 @@
+from config import ApplicationConfig
+from models import db, Devis, DocusignOutbox
+from benchmarks.common import seed
+from docusign_outbox import enqueue_send, create_http_session, dispatch_due, send_entry, claim_due
+from stubs import docusign_stub
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from werkzeug.datastructures import FileStorage
+from werkzeug.serving import make_server
+import io, threading
+import pytest
+
+# Envoi des demandes de signature par le dispatcher contre le faux serveur stubs/docusign_stub.py
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(docusign_stub, "envelopes", {})
+    monkeypatch.setattr(docusign_stub, "by_idempotency_key", {})
+    monkeypatch.setattr(docusign_stub, "FAILURE_RATE", 0)
+    server = make_server("127.0.0.1", 0, docusign_stub.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(ApplicationConfig, "DOCUSIGN_SERVER_IP", f"http://127.0.0.1:{server.server_port}/api")
+    monkeypatch.setattr(ApplicationConfig, "DOCUSIGN_BACKOFF_BASE", 5)
+    yield docusign_stub
+    server.shutdown()
+    thread.join()
+
+@pytest.fixture
+def dispatch(app):
+    http = create_http_session()
+    with ThreadPoolExecutor(ApplicationConfig.DOCUSIGN_DISPATCH_CONCURRENCY) as executor:
+        yield lambda: dispatch_due(http, executor)
+
+def _enqueue(devis_id):
+    devis = db.session.get(Devis, devis_id)
+    file = FileStorage(io.BytesIO(b"%PDF-1.7 devis"), filename=f"devis_{devis_id}.pdf", content_type="application/pdf")
+    return enqueue_send(devis, devis.client, file).id
+
+@pytest.fixture
+def devis_ids(app):
+    seed(clients=2, devis=2, lines_per_devis=1, articles=2)
+    db.session.execute(db.update(Devis).values(statut="Non signé", envelope_id=None))
+    db.session.commit()
+    return [devis.id for devis in Devis.query.order_by(Devis.id)]
+
+def test_send_updates_devis(stub, dispatch, devis_ids):
+    entry_id = _enqueue(devis_ids[0])
+    assert dispatch() == 1
+
+    entry = db.session.get(DocusignOutbox, entry_id)
+    devis = db.session.get(Devis, devis_ids[0])
+    assert entry.statut == "sent" and entry.attempts == 1 and entry.pdf is None
+    assert entry.envelope_id in stub.envelopes
+    assert devis.envelope_id == entry.envelope_id
+    assert devis.statut == "En attente de signature"
+    assert stub.by_idempotency_key == {entry.idempotency_key: entry.envelope_id}
+    assert dispatch() == 0
+
+def test_failed_send_is_retried_with_backoff(stub, dispatch, devis_ids, monkeypatch):
+    entry_id = _enqueue(devis_ids[0])
+    monkeypatch.setattr(stub, "FAILURE_RATE", 1)
+    before = datetime.now()
+    assert dispatch() == 1
+
+    entry = db.session.get(DocusignOutbox, entry_id)
+    assert entry.statut == "pending" and entry.attempts == 1
+    assert entry.last_error.startswith("HTTP 503")
+    # BACKOFF_BASE * 2^0 with jitter between 50 and 100%
+    assert before + timedelta(seconds=2.5) <= entry.next_attempt_at <= datetime.now() + timedelta(seconds=5)
+    assert db.session.get(Devis, devis_ids[0]).envelope_id is None
+    # Not due yet
+    assert dispatch() == 0
+
+    monkeypatch.setattr(stub, "FAILURE_RATE", 0)
+    entry.next_attempt_at = datetime.now()
+    db.session.commit()
+    assert dispatch() == 1
+
+    entry = db.session.get(DocusignOutbox, entry_id)
+    assert entry.statut == "sent" and entry.attempts == 2 and entry.last_error is None
+    assert db.session.get(Devis, devis_ids[0]).envelope_id == entry.envelope_id
+    assert len(stub.envelopes) == 1
+
+def test_backoff_doubles_until_max_attempts(stub, dispatch, devis_ids, monkeypatch):
+    monkeypatch.setattr(ApplicationConfig, "DOCUSIGN_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(stub, "FAILURE_RATE", 1)
+    entry_id = _enqueue(devis_ids[0])
+    delays = []
+    for _ in range(3):
+        before = datetime.now()
+        assert dispatch() == 1
+        entry = db.session.get(DocusignOutbox, entry_id)
+        delays.append((entry.next_attempt_at - before).total_seconds())
+        entry.next_attempt_at = datetime.now()
+        db.session.commit()
+
+    assert entry.statut == "failed" and entry.attempts == 3
+    assert 2.5 <= delays[0] <= 5.5 and 5 <= delays[1] <= 10.5
+    assert dispatch() == 0
+
+# The response was lost (timeout, dispatcher killed): the entry is sent again with the same key
+def test_idempotency_key_prevents_duplicate_envelopes(stub, devis_ids):
+    first, second = _enqueue(devis_ids[0]), _enqueue(devis_ids[1])
+    claimed = claim_due(10)
+    assert len({entry["idempotency_key"] for entry in claimed}) == 2
+
+    http = create_http_session()
+    envelopes = [send_entry(http, entry) for entry in claimed + claimed]
+    assert [outcome for outcome, _, _ in envelopes] == ["sent"] * 4
+    assert envelopes[0][1] == envelopes[2][1] and envelopes[1][1] == envelopes[3][1]
+    assert envelopes[0][1] != envelopes[1][1]
+    assert len(stub.envelopes) == 2
+    assert {db.session.get(DocusignOutbox, entry_id).idempotency_key for entry_id in (first, second)} == set(stub.by_idempotency_key)
@@ -0,0 +1,96 @@
+from models import db, Devis, DocusignEvent
+from benchmarks.common import seed
+from docusign_events import MATCH_WINDOW, record_event, apply_pending_events
+from datetime import date, datetime
+import pytest
+
+# Application des webhooks DocuSign par lots : la transition la plus avancée gagne, un devis ne recule jamais
+
+@pytest.fixture
+def devis_ids(app):
+    seed(clients=2, devis=3, lines_per_devis=1, articles=2)
+    for devis in Devis.query:
+        devis.statut = "En attente de signature"
+        devis.envelope_id = f"env-{devis.id}"
+        devis.date_paiement = None
+    db.session.commit()
+    return [devis.id for devis in Devis.query.order_by(Devis.id)]
+
+def _devis(devis_id):
+    db.session.expire_all()
+    return db.session.get(Devis, devis_id)
+
+def _event(envelope_id, status):
+    return DocusignEvent.query.filter_by(envelope_id=envelope_id, status=status).one()
+
+def test_furthest_transition_wins_in_a_batch(devis_ids):
+    devis_id = devis_ids[0]
+    record_event(f"env-{devis_id}", "completed", signed_at="2026-03-01T10:00:00Z")
+    record_event(f"env-{devis_id}", "sent", event_timestamp="2026-03-02T10:00:00Z")
+    assert apply_pending_events() == 2
+
+    devis = _devis(devis_id)
+    assert devis.statut == "Signé" and devis.date_paiement == date(2026, 3, 1)
+    assert _event(f"env-{devis_id}", "completed").applied
+    assert not _event(f"env-{devis_id}", "sent").applied
+
+def test_late_event_does_not_move_devis_back(devis_ids):
+    devis_id = devis_ids[0]
+    record_event(f"env-{devis_id}", "completed", signed_at="2026-03-01T10:00:00Z")
+    apply_pending_events()
+    for status in ("sent", "delivered", "declined"):
+        record_event(f"env-{devis_id}", status, event_timestamp="2026-03-05T10:00:00Z")
+    assert apply_pending_events() == 3
+
+    devis = _devis(devis_id)
+    assert devis.statut == "Signé" and devis.date_paiement == date(2026, 3, 1)
+    assert DocusignEvent.query.filter_by(applied=True).count() == 1
+
+def test_replayed_event_is_ignored(devis_ids):
+    devis_id = devis_ids[0]
+    assert record_event(f"env-{devis_id}", "completed", signed_at="2026-03-01T10:00:00Z")
+    assert not record_event(f"env-{devis_id}", "completed", signed_at="2026-03-01T10:00:00Z")
+    assert apply_pending_events() == 1
+    assert not record_event(f"env-{devis_id}", "completed", signed_at="2026-03-01T10:00:00Z")
+    assert apply_pending_events() == 0
+    assert DocusignEvent.query.count() == 1
+
+@pytest.mark.parametrize("status", ["sent", "completed", "voided"])
+def test_paid_devis_is_not_changed(devis_ids, status):
+    devis_id = devis_ids[0]
+    devis = _devis(devis_id)
+    devis.statut = "Payé"
+    devis.date_paiement = date(2026, 2, 15)
+    db.session.commit()
+    signed_at = "2026-03-01T10:00:00Z" if status == "completed" else None
+    record_event(f"env-{devis_id}", status, event_timestamp="2026-03-01T10:00:00Z", signed_at=signed_at)
+    assert apply_pending_events() == 1
+
+    devis = _devis(devis_id)
+    assert devis.statut == "Payé" and devis.date_paiement == date(2026, 2, 15)
+    assert not _event(f"env-{devis_id}", status).applied
+
+def test_unknown_envelope_waits_without_blocking_newer_events(devis_ids):
+    record_event("env-unknown", "completed")
+    record_event(f"env-{devis_ids[1]}", "declined")
+    # The event of the unknown envelope comes first, a batch of one still reaches the next event
+    assert apply_pending_events(limit=1) == 1
+    assert _devis(devis_ids[1]).statut == "Refusé"
+    assert apply_pending_events(limit=1) == 0
+    assert _event("env-unknown", "completed").processed_at is None
+
+    # The send is recorded after the webhook
+    _devis(devis_ids[2]).envelope_id = "env-unknown"
+    db.session.commit()
+    assert apply_pending_events() == 1
+    assert _devis(devis_ids[2]).statut == "Signé"
+
+def test_unknown_envelope_is_dropped_after_match_window(devis_ids):
+    record_event("env-unknown", "completed")
+    event = _event("env-unknown", "completed")
+    event.received_at = datetime.now() - MATCH_WINDOW
+    db.session.commit()
+    assert apply_pending_events() == 1
+
+    event = _event("env-unknown", "completed")
+    assert event.processed_at is not None and not event.applied
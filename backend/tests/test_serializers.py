@@ -0,0 +1,74 @@
+from flask import jsonify
+from models import db, User, Clients, Articles, TauxTVA, Devis, DevisArticles, devis_with_relations
+from models import UserSchema, ClientsSchema, ArticlesSchema, DevisSchema
+from serializers import devis_serializer, clients_serializer, articles_serializer, users_serializer, encode_page, json_response
+from datetime import date
+import pytest
+
+# Les sérialiseurs msgspec doivent produire exactement les octets des schémas marshmallow qu'ils remplacent
+
+@pytest.fixture
+def data(app):
+    taux = [TauxTVA(taux=0.2), TauxTVA(taux=0.055)]
+    client = Clients(nom="Lefèvre", prenom="Zoé", rue="3 rue de l'Église", ville="Châlons-en-Champagne",
+                     code_postal="51000", telephone="03 26 00 00 00", email="zoé@exemple.fr", caduque=False)
+    db.session.add_all([*taux, client])
+    db.session.flush()
+    articles = [
+        Articles(nom="Câble 2,5 mm²", description="Rouleau de 100 m — « norme NF »", prix_achat_HT=42.1,
+                 prix_vente_HT=0.1 + 0.2, taux_tva_id=taux[0].id),
+        Articles(nom="Main d'œuvre", description="", prix_achat_HT=0, prix_vente_HT=45, taux_tva_id=taux[1].id),
+    ]
+    db.session.add_all(articles)
+    db.session.flush()
+    devis = [
+        Devis(client_id=client.id, titre="Rénovation électrique — été 2026 ✓ 🔌", description="Tableau, prises et éclairage",
+              date=date(2026, 6, 1), montant_HT=1000.0, montant_TVA=200.0, montant_TTC=1200.0, statut="Non signé"),
+        Devis(client_id=client.id, titre="Dépannage", description=None, date=date(2026, 7, 14),
+              montant_HT=45.0, montant_TVA=2.475, montant_TTC=47.475, statut="Payé", date_paiement=date(2026, 7, 20),
+              envelope_id="env-1"),
+        # No lines
+        Devis(client_id=client.id, titre="Vide", description="", date=date(2026, 8, 1),
+              montant_HT=0.0, montant_TVA=0.0, montant_TTC=0.0, statut="Non signé"),
+    ]
+    db.session.add_all(devis)
+    db.session.flush()
+    db.session.add_all([
+        DevisArticles(devis_id=devis[0].id, article_id=articles[0].id, quantite=3, nom=articles[0].nom,
+                      prix_vente_HT=articles[0].prix_vente_HT, taux_tva=0.2),
+        DevisArticles(devis_id=devis[0].id, article_id=articles[1].id, quantite=1, nom=articles[1].nom,
+                      prix_vente_HT=45.0, taux_tva=0.055),
+        DevisArticles(devis_id=devis[1].id, article_id=articles[1].id, quantite=1, nom=articles[1].nom,
+                      prix_vente_HT=45.0, taux_tva=0.055),
+    ])
+    db.session.add(User(nom="Müller", prenom="Éloïse", email="éloïse@exemple.fr", mdp="$2b$04$hash", role="Administrateur"))
+    db.session.commit()
+    db.session.expunge_all()
+
+def _pages(schema, serializer, items):
+    meta = {"next_cursor": "Mg", "has_more": True, "limit": len(items)}
+    return jsonify(data=schema(many=True).dump(items), **meta).get_data(), json_response(encode_page(serializer, items, meta)).get_data()
+
+@pytest.mark.parametrize("schema, serializer, query", [
+    (DevisSchema, devis_serializer, lambda: devis_with_relations().order_by(Devis.id)),
+    (ClientsSchema, clients_serializer, lambda: Clients.query.order_by(Clients.id)),
+    (ArticlesSchema, articles_serializer, lambda: Articles.query.order_by(Articles.id)),
+    (UserSchema, users_serializer, lambda: User.query.order_by(User.id)),
+])
+def test_serializer_matches_schema(data, schema, serializer, query):
+    items = query().all()
+    expected, actual = _pages(schema, serializer, items)
+    assert actual == expected
+    for item in items:
+        assert serializer.response(item).get_data() == schema().jsonify(item).get_data()
+
+def test_edge_cases_are_covered(data):
+    devis = {d.titre: d for d in devis_with_relations()}
+    assert devis["Rénovation électrique — été 2026 ✓ 🔌"].date_paiement is None
+    assert devis["Vide"].articles == []
+    body = devis_serializer.response(devis["Vide"]).get_data()
+    assert b'"articles":[]' in body and b'"date_paiement":null' in body
+    # Escaped like jsonify (ensure_ascii), astral characters as surrogate pairs
+    body = devis_serializer.response(devis["Rénovation électrique — été 2026 ✓ 🔌"]).get_data()
+    assert body.isascii()
+    assert b"\\u00e9t\\u00e9 2026 \\u2713 \\ud83d\\udd0c" in body
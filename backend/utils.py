@@ -1,4 +1,4 @@
-from models import TauxTVA
+import refdata
 import re
 
 # Validate user fields for database entry
@@ -44,8 +44,7 @@ def validate_article_fields(nom, description, prix_achat_HT, prix_vente_HT, taux
         return "Le prix d'achat HT ne peut pas être négatif."
     if float(prix_vente_HT) < 0:
         return "Le prix de vente HT ne peut pas être négatif."
-    taux_tva = TauxTVA.query.filter_by(id=taux_tva_id).first()
-    if not taux_tva:
+    if refdata.get("taux_tva", taux_tva_id) is None:
         return "Le taux de TVA spécifié n'existe pas."
     return None
 
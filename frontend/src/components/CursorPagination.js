@@ -0,0 +1,26 @@
+// Previous / next navigation for useCursorPagination
+function CursorPagination({ pagination }) {
+  if (!pagination.hasPrevious && !pagination.hasNext) return null;
+
+  return (
+    <nav>
+      <ul className="pagination justify-content-center">
+        <li className={`page-item ${!pagination.hasPrevious ? 'disabled' : ''}`}>
+          <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); pagination.previousPage(); }}>
+            Précédent
+          </a>
+        </li>
+        <li className="page-item active">
+          <span className="page-link">{pagination.page}</span>
+        </li>
+        <li className={`page-item ${!pagination.hasNext ? 'disabled' : ''}`}>
+          <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); pagination.nextPage(); }}>
+            Suivant
+          </a>
+        </li>
+      </ul>
+    </nav>
+  );
+}
+
+export default CursorPagination;
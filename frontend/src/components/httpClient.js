@@ -1,5 +1,19 @@
 import axios from 'axios'
 
-export default axios.create({
+const httpClient = axios.create({
     withCredentials: true,
-});
\ No newline at end of file
+});
+
+// Fetch every page of a paginated list route (next_cursor / has_more)
+export const fetchAllPages = async (url, params = {}) => {
+    let items = [];
+    let cursor = null;
+    do {
+        const resp = await httpClient.get(url, { params: { ...params, limit: 500, ...(cursor ? { cursor } : {}) } });
+        items = items.concat(resp.data.data || []);
+        cursor = resp.data.has_more ? resp.data.next_cursor : null;
+    } while (cursor);
+    return items;
+};
+
+export default httpClient;
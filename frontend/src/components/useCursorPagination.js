@@ -0,0 +1,63 @@
+import { useCallback, useEffect, useState } from "react";
+import httpClient from "./httpClient";
+
+// Keyset pagination on the backend list routes (?limit=&cursor= -> next_cursor / has_more)
+function useCursorPagination(url, params, onError) {
+  const [items, setItems] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [cursors, setCursors] = useState([null]); // Cursor of every visited page
+  const [nextCursor, setNextCursor] = useState(null);
+  const paramsKey = JSON.stringify(params);
+
+  const fetchPage = useCallback(async (cursor) => {
+    try {
+      const resp = await httpClient.get(url, { params: { ...JSON.parse(paramsKey), ...(cursor ? { cursor } : {}) } });
+      setItems(resp.data.data || []);
+      setNextCursor(resp.data.has_more ? resp.data.next_cursor : null);
+    } catch (error) {
+      setItems([]);
+      setNextCursor(null);
+      if (onError) onError(error);
+    } finally {
+      setLoading(false);
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [url, paramsKey]);
+
+  // Back to the first page when the filters change (debounced for the search input)
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setCursors([null]);
+      fetchPage(null);
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [fetchPage]);
+
+  const nextPage = () => {
+    if (!nextCursor) return;
+    setCursors([...cursors, nextCursor]);
+    fetchPage(nextCursor);
+  };
+
+  const previousPage = () => {
+    if (cursors.length < 2) return;
+    const previous = cursors.slice(0, -1);
+    setCursors(previous);
+    fetchPage(previous[previous.length - 1]);
+  };
+
+  const reload = () => fetchPage(cursors[cursors.length - 1]);
+
+  return {
+    items,
+    loading,
+    page: cursors.length,
+    hasNext: nextCursor !== null,
+    hasPrevious: cursors.length > 1,
+    nextPage,
+    previousPage,
+    reload,
+  };
+}
+
+export default useCursorPagination;
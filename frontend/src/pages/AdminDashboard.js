@@ -1,12 +1,13 @@
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import httpClient from "../components/httpClient";
+import useCursorPagination from "../components/useCursorPagination";
+import CursorPagination from "../components/CursorPagination";
 import bootstrap from "bootstrap/dist/js/bootstrap.js";
 
 function AdminDashboard() {
   const navigate = useNavigate();
 
-  const [users, setUsers] = useState();
   const [new_prenom, setNewFirstName] = useState("");
   const [new_nom, setNewLastName] = useState("");
   const [new_email, setNewEmail] = useState("");
@@ -68,21 +69,17 @@ function AdminDashboard() {
     return true;
   };
 
-  // ### Fetch all users from the backend ###
-  const getAllUsersInfo = async () => {
-    httpClient
-      .get(`${process.env.REACT_APP_BACKEND_URL}/admin/all-user`)
-      .then((resp) => {
-        setUsers(resp.data);
-      })
-      .catch((error) => {
-        if (error.response && error.response.data && error.response.data.error) {
-          alert(error.response.data.error);
-        } else {
-          alert("Une erreur est survenue.");
-        }
-      });
-  };
+  // ### Fetch the users of the current page from the backend ###
+  const pagination = useCursorPagination(`${process.env.REACT_APP_BACKEND_URL}/admin/all-user`, {
+    fields: "id,nom,prenom,email,role",
+  }, (error) => {
+    if (error.response && error.response.data && error.response.data.error) {
+      alert(error.response.data.error);
+    } else {
+      alert("Une erreur est survenue.");
+    }
+  });
+  const users = pagination.items;
 
   // ### Add a new user to the database ###
   const addNewUser = async (e) => {
@@ -109,7 +106,7 @@ function AdminDashboard() {
         .then((resp) => {
           console.log(resp);
           handleClose();
-          getAllUsersInfo();
+          pagination.reload();
         })
         .catch((error) => {
           if (error.response && error.response.data && error.response.data.error) {
@@ -152,10 +149,6 @@ function AdminDashboard() {
     setPasswordError("");
   };
 
-  useEffect(() => {
-    getAllUsersInfo();
-  }, []);
-
   return (
     <div>
       <div>
@@ -223,8 +216,8 @@ function AdminDashboard() {
           </tr>
         </thead>
         <tbody>
-          {users !== undefined ? (
-            users.data.map((user) => (
+          {!pagination.loading ? (
+            users.map((user) => (
               <tr key={user.id} onClick={() => {
                 navigate({ pathname: `/admin/manage-user/` + user.id });
               }}>
@@ -242,6 +235,7 @@ function AdminDashboard() {
           )}
         </tbody>
       </table>
+      <CursorPagination pagination={pagination} />
     </div>
   );
 }
@@ -1,12 +1,10 @@
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import httpClient from "../components/httpClient";
+import useCursorPagination from "../components/useCursorPagination";
+import CursorPagination from "../components/CursorPagination";
 import bootstrap from "bootstrap/dist/js/bootstrap.js";
 
 function ListeArticles() {
-  const [loading, setLoading] = useState(true);
-
-  const [articles, setArticles] = useState([]);
-
   const [form_submited, setFormSubmited] = useState(false);
   const [article_nom, setArticleNom] = useState(null);
   const [article_description, setArticleDescription] = useState(null);
@@ -25,12 +23,25 @@ function ListeArticles() {
   const [DELETE, setDELETE] = useState(false);
   const [CREATE, setCREATE] = useState(false);
 
-  // Filter and Pagination state
-  const [filteredArticles, setFilteredArticles] = useState([]);
-  const [paginatedArticles, setPaginatedArticles] = useState([]);
+  // Filter and Pagination state (done by the backend)
   const [searchTerm, setSearchTerm] = useState("");
-  const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10);
+
+  // ### Fetch the articles of the current page from the backend ###
+  const pagination = useCursorPagination(`${process.env.REACT_APP_BACKEND_URL}/articles/all`, {
+    limit: itemsPerPage,
+    ...(searchTerm ? { q: searchTerm } : {}),
+  }, (error) => {
+    if (error.response && error.response.data && error.response.data.error) {
+      if (error.response.data.error !== "Aucuns articles trouvé") {
+        alert("Une erreur est survenue.");
+      }
+    } else {
+      alert("Une erreur est survenue.");
+    }
+  });
+  const paginatedArticles = pagination.items;
+  const loading = pagination.loading;
   
   // ### User input validation ###
   const articleNomVerif = async (value) => {
@@ -115,7 +126,7 @@ function ListeArticles() {
         .then((resp) => {
           console.log(resp);
           handleClose();
-          getAllArticles();
+          pagination.reload();
         })
         .catch((error) => {
           if (error.response && error.response.data && error.response.data.error) {
@@ -175,7 +186,7 @@ function ListeArticles() {
         .then((resp) => {
           console.log(resp);
           handleClose();
-          getAllArticles();
+          pagination.reload();
         })
         .catch((error) => {
           if (error.response && error.response.data && error.response.data.error) {
@@ -204,7 +215,7 @@ function ListeArticles() {
       .then((resp) => {
         console.log(resp);
         handleClose();
-        getAllArticles();
+        pagination.reload();
       })
       .catch((error) => {
         if (error.response && error.response.data && error.response.data.error) {
@@ -217,27 +228,6 @@ function ListeArticles() {
       });
   }
 
-  const getAllArticles = async () => {
-    try {
-        const resp = await httpClient.get(`${process.env.REACT_APP_BACKEND_URL}/articles/all`);
-        setArticles(resp.data.data || []);
-        setFilteredArticles(resp.data.data || []);
-    } catch (error) {
-        if (error.response && error.response.data && error.response.data.error) {
-            if (error.response.data.error === "Aucuns articles trouvé") {
-                setArticles([]);
-                setFilteredArticles([]);
-            } else {
-                alert("Une erreur est survenue.");
-            }
-        } else {
-            alert("Une erreur est survenue.");
-        }
-    } finally {
-        setLoading(false);
-    }
-  }
-
   const handleClose = () => {
     // Close modal
     const popup = document.getElementById("popup");
@@ -270,40 +260,6 @@ function ListeArticles() {
     setDELETE(false);
   };
 
-  // ### Fetch all articles on page load ###
-  useEffect(() => {
-    getAllArticles();
-  }, []);
-
-  // ### Filter Logic ###
-  useEffect(() => {
-    let currentArticles = articles;
-
-    if (searchTerm) {
-        currentArticles = currentArticles.filter(art => 
-            art.nom.toLowerCase().includes(searchTerm.toLowerCase()) ||
-            art.description.toLowerCase().includes(searchTerm.toLowerCase())
-        );
-    }
-
-    setFilteredArticles(currentArticles);
-    setCurrentPage(1);
-  }, [articles, searchTerm]);
-
-  // ### Pagination Logic ###
-  useEffect(() => {
-    if (filteredArticles) {
-      const startIndex = (currentPage - 1) * itemsPerPage;
-      const endIndex = startIndex + itemsPerPage;
-      setPaginatedArticles(filteredArticles.slice(startIndex, endIndex));
-    }
-  }, [filteredArticles, currentPage, itemsPerPage]);
-
-  // Reset to page 1 when itemsPerPage changes
-  useEffect(() => {
-    setCurrentPage(1);
-  }, [itemsPerPage]);
-
   if (loading) return <div>Chargement...</div>;
   
   return (
@@ -439,29 +395,7 @@ function ListeArticles() {
         </tbody>
       </table>
 
-      {filteredArticles.length > itemsPerPage && (
-        <nav>
-          <ul className="pagination justify-content-center">
-            <li className={`page-item ${currentPage === 1 ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage - 1); }}>
-                Précédent
-              </a>
-            </li>
-            {Array.from({ length: Math.ceil(filteredArticles.length / itemsPerPage) }, (_, i) => i + 1).map(number => (
-              <li key={number} className={`page-item ${currentPage === number ? 'active' : ''}`}>
-                <a onClick={(e) => { e.preventDefault(); setCurrentPage(number); }} href="!#" className='page-link'>
-                  {number}
-                </a>
-              </li>
-            ))}
-            <li className={`page-item ${currentPage >= Math.ceil(filteredArticles.length / itemsPerPage) ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage + 1); }}>
-                Suivant
-              </a>
-            </li>
-          </ul>
-        </nav>
-      )}
+      <CursorPagination pagination={pagination} />
     </div>
   );
 }
@@ -1,7 +1,7 @@
 import { useParams } from "react-router";
 import { useNavigate } from "react-router-dom";
 import { useEffect, useState } from "react";
-import httpClient from "../components/httpClient";
+import httpClient, { fetchAllPages } from "../components/httpClient";
 import bootstrap from "bootstrap/dist/js/bootstrap.js";
 
 function Client() {
@@ -224,10 +224,9 @@ function Client() {
   }
 
   const getClientAllDevis = async () => {
-    httpClient
-      .get(`${process.env.REACT_APP_BACKEND_URL}/devis/client/${client_id.id}`)
-      .then((resp) => {
-        setDevis(resp.data.data);
+    fetchAllPages(`${process.env.REACT_APP_BACKEND_URL}/devis/client/${client_id.id}`)
+      .then((items) => {
+        setDevis(items);
       })
       .catch((error) => {
         if (error.response && error.response.data && error.response.data.error) {
@@ -1,7 +1,7 @@
 import { useParams } from "react-router";
 import { useLocation, useNavigate } from "react-router-dom";
 import { useEffect, useState } from "react";
-import httpClient from "../components/httpClient";
+import httpClient, { fetchAllPages } from "../components/httpClient";
 import bootstrap from "bootstrap/dist/js/bootstrap.js";
 import trashCan from "../assets/trash3-fill.svg";
 
@@ -348,10 +348,9 @@ function Devis() {
   }
 
   const getAllArticles = async () => {
-    httpClient
-      .get(`${process.env.REACT_APP_BACKEND_URL}/articles/all`)
-      .then((resp) => {
-        setArticles(resp.data);
+    fetchAllPages(`${process.env.REACT_APP_BACKEND_URL}/articles/all`)
+      .then((items) => {
+        setArticles({ data: items });
       })
       .catch((error) => {
         if (error.response && error.response.data && error.response.data.error) {
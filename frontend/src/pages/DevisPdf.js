@@ -26,6 +26,24 @@ function DevisPdfPreview() {
       });
   }
 
+  // Poll the outbox entry until the dispatcher has sent (or given up on) the document
+  const waitForSend = (outboxId, delay = 2000) => {
+    setTimeout(() => {
+      httpClient
+        .get(`${process.env.REACT_APP_BACKEND_URL}/devis/pdf/send/external/status/${outboxId}`)
+        .then((resp) => {
+          if (resp.data.statut === "sent") {
+            alert(`Document envoyé pour signature ! Envelope ID: ${resp.data.envelope_id}`);
+          } else if (resp.data.statut === "failed") {
+            alert("L'envoi du document pour signature a échoué.");
+          } else {
+            waitForSend(outboxId, Math.min(delay * 2, 30000));
+          }
+        })
+        .catch(() => {});
+    }, delay);
+  };
+
   const handleSendToDocuSign = () => {
     if(!pdfBlob) return alert("PDF non disponible.");
 
@@ -35,7 +53,9 @@ function DevisPdfPreview() {
     httpClient
       .post(`${process.env.REACT_APP_BACKEND_URL}/devis/pdf/send/external/${id_client}/${id_devis}`,formData)
       .then((resp) => {
-        alert(`Document envoyé pour signature ! Envelope ID: ${resp.data.envelope_id}`);
+        // 202: the send is queued and done in the background
+        alert("Document en cours d'envoi pour signature, le statut du devis sera mis à jour une fois l'envoi effectué.");
+        waitForSend(resp.data.id);
       })
       .catch((error) => {
         if (error.response && error.response.data && error.response.data.error) {
@@ -1,13 +1,12 @@
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import httpClient from "../components/httpClient";
+import useCursorPagination from "../components/useCursorPagination";
+import CursorPagination from "../components/CursorPagination";
 import bootstrap from "bootstrap/dist/js/bootstrap.js";
 
 function ListeClients() {
   const navigate = useNavigate();
-  const [loading, setLoading] = useState(true);
-
-  const [clients, setclients] = useState();
   const [prenom, setFirstName] = useState("");
   const [nom, setLastName] = useState("");
   const [rue, setRue] = useState("");
@@ -27,15 +26,12 @@ function ListeClients() {
 
   const [modeFORCE, setModeFORCE] = useState(false);
 
-  // Filter state
-  const [filteredClients, setFilteredClients] = useState([]);
+  // Filter state (done by the backend)
   const [searchTerm, setSearchTerm] = useState("");
   const [caduqueFilter, setCaduqueFilter] = useState("active");
 
   // Pagination state
-  const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10); // Items to display per page
-  const [paginatedClients, setPaginatedClients] = useState([]);
 
 
   // Automatically format French phone number as "01 23 45 67 89"
@@ -125,27 +121,22 @@ function ListeClients() {
     return true;
   };
 
-  // ### Fetch all clients from the backend ###
-  const getAllUsersInfo = async () => {
-    httpClient
-      .get(`${process.env.REACT_APP_BACKEND_URL}/clients/all`)
-      .then((resp) => {
-        setclients(resp.data);
-        setFilteredClients(resp.data.data || []);
-      })
-      .catch((error) => {
-        if (error.response && error.response.data && error.response.data.error) {
-          if (error.response.data.error !== "Aucun clients trouvé") {
-            alert(error.response.data.error);
-          } else {
-            setclients({ data: [] }); // Ensure clients.data is not undefined
-            setFilteredClients([]);
-          }
-        } else {
-          alert("Une erreur est survenue.");
-        }
-      });
-  };
+  // ### Fetch the clients of the current page from the backend ###
+  const pagination = useCursorPagination(`${process.env.REACT_APP_BACKEND_URL}/clients/all`, {
+    limit: itemsPerPage,
+    ...(searchTerm ? { q: searchTerm } : {}),
+    ...(caduqueFilter !== "all" ? { caduque: caduqueFilter === "caduque" } : {}),
+  }, (error) => {
+    if (error.response && error.response.data && error.response.data.error) {
+      if (error.response.data.error !== "Aucun clients trouvé") {
+        alert(error.response.data.error);
+      }
+    } else {
+      alert("Une erreur est survenue.");
+    }
+  });
+  const paginatedClients = pagination.items;
+  const loading = pagination.loading;
 
   // ### Add a new client to the database ###
   const addNewClient = async (e, forceValue = false) => {
@@ -177,7 +168,7 @@ function ListeClients() {
         .then((resp) => {
           console.log(resp);
           handleClose();
-          getAllUsersInfo();
+          pagination.reload();
         })
         .catch((error) => {
           if (error.response && error.response.data && error.response.data.error) {
@@ -237,52 +228,6 @@ function ListeClients() {
     setModeFORCE(false);
   };
 
-  useEffect(() => {
-    getAllUsersInfo();
-    setLoading(false);
-  }, []);
-
-  // ### Filter logic ###
-  useEffect(() => {
-    if (clients && clients.data) {
-      let currentClients = clients.data;
-
-      // Search term filter
-      if (searchTerm) {
-        currentClients = currentClients.filter(client =>
-          client.nom.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          client.prenom.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          client.email.toLowerCase().includes(searchTerm.toLowerCase())
-        );
-      }
-
-      // Caduque filter
-      if (caduqueFilter === 'caduque') {
-        currentClients = currentClients.filter(client => client.caduque);
-      } else if (caduqueFilter === 'active') {
-        currentClients = currentClients.filter(client => !client.caduque);
-      }
-
-      setFilteredClients(currentClients);
-      setCurrentPage(1); // Reset to first page on new filter
-    }
-  }, [clients, searchTerm, caduqueFilter]);
-
-  // ### Pagination Logic ###
-  useEffect(() => {
-    if (filteredClients) {
-      const startIndex = (currentPage - 1) * itemsPerPage;
-      const endIndex = startIndex + itemsPerPage;
-      setPaginatedClients(filteredClients.slice(startIndex, endIndex));
-    }
-  }, [filteredClients, currentPage, itemsPerPage]);
-
-  // Reset to page 1 when itemsPerPage changes
-  useEffect(() => {
-    setCurrentPage(1);
-  }, [itemsPerPage]);
-
-
   if (loading) return <div>Chargement...</div>;
 
   return (
@@ -427,25 +372,7 @@ function ListeClients() {
       </table>
       
       {/* START: Pagination Controls */}
-      {filteredClients.length > itemsPerPage && (
-        <nav>
-          <ul className="pagination justify-content-center">
-            <li className={`page-item ${currentPage === 1 ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage - 1); }}>Précédent</a>
-            </li>
-            {Array.from({ length: Math.ceil(filteredClients.length / itemsPerPage) }, (_, i) => i + 1).map(number => (
-              <li key={number} className={`page-item ${currentPage === number ? 'active' : ''}`}>
-                <a onClick={(e) => { e.preventDefault(); setCurrentPage(number); }} href="!#" className='page-link'>
-                  {number}
-                </a>
-              </li>
-            ))}
-            <li className={`page-item ${currentPage >= Math.ceil(filteredClients.length / itemsPerPage) ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage + 1); }}>Suivant</a>
-            </li>
-          </ul>
-        </nav>
-      )}
+      <CursorPagination pagination={pagination} />
       {/* END: Pagination Controls */}
     </div>
   );
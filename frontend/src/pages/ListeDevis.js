@@ -1,78 +1,36 @@
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { useNavigate } from "react-router-dom";
-import httpClient from "../components/httpClient";
+import useCursorPagination from "../components/useCursorPagination";
+import CursorPagination from "../components/CursorPagination";
+
+// Columns displayed in the list
+const LIST_FIELDS = "id,titre,description,date,montant_HT,montant_TVA,montant_TTC,statut,client.id,client.nom,client.prenom";
 
 function ListeDevis() {
-  const [loading, setLoading] = useState(true)
   const navigate = useNavigate();
-  const [devis, setDevis] = useState([])
 
-  // Filter and Pagination state
-  const [filteredDevis, setFilteredDevis] = useState([]);
-  const [paginatedDevis, setPaginatedDevis] = useState([]);
+  // Filter and Pagination state (done by the backend)
   const [searchTerm, setSearchTerm] = useState("");
   const [statusFilter, setStatusFilter] = useState("all");
-  const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10);
 
-  // ### Fetch all devis from all clients from the backend ###
-  const getEveryDevis = async () => {
-    try {
-      const resp = await httpClient.get(`${process.env.REACT_APP_BACKEND_URL}/devis/all`);
-      setDevis(resp.data.data || []);
-      setFilteredDevis(resp.data.data || []);
-    } catch (error) {
-      if (error.response && error.response.data && error.response.data.error) {
-        if (error.response.data.error !== "Aucuns devis trouvé") {
-          alert(error.response.data.error);
-        }
-      } else {
-        alert("Une erreur est survenue.");
+  // ### Fetch the devis of the current page from the backend ###
+  const pagination = useCursorPagination(`${process.env.REACT_APP_BACKEND_URL}/devis/all`, {
+    limit: itemsPerPage,
+    fields: LIST_FIELDS,
+    ...(searchTerm ? { q: searchTerm } : {}),
+    ...(statusFilter !== "all" ? { statut: statusFilter } : {}),
+  }, (error) => {
+    if (error.response && error.response.data && error.response.data.error) {
+      if (error.response.data.error !== "Aucuns devis trouvé") {
+        alert(error.response.data.error);
       }
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    getEveryDevis();
-  }, []);
-
-  // ### Filter logic ###
-  useEffect(() => {
-    let currentDevis = devis;
-
-    // Search term filter
-    if (searchTerm) {
-      currentDevis = currentDevis.filter(d =>
-        d.titre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        d.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        `${d.client.prenom} ${d.client.nom}`.toLowerCase().includes(searchTerm.toLowerCase())
-      );
+    } else {
+      alert("Une erreur est survenue.");
     }
-
-    // Status filter
-    if (statusFilter !== 'all') {
-      currentDevis = currentDevis.filter(d => d.statut === statusFilter);
-    }
-
-    setFilteredDevis(currentDevis);
-    setCurrentPage(1);
-  }, [devis, searchTerm, statusFilter]);
-
-  // ### Pagination Logic ###
-  useEffect(() => {
-    if (filteredDevis) {
-      const startIndex = (currentPage - 1) * itemsPerPage;
-      const endIndex = startIndex + itemsPerPage;
-      setPaginatedDevis(filteredDevis.slice(startIndex, endIndex));
-    }
-  }, [filteredDevis, currentPage, itemsPerPage]);
-
-  // Reset to page 1 when itemsPerPage changes
-  useEffect(() => {
-    setCurrentPage(1);
-  }, [itemsPerPage]);
+  });
+  const paginatedDevis = pagination.items;
+  const loading = pagination.loading;
 
   if (loading) return <div>Chargement...</div>;
 
@@ -143,29 +101,7 @@ function ListeDevis() {
         </tbody>
       </table>
 
-      {filteredDevis.length > itemsPerPage && (
-        <nav>
-          <ul className="pagination justify-content-center">
-            <li className={`page-item ${currentPage === 1 ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage - 1); }}>
-                Précédent
-              </a>
-            </li>
-            {Array.from({ length: Math.ceil(filteredDevis.length / itemsPerPage) }, (_, i) => i + 1).map(number => (
-              <li key={number} className={`page-item ${currentPage === number ? 'active' : ''}`}>
-                <a onClick={(e) => { e.preventDefault(); setCurrentPage(number); }} href="!#" className='page-link'>
-                  {number}
-                </a>
-              </li>
-            ))}
-            <li className={`page-item ${currentPage >= Math.ceil(filteredDevis.length / itemsPerPage) ? 'disabled' : ''}`}>
-              <a className="page-link" href="!#" onClick={(e) => { e.preventDefault(); setCurrentPage(currentPage + 1); }}>
-                Suivant
-              </a>
-            </li>
-          </ul>
-        </nav>
-      )}
+      <CursorPagination pagination={pagination} />
 
     </div>
   );